@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""tradingview_feed WebSocket 프레임 해석 테스트 (고정 프레임 사용, 브라우저 없이 python -m pytest -q)"""
+from __future__ import annotations
+import json
+
+import numpy as np
+
+from tradingview_feed import (DIR_RECEIVED, DIR_SENT, FeedCapture, FeedDecoder, decode_recorded,
+                              split_frames)
+
+
+def frame(*bodies) -> str:
+    """메시지(dict) 또는 문자열 본문들 → '~m~<길이>~m~<본문>' 이어 붙인 프레임"""
+    out = []
+    for body in bodies:
+        text = body if isinstance(body, str) else json.dumps(body, separators=(",", ":"))
+        out.append(f"~m~{len(text)}~m~{text}")
+    return "".join(out)
+
+
+def series(method: str, turnaround: str, symbol: str = "symbol_1", interval: str = "D", series_id: str = "sds_1"):
+    return {"m": method, "p": ["cs_1", series_id, turnaround, symbol, interval, 300]}
+
+
+def update(bars, turnaround: str | None = None, method: str = "timescale_update", series_id: str = "sds_1"):
+    data = {"s": [{"i": i, "v": v} for i, v in enumerate(bars)]}
+    if turnaround:
+        data["t"] = turnaround
+    return {"m": method, "p": ["cs_1", {series_id: data}]}
+
+
+def test_split_frames_handles_heartbeats_and_unframed_payloads():
+    payload = frame({"m": "a"}, "~h~12", '{"m":"b","p":["한글"]}')
+    assert split_frames(payload) == ['{"m":"a"}', "~h~12", '{"m":"b","p":["한글"]}']
+    assert split_frames('{"m":"plain"}') == ['{"m":"plain"}']
+    # 길이가 숫자가 아니면 거기서 멈춤
+    assert split_frames("~m~1~m~x~m~zz~m~{}") == ["x"]
+
+
+def test_decoder_collects_main_series_bars_in_time_order():
+    dec = FeedDecoder()
+    dec.feed(DIR_SENT, frame(series("create_series", "s1")))
+    dec.feed(DIR_RECEIVED, frame(
+        "~h~1",
+        update([[200, 2, 3, 1, 2.5, 20], [100, 1, 2, 0.5, 1.5, 10]], "s1"),
+        update([[100, 9, 9, 9, 9, 9]], "s1", series_id="sds_2"),  # 비교 종목 시리즈는 무시
+        {"m": "quote_sd", "p": ["qs_1", {}]},
+    ))
+    # 진행 중인 마지막 봉 갱신(du), 거래량 없는 값은 NaN
+    dec.feed(DIR_RECEIVED, frame(update([[200, 2, 4, 1, 3.5]], method="du")))
+    out = dec.bars()
+    assert len(dec) == 2 and dec.frames == 3
+    assert out["time"].tolist() == [100, 200]
+    assert out["open"].tolist() == [1, 2]
+    assert out["high"].tolist() == [2, 4]
+    assert out["close"].tolist() == [1.5, 3.5]
+    assert out["volume"][0] == 10 and np.isnan(out["volume"][1])
+
+
+def test_modify_series_drops_old_bars_and_late_replies():
+    dec = FeedDecoder()
+    dec.feed(DIR_SENT, frame(series("create_series", "s1", "symbol_1", "D")))
+    dec.feed(DIR_RECEIVED, frame(update([[100, 1, 1, 1, 1, 1]], "s1")))
+    dec.feed(DIR_SENT, frame(series("modify_series", "s2", "symbol_2", "60")))
+    assert dec.turnaround == "s2" and len(dec) == 0
+
+    # 이전 요청(s1)에 대한 늦은 응답은 버리고, 새 턴어라운드(s2) 응답만 모음
+    dec.feed(DIR_RECEIVED, frame(update([[150, 5, 5, 5, 5, 5]], "s1"), update([[3600, 2, 2, 2, 2, 2]], "s2")))
+    # 다른 시리즈의 modify_series 는 메인 시리즈 상태를 건드리지 않음
+    dec.feed(DIR_SENT, frame(series("modify_series", "s9", series_id="sds_2")))
+    assert dec.turnaround == "s2"
+    assert dec.bars()["time"].tolist() == [3600]
+
+
+def test_capture_from_performance_log_records_frames_for_replay(tmp_path):
+    payloads = [
+        (DIR_SENT, frame(series("create_series", "s1"))),
+        (DIR_RECEIVED, frame(update([[100, 1, 2, 0.5, 1.5, 10], [200, 2, 3, 1, 2.5, 20]], "s1"))),
+    ]
+    method = {DIR_SENT: "Network.webSocketFrameSent", DIR_RECEIVED: "Network.webSocketFrameReceived"}
+    entries = [{"message": json.dumps({"message": {"method": method[d], "params": {"response": {"payloadData": p}}}})}
+               for d, p in payloads]
+    entries.insert(1, {"message": json.dumps({"message": {"method": "Network.requestWillBeSent", "params": {}}})})
+
+    class FakeDriver:
+        def get_log(self, kind):
+            assert kind == "performance"
+            out, entries[:] = list(entries), []
+            return out
+
+    record = tmp_path / "frames.jsonl"
+    capture = FeedCapture(FakeDriver(), record_path=record)
+    decoded = capture.collect().bars()
+    assert decoded["time"].tolist() == [100, 200]
+    assert capture.decoder.frames == 2
+
+    replayed = decode_recorded(record).bars()
+    for col, values in decoded.items():
+        assert replayed[col].tolist() == values.tolist()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""tradingview_indicators 로컬 지표 계산 테스트 (단순 반복문 기준값과 비교, python -m pytest -q)"""
+from __future__ import annotations
+import calendar
+
+import numpy as np
+
+from tradingview_indicators import STATE_FILE, macd, pine_ma, rsi, update_indicators
+from tradingview_storage import BarDataset
+
+DAY = 86400
+
+
+def ts(y: int, m: int, d: int) -> int:
+    return calendar.timegm((y, m, d, 0, 0, 0))
+
+
+def walk(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100.0 + np.cumsum(rng.normal(0, 1, n))
+
+
+# -----------------------------
+# Pine 정의를 그대로 옮긴 반복문 기준값
+# -----------------------------
+def ref_ma(x, length, alpha):
+    out = [np.nan] * len(x)
+    for i in range(length - 1, len(x)):
+        if i == length - 1:
+            out[i] = sum(x[:length]) / length
+        else:
+            out[i] = alpha * x[i] + (1 - alpha) * out[i - 1]
+    return np.array(out)
+
+
+def ref_sma(x, length):
+    out = [np.nan] * len(x)
+    for i in range(length - 1, len(x)):
+        window = x[i - length + 1:i + 1]
+        out[i] = np.nan if any(np.isnan(v) for v in window) else sum(window) / length
+    return np.array(out)
+
+
+def ref_rsi(close, length=14):
+    up = [max(close[i] - close[i - 1], 0.0) for i in range(1, len(close))]
+    down = [max(close[i - 1] - close[i], 0.0) for i in range(1, len(close))]
+    up = np.r_[np.nan, ref_ma(up, length, 1.0 / length)]
+    down = np.r_[np.nan, ref_ma(down, length, 1.0 / length)]
+    out = []
+    for u, d in zip(up, down):
+        if np.isnan(u) or np.isnan(d):
+            out.append(np.nan)
+        elif d == 0:
+            out.append(100.0)
+        elif u == 0:
+            out.append(0.0)
+        else:
+            out.append(100.0 - 100.0 / (1.0 + u / d))
+    return np.array(out)
+
+
+def ref_macd(close, fast=12, slow=26, signal=9):
+    line = ref_ma(close, fast, 2.0 / (fast + 1)) - ref_ma(close, slow, 2.0 / (slow + 1))
+    sig = np.full(len(close), np.nan)
+    sig[slow - 1:] = ref_ma(line[slow - 1:], signal, 2.0 / (signal + 1))
+    return line, sig
+
+
+def same(a, b):
+    np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+# -----------------------------
+# 전체 계산
+# -----------------------------
+def test_pine_ma_matches_loop_including_long_series():
+    # 블록 경계(닫힌 식 블록 길이)를 여러 번 넘는 길이
+    x = walk(5000)
+    for length, alpha in [(14, 1 / 14), (12, 2 / 13), (200, 2 / 201)]:
+        same(pine_ma(x, length, alpha), ref_ma(x, length, alpha))
+    assert np.isnan(pine_ma(x[:5], 14, 1 / 14)).all()
+
+
+def test_rsi_matches_loop():
+    close = walk(400)
+    close[50:70] = close[49]  # 변화 없는 구간
+    cols, _ = rsi(close)
+    value = ref_rsi(close)
+    same(cols["rsi"], value)
+    same(cols["rsi_ma"], ref_sma(value, 14))
+
+
+def test_rsi_flat_and_one_way_series():
+    assert rsi(np.arange(40, dtype=float))[0]["rsi"][-1] == 100.0
+    assert rsi(np.arange(40, 0, -1, dtype=float))[0]["rsi"][-1] == 0.0
+
+
+def test_macd_matches_loop():
+    close = walk(400)
+    cols, _ = macd(close)
+    line, sig = ref_macd(close)
+    same(cols["macd"], line)
+    same(cols["macd_signal"], sig)
+    same(cols["macd_hist"], line - sig)
+
+
+# -----------------------------
+# 증분 갱신
+# -----------------------------
+def test_update_on_appended_bars_equals_full_recompute(tmp_path):
+    close = walk(300)
+    times = np.array([ts(2024, 1, 1) + i * DAY for i in range(len(close))], dtype=np.int64)
+    keywords = ["Relative Strength Index", "MACD"]
+
+    inc = BarDataset(tmp_path / "inc", "GOOG", "D")
+    inc.merge({"time": times[:200], "close": close[:200]})
+    assert update_indicators(tmp_path / "inc", "GOOG", "D", keywords) == 200
+    assert (inc.path / STATE_FILE).exists()
+    # 마지막 봉(진행 중)이 바뀐 값으로 다시 들어오고 새 봉이 이어짐
+    inc.merge({"time": times[199:], "close": close[199:]})
+    assert update_indicators(tmp_path / "inc", "GOOG", "D", keywords) == 101
+
+    full = BarDataset(tmp_path / "full", "GOOG", "D")
+    full.merge({"time": times, "close": close})
+    update_indicators(tmp_path / "full", "GOOG", "D", keywords)
+
+    a, b = inc.read(), full.read()
+    for col in ["rsi", "rsi_ma", "macd", "macd_signal", "macd_hist"]:
+        same(a[col], b[col])
+    same(a["rsi"], ref_rsi(close))
+
+
+def test_update_recomputes_everything_when_an_old_bar_changes(tmp_path):
+    close = walk(120)
+    times = np.array([ts(2024, 1, 1) + i * DAY for i in range(len(close))], dtype=np.int64)
+    ds = BarDataset(tmp_path, "GOOG", "D")
+    ds.merge({"time": times, "close": close})
+    update_indicators(tmp_path, "GOOG", "D", ["MACD"])
+
+    # 상태 기준 봉(끝에서 두 번째)의 종가가 바뀌면 이어 계산하지 않고 처음부터
+    close[-2] += 5.0
+    ds.merge({"time": times[-2:], "close": close[-2:]})
+    assert update_indicators(tmp_path, "GOOG", "D", ["MACD"]) == len(close)
+    same(ds.read()["macd"], ref_macd(close)[0])
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""tradingview_ingest CSV 정규화 테스트 (시각 오프셋, 빠른 경로/csv 대체 경로, 묶음 경계 중복 제거, python -m pytest -q)"""
+from __future__ import annotations
+import calendar
+
+import numpy as np
+
+import tradingview_storage as storage
+from tradingview_ingest import _parse_block_csv, _parse_block_fast, iter_bar_batches, normalize_header, parse_times
+from tradingview_storage import BarDataset, ingest_csv
+
+
+def ts(y: int, m: int, d: int, hh: int = 0, mm: int = 0) -> int:
+    return calendar.timegm((y, m, d, hh, mm, 0))
+
+
+def test_parse_times_with_offsets():
+    values = np.array(["2024-01-02T09:30:00Z", "2024-01-02T09:30:00+09:00", "2024-01-02T09:30:00-05:30",
+                       "2024-01-02T09:30:00.250+01:00", "2024-01-02T09:30:00"])
+    assert parse_times(values).tolist() == [ts(2024, 1, 2, 9, 30), ts(2024, 1, 2, 0, 30), ts(2024, 1, 2, 15, 0),
+                                            ts(2024, 1, 2, 8, 30), ts(2024, 1, 2, 9, 30)]
+
+
+def test_parse_times_epoch_and_empty():
+    assert parse_times(np.array(["1704186000", "1704189600"])).tolist() == [1704186000, 1704189600]
+    assert parse_times(np.array(["1704186000.0"])).tolist() == [1704186000]
+    assert parse_times(np.array([], dtype=str)).dtype == np.int64
+
+
+def test_fast_block_turns_empty_cells_into_nan():
+    lines = ["1,1.5,,3\n", "2,,,\r\n", '"3","4","5","6"\n']
+    block = _parse_block_fast(lines, 4)
+    assert block["times"].tolist() == ["1", "2", "3"]
+    assert np.array_equal(block["values"], [[1.5, np.nan, 3], [np.nan, np.nan, np.nan], [4, 5, 6]], equal_nan=True)
+
+
+def test_fast_block_falls_back_to_csv_for_quoted_commas_and_text():
+    quoted = ['1,"1,234.5",2\n', "2,3,4\n"]
+    assert _parse_block_fast(quoted, 3) is None
+    block = _parse_block_csv(quoted, 3)
+    # 천 단위 쉼표 값은 숫자가 아니므로 NaN, 같은 행의 다른 칸은 그대로
+    assert np.isnan(block["values"][0, 0]) and block["values"][0, 1] == 2
+    assert block["values"][1].tolist() == [3, 4]
+
+    text = ["1,n/a,2\n", "2,3\n"]
+    assert _parse_block_fast(text, 3) is None
+    block = _parse_block_csv(text, 3)
+    assert np.array_equal(block["values"], [[np.nan, 2], [3, np.nan]], equal_nan=True)
+
+
+def test_normalize_header_maps_aliases_and_dedupes():
+    assert normalize_header(["\ufefftime", "Open", '"RSI-based MA"', "Plot", "Plot", "Upper"]) == \
+        ["time", "open", "rsi_ma", "plot", "plot_2", "bb_upper"]
+
+
+def test_iter_bar_batches_handles_bom_quotes_and_mixed_blocks(tmp_path):
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text('"time","open","close","Volume"\r\n'
+                        '2024-01-02T14:30:00Z,1,2,\r\n'
+                        '\r\n'
+                        '2024-01-03T14:30:00Z,"1,5",3,100\r\n'
+                        '2024-01-04T14:30:00Z,4,5,200\r\n', encoding="utf-8-sig")
+    batches = list(iter_bar_batches(csv_file, batch_rows=2))
+    # batch_rows는 읽은 줄 수 기준: 첫 묶음의 빈 줄은 건너뜀
+    assert [len(b["time"]) for b in batches] == [1, 2]
+    assert list(batches[0]) == ["time", "open", "close", "volume"]
+    assert batches[0]["time"].tolist() == [ts(2024, 1, 2, 14, 30)]
+    assert np.isnan(batches[0]["volume"][0])
+    # 둘째 묶음: 따옴표 안 쉼표 때문에 csv 경로로 처리, 나머지 칸과 다음 행은 그대로
+    assert batches[1]["time"].tolist() == [ts(2024, 1, 3, 14, 30), ts(2024, 1, 4, 14, 30)]
+    assert np.array_equal(batches[1]["open"], [np.nan, 4], equal_nan=True)
+    assert batches[1]["close"].tolist() == [3, 5]
+    assert batches[1]["volume"].tolist() == [100, 200]
+
+
+def test_ingest_csv_dedupes_across_batch_boundaries(tmp_path, monkeypatch):
+    db = tmp_path / "db"
+    # 기존 데이터의 마지막 봉은 새 내보내기 값으로 갱신
+    BarDataset(db, "GOOG", "D").merge({"time": np.array([ts(2023, 12, 29)], dtype=np.int64),
+                                        "close": np.array([0.0])})
+    csv_file = tmp_path / "export.csv"
+    days = [ts(2023, 12, 29), ts(2024, 1, 2), ts(2024, 1, 3), ts(2024, 1, 3), ts(2024, 1, 4), ts(2024, 1, 2)]
+    csv_file.write_text("time,close\n" + "".join(f"{t},{i + 1}\n" for i, t in enumerate(days)), encoding="utf-8")
+    # 3행씩: 01-03 중복이 두 묶음에 걸치고, 01-02는 마지막 묶음에 다시 나옴
+    monkeypatch.setattr(storage, "iter_bar_batches", lambda path: iter_bar_batches(path, batch_rows=3))
+
+    assert ingest_csv(csv_file, db, "GOOG", "D") == 3
+    out = BarDataset(db, "GOOG", "D").read()
+    assert out["time"].tolist() == [ts(2023, 12, 29), ts(2024, 1, 2), ts(2024, 1, 3), ts(2024, 1, 4)]
+    # 같은 시각은 파일에서 나중에 나온 값
+    assert out["close"].tolist() == [1, 6, 4, 5]
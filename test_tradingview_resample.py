@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""tradingview_resample 일봉 → 주/월/연봉 묶음 경계 테스트 (python -m pytest -q)"""
+from __future__ import annotations
+import calendar
+
+import numpy as np
+
+from tradingview_resample import derive_from_daily, resample
+from tradingview_storage import BarDataset, ingest_bars
+
+SESSION = 14 * 3600 + 30 * 60  # 일봉 시각 = 그날 14:30 UTC (미국 장 시작)
+
+
+def ts(y: int, m: int, d: int, seconds: int = SESSION) -> int:
+    return calendar.timegm((y, m, d, 0, 0, 0)) + seconds
+
+
+def daily(dates, seconds: int = SESSION):
+    """날짜마다 open=i, high=i+10, low=i-10, close=i+0.5, volume=100 인 일봉"""
+    n = len(dates)
+    i = np.arange(n, dtype=np.float64)
+    return {"time": np.array([ts(*d, seconds=seconds) for d in dates], dtype=np.int64),
+            "open": i, "high": i + 10, "low": i - 10, "close": i + 0.5, "volume": np.full(n, 100.0)}
+
+
+def test_week_starts_on_monday_even_when_monday_is_a_holiday():
+    # 2024-01-05 금 | 2024-01-09 화 (월요일 휴장) ~ 01-12 금 | 2024-01-15 월
+    bars = daily([(2024, 1, 5), (2024, 1, 9), (2024, 1, 10), (2024, 1, 12), (2024, 1, 15)])
+    out = resample(bars, "W")
+    assert out["time"].tolist() == [ts(2024, 1, 1), ts(2024, 1, 8), ts(2024, 1, 15)]
+    assert out["open"].tolist() == [0, 1, 4]
+    assert out["high"].tolist() == [10, 13, 14]
+    assert out["low"].tolist() == [-10, -9, -6]
+    assert out["close"].tolist() == [0.5, 3.5, 4.5]
+    assert out["volume"].tolist() == [100, 300, 100]
+
+
+def test_month_boundary_including_leap_day():
+    bars = daily([(2024, 1, 31), (2024, 2, 1), (2024, 2, 29), (2024, 3, 1)])
+    out = resample(bars, "M")
+    assert out["time"].tolist() == [ts(2024, 1, 1), ts(2024, 2, 1), ts(2024, 3, 1)]
+    assert out["open"].tolist() == [0, 1, 3]
+    assert out["close"].tolist() == [0.5, 2.5, 3.5]
+
+
+def test_year_boundary_and_nan_cells():
+    bars = daily([(2022, 12, 30), (2023, 1, 3), (2023, 6, 1), (2023, 12, 29), (2024, 1, 2)])
+    bars["open"][1] = np.nan  # 해의 첫 봉 시가가 비면 다음 봉 시가
+    bars["close"][3] = np.nan  # 해의 마지막 봉 종가가 비면 그 앞 봉 종가
+    bars["volume"][4] = np.nan
+    out = resample(bars, "12M")
+    assert out["time"].tolist() == [ts(2022, 1, 1), ts(2023, 1, 1), ts(2024, 1, 1)]
+    assert out["open"].tolist() == [0, 2, 4]
+    assert out["close"].tolist() == [0.5, 2.5, 4.5]
+    assert out["volume"][:2].tolist() == [100, 300]
+    assert np.isnan(out["volume"][2])
+
+
+def test_utc_offset_keeps_sessions_that_start_the_previous_utc_day():
+    # 시드니(UTC+10): 2024-03-01 세션이 UTC 2024-02-29 23:00 에 시작
+    offset = 10 * 3600
+    bars = daily([(2024, 2, 28), (2024, 2, 29)], seconds=23 * 3600)
+    out = resample(bars, "M", utc_offset=offset)
+    assert out["time"].tolist() == [ts(2024, 1, 31, 23 * 3600), ts(2024, 2, 29, 23 * 3600)]
+    assert out["open"].tolist() == [0, 1]
+
+
+def test_derive_since_mid_period_rebuilds_whole_periods(tmp_path):
+    dates = [(2024, 2, 27), (2024, 2, 28), (2024, 2, 29), (2024, 3, 1), (2024, 3, 4),
+             (2024, 3, 5), (2024, 3, 6), (2024, 3, 7)]
+    bars = daily(dates)
+    ingest_bars({c: v[:6] for c, v in bars.items()}, tmp_path / "inc", "GOOG", "D")
+    derive_from_daily(tmp_path / "inc", "GOOG")
+
+    # 3/5(화) 봉 수정 + 새 봉 2개, since는 기간 중간(수정된 봉)
+    bars["close"][5] = 99.0
+    ingest_bars({c: v[5:] for c, v in bars.items()}, tmp_path / "inc", "GOOG", "D")
+    added = derive_from_daily(tmp_path / "inc", "GOOG", since=ts(2024, 3, 5))
+    assert added == {"W": 0, "M": 0, "12M": 0}
+
+    ingest_bars(bars, tmp_path / "full", "GOOG", "D")
+    derive_from_daily(tmp_path / "full", "GOOG")
+    for tf in ["W", "M", "12M"]:
+        inc, full = BarDataset(tmp_path / "inc", "GOOG", tf).read(), BarDataset(tmp_path / "full", "GOOG", tf).read()
+        for col in ["time", "open", "high", "low", "close", "volume"]:
+            assert inc[col].tolist() == full[col].tolist(), (tf, col)
+
+    # 앞부분이 빠진 봉으로 덮어쓰지 않음: 3월 봉 시가는 3/1, 3/4 주 봉 시가는 3/4
+    month = BarDataset(tmp_path / "inc", "GOOG", "M").read(ts(2024, 3, 1))
+    assert month["open"].tolist() == [3] and month["volume"].tolist() == [500]
+    week = BarDataset(tmp_path / "inc", "GOOG", "W").read(ts(2024, 3, 4))
+    assert week["open"].tolist() == [4] and week["close"].tolist() == [7.5] and week["high"].tolist() == [17]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""tradingview_storage 데이터셋 병합/중복 제거/구간 읽기 테스트 (python -m pytest -q)"""
+from __future__ import annotations
+import calendar
+
+import numpy as np
+
+import tradingview_storage as storage
+from tradingview_ingest import iter_bar_batches
+from tradingview_storage import BarDataset, ingest_csv
+
+
+def ts(y: int, m: int, d: int) -> int:
+    return calendar.timegm((y, m, d, 0, 0, 0))
+
+
+def bars(times, close, **extra):
+    out = {"time": np.array(times, dtype=np.int64), "close": np.array(close, dtype=np.float64)}
+    out.update({k: np.array(v, dtype=np.float64) for k, v in extra.items()})
+    return out
+
+
+def test_merge_splits_partitions_and_counts_new_bars(tmp_path):
+    ds = BarDataset(tmp_path, "GOOG", "D")
+    added = ds.merge(bars([ts(2023, 12, 29), ts(2024, 1, 2), ts(2024, 1, 3)], [1, 2, 3]))
+    assert added == 3
+    assert [p.name for p in ds.partitions()] == ["part=2023.npz", "part=2024.npz"]
+    assert ds.last_time() == ts(2024, 1, 3)
+
+
+def test_merge_dedupes_on_time_keeping_new_values(tmp_path):
+    ds = BarDataset(tmp_path, "GOOG", "D")
+    ds.merge(bars([ts(2024, 1, 2), ts(2024, 1, 3)], [2, 3], rsi=[50, 60]))
+    # 마지막 봉 갱신 + 새 봉 1개, 이번에 없는 rsi 열은 기존 값 유지
+    added = ds.merge(bars([ts(2024, 1, 3), ts(2024, 1, 4)], [3.5, 4]))
+    assert added == 1
+    out = ds.read()
+    assert out["time"].tolist() == [ts(2024, 1, 2), ts(2024, 1, 3), ts(2024, 1, 4)]
+    assert out["close"].tolist() == [2, 3.5, 4]
+    assert out["rsi"][:2].tolist() == [50, 60]
+    assert np.isnan(out["rsi"][2])
+
+
+def test_merge_dedupes_within_one_batch(tmp_path):
+    ds = BarDataset(tmp_path, "GOOG", "D")
+    added = ds.merge(bars([ts(2024, 1, 2), ts(2024, 1, 2), ts(2024, 1, 3)], [1, 9, 3]))
+    assert added == 2
+    assert ds.read()["close"].tolist() == [9, 3]
+
+
+def test_read_range_is_inclusive_and_skips_other_partitions(tmp_path):
+    ds = BarDataset(tmp_path, "GOOG", "1h")
+    times = [ts(2024, 1, 31), ts(2024, 2, 1), ts(2024, 2, 15), ts(2024, 3, 1)]
+    ds.merge(bars(times, [1, 2, 3, 4]))
+    assert len(ds.partitions()) == 3
+    out = ds.read(ts(2024, 2, 1), ts(2024, 3, 1))
+    assert out["time"].tolist() == times[1:]
+    assert out["close"].tolist() == [2, 3, 4]
+    assert ds.read(ts(2025, 1, 1))["time"].tolist() == []
+
+
+def test_ingest_csv_merges_each_partition_once(tmp_path, monkeypatch):
+    csv_file = tmp_path / "export.csv"
+    rows = ["time,open,high,low,close,Volume"]
+    days = [ts(2023, 12, 28), ts(2023, 12, 29), ts(2024, 1, 2), ts(2024, 1, 3), ts(2024, 1, 4), ts(2024, 1, 4)]
+    for i, t in enumerate(days):
+        rows.append(f"{t},{i},{i},{i},{i},{i * 10}")
+    csv_file.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    # 2행씩 끊어 읽어 묶음 3개가 두 파티션에 걸치게 함
+    monkeypatch.setattr(storage, "iter_bar_batches", lambda path: iter_bar_batches(path, batch_rows=2))
+    merged = []
+    original = BarDataset.merge
+    monkeypatch.setattr(BarDataset, "merge", lambda self, data: merged.append(len(data["time"])) or original(self, data))
+
+    added = ingest_csv(csv_file, tmp_path / "db", "GOOG", "D")
+    assert added == 5
+    assert merged == [2, 4]
+    out = BarDataset(tmp_path / "db", "GOOG", "D").read()
+    assert out["time"].tolist() == sorted(set(days))
+    assert out["close"][-1] == 5
+    assert storage.get_marks(tmp_path / "db").get("GOOG", "D")["last_ts"] == ts(2024, 1, 4)
+
+
+def test_ingest_csv_merges_each_partition_before_reading_the_rest(tmp_path, monkeypatch):
+    csv_file = tmp_path / "export.csv"
+    days = [ts(2021, 6, 1), ts(2021, 6, 2), ts(2022, 6, 1), ts(2022, 6, 2), ts(2023, 6, 1), ts(2023, 6, 2)]
+    csv_file.write_text("time,close\n" + "".join(f"{t},{i}\n" for i, t in enumerate(days)), encoding="utf-8")
+
+    read = []
+
+    def _batches(path):
+        for batch in iter_bar_batches(path, batch_rows=2):
+            read.append(len(batch["time"]))
+            yield batch
+    monkeypatch.setattr(storage, "iter_bar_batches", _batches)
+    seen_at_merge = []
+    original = BarDataset.merge
+    monkeypatch.setattr(BarDataset, "merge", lambda self, data: seen_at_merge.append(len(read)) or original(self, data))
+
+    assert ingest_csv(csv_file, tmp_path / "db", "GOOG", "D") == 6
+    # 2021 파티션은 두 번째 묶음을 읽자마자 병합 (파일 전체를 모아 두지 않음)
+    assert seen_at_merge == [2, 3, 3]
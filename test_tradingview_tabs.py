@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""tradingview_tabs 탭 풀 명령 경로 테스트 (크롬 없이 가짜 WebDriver 명령 실행기 사용, python -m pytest -q)"""
+from __future__ import annotations
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tradingview_tabs import TabPool
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class FakeBrowser:
+    """창 전환 상태를 가진 WebDriver 명령 실행기: 요소는 만든 창에 속하고, 다른 창이 활성일 때 입력하면 오류로 기록"""
+
+    def __init__(self):
+        self.current = "w0"
+        self.windows = ["w0"]
+        self.typed = {}
+        self.errors = []
+        self.cdp = []
+        self._n = 0
+
+    def execute(self, command, params):
+        params = params or {}
+        if command == Command.NEW_SESSION:
+            return {"value": {"sessionId": "s1", "capabilities": {"browserName": "chrome"}}}
+        if command == Command.NEW_WINDOW:
+            handle = f"w{len(self.windows)}"
+            self.windows.append(handle)
+            return {"value": {"handle": handle, "type": "window"}}
+        if command == Command.SWITCH_TO_WINDOW:
+            self.current = params["handle"]
+        elif command == Command.W3C_GET_CURRENT_WINDOW_HANDLE:
+            return {"value": self.current}
+        elif command == Command.FIND_ELEMENT:
+            self._n += 1
+            return {"value": {ELEMENT_KEY: f"{self.current}:{self._n}"}}
+        elif command == Command.SEND_KEYS_TO_ELEMENT:
+            owner = params["id"].split(":")[0]
+            # 실제 브라우저처럼 입력 중에도 다른 명령이 끼어들 수 있게 잠깐 양보
+            time.sleep(0.001)
+            if owner != self.current:
+                self.errors.append(f"{owner} 요소에 {self.current} 창에서 입력")
+            self.typed.setdefault(owner, []).append(params["text"])
+        elif command == "executeCdpCommand":
+            self.cdp.append((self.current, params["cmd"]))
+        return {"value": None}
+
+
+class FakeChrome(WebDriver):
+    def __init__(self, browser: FakeBrowser):
+        super().__init__(command_executor=browser, options=Options())
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+def test_elements_found_through_a_tab_type_into_that_tab():
+    browser = FakeBrowser()
+    pool = TabPool(FakeChrome(browser), 2)
+
+    def _type(tab):
+        for i in range(200):
+            tab.find_element(By.CSS_SELECTOR, "input").send_keys(f"{tab.tab_index}-{i}")
+
+    threads = [threading.Thread(target=_type, args=(tab,)) for tab in pool.tabs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert browser.errors == []
+    assert pool.tabs[1].find_element(By.CSS_SELECTOR, "input")._parent is pool.tabs[1]
+    assert [len(browser.typed[h]) for h in pool.handles] == [200, 200]
+    assert all(text.startswith(f"{i}-") for i, h in enumerate(pool.handles) for text in browser.typed[h])
+
+
+def test_resource_blocking_is_applied_in_every_window():
+    browser = FakeBrowser()
+    pool = TabPool(FakeChrome(browser), 3, block_patterns=["*.png"])
+    blocked = {handle for handle, cmd in browser.cdp if cmd == "Network.setBlockedURLs"}
+    assert blocked == set(pool.handles)
@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+"""
+Task3 asyncio 실행기 (DevTools 프로토콜 직접 제어)
+
+- Selenium 호출은 WebDriverWait / execute_script 마다 파이썬 스레드를 붙잡아, 그동안 다운로드 처리·CSV 파싱·저장을
+  겹쳐 실행할 수 없습니다. 이 실행기는 Selenium으로 크롬만 띄우고(로그인/경량 옵션 그대로),
+  조작은 tradingview_cdp 의 WebSocket 연결로 보내 각 단계를 코루틴으로 실행합니다.
+  go_chart → (지연 로딩) → export_csv → 다운로드 완료 대기 → 저장(작업 스레드)
+- 탭 N개를 이벤트 루프 1개가 함께 진행하고, CSV 병합/DB 쓰기는 작업 스레드로 넘겨 다음 작업의 차트 이동과 겹칩니다.
+- 페이지 안의 루틴(차트 전환, 지연 로딩, 선택자 해석, 대기 훅)은 Selenium 경로와 같은 스크립트를 씁니다.
+- 지표는 UI로 추가하지 않습니다. 저장된 차트 레이아웃의 지표가 그대로 내보내지거나,
+  TV_INDICATOR_SOURCE=local 이면 저장 후 직접 계산합니다. feed 수집 모드는 지원하지 않습니다(내보내기 사용).
+
+실행 예
+- python tradingview_async.py --tabs 4
+- python tradingview_async.py --tabs 4 --resume
+"""
+from __future__ import annotations
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+import tradingview_macro_Task3 as task3
+from tradingview_cdp import CDPConnection, CDPTab, DownloadTracker, ScriptError, CSS_ARG, browser_ws_url, debugger_address
+from tradingview_lazyload import (HISTORY_STATE_JS, LAZY_LOAD_JS, LAZY_LOAD_START_JS, LAZY_STATUS_JS, LAZY_GRANT_JS,
+                                  lazy_load_options)
+from tradingview_selectors import RESOLVE_JS, resolve_options, record_lookup
+from tradingview_wait import (LATENCY, POLL_FREQUENCY, CHART_CANVAS_CSS, CANVAS_HISTORY_FRACTION, OVERLAY_CSS,
+                              PROBE_JS, CANVAS_SIGNATURE_JS)
+from tradingview_browser import load_block_list
+from tradingview_retry import run_step_async
+from tradingview_ratelimit import ThrottleDetected, THROTTLE_PROBE_JS, throttle_reason
+from tradingview_trace import TRACER, open_trace
+from tradingview_journal import JobJournal
+from tradingview_storage import get_marks
+
+Timeframe = Tuple[str, str, str, bool]
+Check = Callable[[], Awaitable[bool]]
+
+_CHART_LOADED_JS = "return location.pathname.indexOf('/chart/') >= 0 && !!document.querySelector(arguments[0]);"
+
+
+# -----------------------------
+# 조건 대기 (tradingview_wait 의 코루틴 버전, 폴링 사이에 다른 탭 진행)
+# -----------------------------
+async def wait_until(step: str, check: Check, timeout: float = 10) -> bool:
+    """check()가 참이 될 때까지 대기, 시간 초과면 False (LATENCY에 단계별 기록)
+
+    페이지 스크립트 오류/결과 없음은 다음 확인으로 넘기지만, DevTools 연결 끊김(CDPError)은 그대로 올려
+    탭마다 시간 초과까지 기다리지 않게 합니다.
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            if await check():
+                LATENCY.record(step, time.monotonic() - start)
+                return True
+        except (ScriptError, asyncio.TimeoutError, KeyError, TypeError):
+            pass
+        if time.monotonic() - start >= timeout:
+            LATENCY.record(step, time.monotonic() - start, ok=False)
+            return False
+        await asyncio.sleep(POLL_FREQUENCY)
+
+
+async def settle(tab: CDPTab, step: str, check: Check, timeout: float = 5) -> bool:
+    ok = await wait_until(step, check, timeout)
+    if not ok:
+        print(f"[WARN] {tab.name} 대기 시간 초과: {step} ({timeout}s)")
+    return ok
+
+
+def canvas_present(tab: CDPTab) -> Check:
+    async def _check() -> bool:
+        return bool(await tab.script(_CHART_LOADED_JS, CHART_CANVAS_CSS))
+    return _check
+
+
+def chart_ready(tab: CDPTab, quiet: float = 0.3) -> Check:
+    """캔버스 존재 + 네트워크 한산 + 캔버스 픽셀 서명이 quiet초 동안 그대로"""
+    state = {"sig": None, "since": 0.0}
+
+    async def _check() -> bool:
+        probe = await tab.script(PROBE_JS)
+        if probe["inflight"] or probe["sinceNet"] < quiet:
+            return False
+        sig = await tab.script(CANVAS_SIGNATURE_JS, CHART_CANVAS_CSS, CANVAS_HISTORY_FRACTION)
+        now = time.monotonic()
+        if sig is None:
+            return False
+        if sig != state["sig"]:
+            state["sig"], state["since"] = sig, now
+            return False
+        return now - state["since"] >= quiet
+    return _check
+
+
+def quiet_for(tab: CDPTab, quiet: float = 0.15, scope: str = OVERLAY_CSS) -> Check:
+    """scope 안의 DOM 변경이 quiet초 동안 없으면 참 (tradingview_wait.dom_quiet 의 코루틴 버전)"""
+    state = {"start": None}
+
+    async def _check() -> bool:
+        now = time.monotonic()
+        if state["start"] is None:
+            state["start"] = now
+        probe = await tab.script(PROBE_JS, scope)
+        return min(probe["sinceMut"], now - state["start"]) >= quiet
+    return _check
+
+
+async def check_throttle(tab: CDPTab, kind: str) -> None:
+    """Task3 check_throttle 의 코루틴 버전 (같은 전역 조절기에 보고)"""
+    try:
+        probe = await tab.script(THROTTLE_PROBE_JS)
+    except ScriptError:
+        return
+    reason, soft = throttle_reason(probe)
+    if reason is None:
+        task3.GOVERNOR.success(kind)
+        return
+    task3.GOVERNOR.throttled(kind, reason, soft=soft)
+    raise ThrottleDetected(f"요청 제한 감지({kind}): {reason}")
+
+
+# -----------------------------
+# 단계 (코루틴)
+# -----------------------------
+async def go_chart(tab: CDPTab, symbol: str, interval: str | None = None, fast: bool = True) -> None:
+    """차트 이동: 열린 차트가 있으면 내부 API로 종목/주기만 전환, 실패하면 URL로 새로 로드"""
+    await task3.GOVERNOR.acquire_async("chart")
+    with TRACER.span("chart.go"):
+        if fast and task3.FAST_SWITCH and await canvas_present(tab)():
+            try:
+                if await tab.script(task3.SWITCH_API_JS, symbol, interval, is_async=True, timeout=20) and \
+                        task3.chart_matches(await tab.script(task3.CHART_STATE_JS), symbol, interval):
+                    await settle(tab, "chart.switch", chart_ready(tab), timeout=10)
+                    return
+            except Exception:
+                pass
+            print(f"[WARN] {tab.name} 페이지 내 전환 실패 → 새로고침: {symbol} {interval or ''}")
+
+        base = f"{task3.TV_BASE_URL}/chart/?symbol={symbol}"
+        url = base if interval is None else f"{base}&interval={interval}"
+        await tab.navigate(url)
+        if not await settle(tab, "chart.page_load.canvas", canvas_present(tab), timeout=20):
+            raise RuntimeError("차트 캔버스를 찾지 못했습니다.")
+        await settle(tab, "chart.load", chart_ready(tab), timeout=10)
+
+
+async def lazy_load(tab: CDPTab, tf_short: str, target_ts: int | None = None) -> Dict:
+    """페이지 안의 지연 로딩 루틴 실행 (기다리는 동안 이벤트 루프는 다른 탭 진행)"""
+    # 드래그 1회 = 과거 봉 요청 1회: feed 상한이 있으면 드래그마다 공유 버킷에서 차례를 받음 (첫 드래그 몫은 여기서)
+    await task3.GOVERNOR.acquire_async("feed")
+    gated = task3.GOVERNOR.interval("feed") > 0
+    opts, budget = lazy_load_options(
+        wheels=30,
+        max_drags=task3.LAZY_MAX_DRAGS.get(tf_short, 100),
+        fallback_drags=task3.LAZY_FALLBACK_DRAGS.get(tf_short, 50),
+        stall_drags=task3.LAZY_STALL_DRAGS,
+        stall_timeout=task3.LAZY_STALL_TIMEOUT,
+        target_ts=target_ts if target_ts is not None else task3.parse_target_date(task3.LAZY_TARGET_DATE),
+        gated=gated,
+    )
+    if gated:
+        await tab.script(LAZY_LOAD_START_JS, {CSS_ARG: CHART_CANVAS_CSS}, opts)
+        deadline = time.monotonic() + budget
+        while True:
+            status = await tab.script(LAZY_STATUS_JS)
+            if status["result"] is not None:
+                result = status["result"]
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"지연 로딩이 {budget:.0f}초 안에 끝나지 않았습니다.")
+            if status["tokens"] <= 0:
+                deadline += await task3.GOVERNOR.acquire_async("feed")
+                await tab.script(LAZY_GRANT_JS)
+            else:
+                await asyncio.sleep(POLL_FREQUENCY)
+    else:
+        result = await tab.script(LAZY_LOAD_JS, {CSS_ARG: CHART_CANVAS_CSS}, opts, is_async=True, timeout=budget)
+    if result.get("error"):
+        raise RuntimeError(f"지연 로딩 스크립트 오류: {result['error']}")
+    await check_throttle(tab, "feed")
+    TRACER.record("lazy_load.wheel", result.get("wheelElapsed", 0.0))
+    TRACER.record("lazy_load.drag", result.get("dragElapsed", 0.0), drags=result["drags"], loaded=result["loaded"])
+    if result["adaptive"]:
+        first_day = time.strftime("%Y-%m-%d", time.gmtime(result["first"]))
+        print(f"[INFO] {tab.name} 지연 로딩({tf_short}): 드래그 {result['drags']}회, +{result['loaded']} bars "
+              f"(총 {result['count']}, 시작 {first_day}, {result['elapsed']:.1f}s)")
+    else:
+        print(f"[WARN] {tab.name} 차트 히스토리 상태를 읽지 못해 고정 횟수로 드래그했습니다. ({tf_short}: {result['drags']}회)")
+    return result
+
+
+async def click_learned(tab: CDPTab, name: str, candidates: List[str], timeout: float = 4,
+                        quiet: float = 0.15, settle_timeout: float = 2.0) -> bool:
+    """선택자 캐시 순서로 후보를 찾아 클릭하고 DOM이 잠잠해질 때까지 대기 (Task3 click_learned 와 같은 기록)"""
+    with TRACER.span(name) as sp:
+        ordered = task3.SELECTORS.order(name, candidates)
+        opts = resolve_options(timeout, click=True, quiet=quiet, settle_timeout=settle_timeout)
+        result = await tab.script(RESOLVE_JS, ordered, opts, is_async=True,
+                                  timeout=timeout + settle_timeout) or {"index": -1}
+        if result.get("index", -1) >= 0 and not result.get("clickError") and not result.get("changed"):
+            # 합성 클릭에 반응이 없음 → 요소 중심에 실제 마우스 이벤트(pointerdown/mousedown 포함)로 다시 클릭
+            for kind in ("mousePressed", "mouseReleased"):
+                await tab.send("Input.dispatchMouseEvent", {"type": kind, "x": result["x"], "y": result["y"],
+                                                            "button": "left", "clickCount": 1})
+            result["settled"] = await wait_until(f"{name}.native_click", quiet_for(tab, quiet), settle_timeout)
+        sp["ok"] = record_lookup(task3.SELECTORS, name, ordered, result, timeout) >= 0
+    return sp["ok"]
+
+
+async def reset_ui(tab: CDPTab) -> None:
+    """ESC 후 대화상자가 닫힐 때까지 대기 (재시도 전 정리)"""
+    for kind in ("keyDown", "keyUp"):
+        await tab.send("Input.dispatchKeyEvent", {"type": kind, "key": "Escape", "code": "Escape",
+                                                  "windowsVirtualKeyCode": 27})
+    await tab.script(RESOLVE_JS, ["//div[@role='dialog']"], resolve_options(2, absent=True), is_async=True, timeout=2)
+
+
+async def export_csv(tab: CDPTab, downloads: DownloadTracker) -> None:
+    """현재 차트에서 CSV 내보내기 (다운로드는 DownloadTracker가 탭별로 받음)"""
+    await task3.GOVERNOR.acquire_async("export")
+    with TRACER.span("export.csv"):
+        if not await click_learned(tab, "export.menu_button", task3.EXPORT_MENU_BUTTON_XPATHS):
+            raise RuntimeError("내보내기 버튼을 찾지 못했습니다. XPath를 확인하세요.")
+        if not await click_learned(tab, "export.menu_item", task3.EXPORT_MENU_ITEM_XPATHS):
+            raise RuntimeError("Export 메뉴 항목을 찾지 못했습니다. XPath를 확인하세요.")
+        await click_learned(tab, "export.bars_tab", task3.EXPORT_BARS_TAB_XPATHS, settle_timeout=1.5)
+        await click_learned(tab, "export.iso_time", task3.EXPORT_ISO_TIME_XPATHS, settle_timeout=1.5)
+        downloads.reset(tab)
+        if not await click_learned(tab, "export.confirm", task3.EXPORT_CONFIRM_XPATHS, settle_timeout=1.5):
+            raise RuntimeError("Export 확인 버튼을 찾지 못했습니다.")
+
+
+async def wait_for_download(tab: CDPTab, downloads: DownloadTracker, timeout: float = 60) -> Path:
+    with TRACER.span("export.wait_download"):
+        try:
+            latest = await downloads.wait(tab, timeout)
+        except TimeoutError:
+            await check_throttle(tab, "export")
+            raise
+    task3.GOVERNOR.success("export")
+    return latest
+
+
+# -----------------------------
+# 작업 / 실행
+# -----------------------------
+async def run_job(tab: CDPTab, symbol: str, timeframe: Timeframe,
+                  downloads: DownloadTracker) -> Tuple[Path, int | None]:
+    """브라우저 단계만 수행하고 (받은 CSV, 이전 high-water mark) 반환, 저장은 호출 측에서 따로"""
+    tf_short, tf_label, url_interval, requires_lazy = timeframe
+    label = f"{symbol} {tf_short}"
+    print(f"\n-- [{tab.name}] {symbol} Timeframe: {tf_short} ({tf_label}) --")
+
+    nav = {"fast": True}
+
+    async def _no_fast(_: int) -> None:
+        nav["fast"] = False
+
+    async def _navigate() -> None:
+        try:
+            await go_chart(tab, symbol, url_interval, fast=nav["fast"])
+        except Exception:
+            await check_throttle(tab, "chart")
+            raise
+        await check_throttle(tab, "chart")
+
+    await run_step_async("navigate", _navigate, recover=_no_fast, label=label)
+
+    mark = get_marks(task3.DB_ROOT).get(symbol, tf_short) if task3.INCREMENTAL else None
+    if requires_lazy:
+        state = await tab.script(HISTORY_STATE_JS) if mark else None
+        if mark and state and state["first"] <= mark["last_ts"]:
+            print(f"[INFO] 지연 로딩 생략({tf_short}): 화면의 봉이 이미 마지막 저장 봉까지 포함")
+        else:
+            await run_step_async("lazy_load", lambda: lazy_load(tab, tf_short, mark["last_ts"] if mark else None),
+                                 recover=lambda _: reset_ui(tab), label=label)
+
+    async def _re_export(_: int) -> None:
+        await reset_ui(tab)
+        await export_csv(tab, downloads)
+
+    await run_step_async("export", lambda: export_csv(tab, downloads), recover=lambda _: reset_ui(tab), label=label)
+    latest = await run_step_async("download", lambda: wait_for_download(tab, downloads),
+                                  recover=_re_export, label=label)
+    return latest, (mark["last_ts"] if mark else None)
+
+
+class AsyncRunner:
+    """탭 N개 + 작업 큐 + 백그라운드 저장 작업"""
+
+    def __init__(self, conn: CDPConnection, tabs: List[CDPTab], downloads: DownloadTracker,
+                 journal: JobJournal | None = None):
+        self.conn = conn
+        self.tabs = tabs
+        self.downloads = downloads
+        self.journal = journal
+        self.failures: List[Tuple[str, str, str]] = []
+        self._stores: Set[asyncio.Task] = set()
+
+    def _fail(self, symbol: str, tf_short: str, error: Exception, start: float) -> None:
+        print(f"[ERROR] {symbol} {tf_short}: {error}")
+        self.failures.append((symbol, tf_short, str(error)))
+        if self.journal:
+            self.journal.fail(symbol, tf_short, str(error), time.time() - start)
+
+    async def _store(self, symbol: str, tf_short: str, latest: Path, since: int | None, start: float) -> None:
+        """CSV 병합/지표/재집계를 작업 스레드에서 실행 (그동안 탭은 다음 작업 진행)"""
+        try:
+            dest = await asyncio.to_thread(task3.store_export, symbol, tf_short, latest, task3.DOWNLOAD_ROOT,
+                                           since, f"{symbol} {tf_short}")
+        except Exception as e:
+            self._fail(symbol, tf_short, e, start)
+            return
+        if self.journal:
+            self.journal.finish(symbol, tf_short, dest, time.time() - start)
+
+    async def run_tracked_job(self, tab: CDPTab, symbol: str, timeframe: Timeframe) -> None:
+        tf_short = timeframe[0]
+        start = time.time()
+        if self.journal:
+            self.journal.start(symbol, tf_short)
+        try:
+            with TRACER.job(symbol, tf_short, worker=tab.name):
+                latest, since = await run_job(tab, symbol, timeframe, self.downloads)
+                # 작업 컨텍스트(종목/주기)를 이어받도록 job 구간 안에서 저장 작업 생성
+                task = asyncio.create_task(self._store(symbol, tf_short, latest, since, start))
+        except Exception as e:
+            self._fail(symbol, tf_short, e, start)
+            return
+        self._stores.add(task)
+        task.add_done_callback(self._stores.discard)
+
+    async def _worker(self, tab: CDPTab, jobs: "asyncio.Queue[Tuple[str, Timeframe]]") -> None:
+        while True:
+            try:
+                symbol, timeframe = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await self.run_tracked_job(tab, symbol, timeframe)
+        print(f"[INFO] {tab.name} 종료")
+
+    async def run(self, plan: List[Tuple[str, Timeframe]]) -> List[Tuple[str, str, str]]:
+        jobs: "asyncio.Queue[Tuple[str, Timeframe]]" = asyncio.Queue()
+        for job in plan:
+            jobs.put_nowait(job)
+        print(f"[INFO] 작업 {jobs.qsize()}개를 탭 {len(self.tabs)}개(이벤트 루프 1개)로 분배합니다.")
+        await asyncio.gather(*(self._worker(tab, jobs) for tab in self.tabs))
+        if self._stores:
+            await asyncio.gather(*list(self._stores))
+        return self.failures
+
+
+async def run_async(tickers: List[str], tabs: int, journal: JobJournal | None = None) -> List[Tuple[str, str, str]]:
+    """크롬 1개(Selenium으로 실행/로그인) + DevTools 탭 N개로 전체 작업 실행"""
+    driver = await asyncio.to_thread(task3.setup_driver, task3.DOWNLOAD_ROOT, None, None, tabs)
+    conn = None
+    opened: List[CDPTab] = []
+    try:
+        await asyncio.to_thread(task3.load_cookies, driver)
+        conn = await CDPConnection.connect(await asyncio.to_thread(browser_ws_url, debugger_address(driver)))
+        downloads = await DownloadTracker(conn, task3.DOWNLOAD_ROOT / "_cdp").enable()
+        patterns = load_block_list(task3.BLOCK_LIST_FILE) if task3.LEAN_BROWSER else []
+        for i in range(tabs):
+            tab = await CDPTab.open(conn, i)
+            if patterns:
+                await tab.send("Network.enable")
+                await tab.send("Network.setBlockedURLs", {"urls": patterns})
+            opened.append(tab)
+
+        plan = [(sym, tf) for sym in tickers for tf in task3.BROWSER_TIMEFRAMES]
+        runner = AsyncRunner(conn, opened, downloads, journal)
+        return await runner.run(journal.pending(plan) if journal else plan)
+    finally:
+        for tab in opened:
+            await tab.close()
+        if conn:
+            await conn.close()
+        await asyncio.to_thread(driver.quit)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TradingView 크롤링 매크로 (Task 3, asyncio + DevTools)")
+    parser.add_argument("--tabs", type=int, default=3, help="이벤트 루프 1개로 함께 진행할 차트 탭 수")
+    parser.add_argument("--resume", action="store_true",
+                        help="가장 최근 실행 저널을 이어서 완료된 작업은 건너뛰고 실패/중단된 작업만 다시 실행")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tickers = task3.read_tickers()
+    if not tickers:
+        print("[ERROR] 종목 리스트가 비었습니다.")
+        return
+    if task3.COLLECT_MODE == "feed":
+        print("[WARN] asyncio 실행기는 feed 수집을 지원하지 않아 CSV 내보내기로 수집합니다.")
+    if task3.INDICATOR_SOURCE != "local":
+        print("[INFO] 지표는 UI로 추가하지 않습니다. 차트 레이아웃에 저장된 지표가 내보내집니다 "
+              "(TV_INDICATOR_SOURCE=local 이면 저장 후 직접 계산).")
+
+    task3.ensure_dir(task3.DOWNLOAD_ROOT)
+    task3.ensure_login()
+    journal = JobJournal.open_run(task3.DB_ROOT / "_state", resume=args.resume)
+    trace = open_trace(task3.DB_ROOT / "_state")
+    try:
+        failures = asyncio.run(run_async(tickers, max(1, args.tabs), journal))
+    finally:
+        journal.close()
+        trace.close()
+        LATENCY.print_summary()
+        task3.GOVERNOR.print_summary()
+        print(f"[INFO] 단계별 시간 기록: {trace.path} (요약: python tradingview_trace.py summary {trace.path})")
+    for sym, tf, err in failures:
+        print(f"[FAIL] {sym} {tf}: {err}")
+    print(f"\n[ALL DONE] 모든 심볼 처리 완료. (실패 {len(failures)}건, 저널: {journal.path})")
+
+
+if __name__ == "__main__":
+    main()
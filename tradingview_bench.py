@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Task3 오프라인 벤치마크 (로컬 모의 차트 페이지 사용)
+
+- tradingview_mock.MockServer 를 띄우고 Task3의 사이트 주소(TV_BASE_URL)/저장 폴더를 임시 폴더로 바꾼 뒤,
+  실제 Task3 작업 경로(run_tracked_job: 차트 이동 → 지표 → 지연 로딩 → 내보내기 → 다운로드 → 저장)를 그대로 실행합니다.
+- 결과: 작업/분(jobs/min), 단계별 p50/p95(tradingview_trace 요약), 최대 메모리(파이썬 + 크롬 프로세스 RSS 합)
+- --json 으로 결과를 저장해 두면 다음 실행과 비교해 주요 경로의 성능 저하를 오프라인에서 잡을 수 있습니다.
+
+실행 예
+- python tradingview_bench.py                          # 종목 3개 × 전체 시간프레임, 기본 지연
+- python tradingview_bench.py --symbols 5 --scale 0.5 --json bench.json
+- python tradingview_bench.py --timeframes D,1h --history-ms 500 --chunk 200
+- python tradingview_bench.py --tabs 4                 # 탭 풀(크롬 1개, 창 4개)과 순차 실행 비교
+- python tradingview_bench.py --tabs 4 --throttle 20   # 모의 서버 요청 제한(분당 20회) 상대로 속도 조절기 확인
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from tradingview_mock import MockLatency, MockServer, MockThrottle
+from tradingview_ratelimit import RATE_KINDS
+from tradingview_trace import TRACER, load_spans, summarize
+
+BENCH_SYMBOLS = ["GOOG", "AAPL", "MSFT", "NVDA", "AMZN", "META", "TSLA", "AVGO", "LLY", "JPM"]
+
+
+# -----------------------------
+# 메모리 측정 (Linux /proc, 파이썬 프로세스 + 자식 크롬 프로세스 RSS 합)
+# -----------------------------
+def _process_tree_rss_kb(root_pid: int) -> int | None:
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            status = (entry / "status").read_text()
+        except OSError:
+            continue
+        pid = int(entry.name)
+        fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+        children.setdefault(int(fields.get("PPid", "0").strip() or 0), []).append(pid)
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0]) if "VmRSS" in fields else 0
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class PeakMemory:
+    """백그라운드 스레드로 interval초마다 프로세스 트리 RSS를 재서 최댓값 보관"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tv-bench-mem", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            kb = _process_tree_rss_kb(os.getpid())
+            if kb is None:
+                return
+            self.peak_kb = max(self.peak_kb, kb)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemory":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+# -----------------------------
+# 벤치마크 실행
+# -----------------------------
+def run_bench(symbols: List[str], timeframes: List[str] | None, latency: MockLatency, work_dir: Path,
+              tabs: int = 1, throttle: MockThrottle | None = None) -> Dict:
+    with MockServer(latency, throttle=throttle) as server:
+        # Task3는 import 시점에 환경 변수를 읽으므로 서버 주소/임시 폴더를 먼저 지정
+        os.environ.update({
+            "TV_BASE_URL": server.base_url,
+            "TV_DB_ROOT": str(work_dir / "db"),
+            "TV_DOWNLOAD_ROOT": str(work_dir / "downloads"),
+            "TV_CHROME_PROFILE": str(work_dir / "profile"),
+            # 모의 페이지라 경량/헤드리스 실행 (Task3 기본값은 둘 다 꺼짐)
+            "TV_LEAN_BROWSER": "1",
+            "TV_HEADLESS": "1",
+        })
+        if throttle is None:
+            # 요청 제한을 흉내 내지 않을 때는 속도 상한 없이 순수 처리 속도를 잼 (직접 지정한 값은 유지)
+            for kind in RATE_KINDS:
+                os.environ.setdefault(f"TV_RATE_{kind.upper()}", "0")
+        import tradingview_macro_Task3 as task3
+
+        tfs = [tf for tf in task3.BROWSER_TIMEFRAMES if not timeframes or tf[0] in timeframes]
+        trace = TRACER.open(work_dir / "traces" / "bench.jsonl")
+        results = {"ok": 0, "failed": 0}
+        with PeakMemory() as mem:
+            driver = task3.setup_driver(task3.DOWNLOAD_ROOT, tabs=tabs)
+            try:
+                task3.go_chart(driver, symbols[0], fast=False)
+                started = time.time()
+                if tabs > 1:
+                    # 탭 풀: 브라우저 1개 안의 창 N개가 공유 큐를 나눠 처리
+                    jobs: "queue.Queue" = queue.Queue()
+                    for sym in symbols:
+                        for tf in tfs:
+                            jobs.put((sym, tf))
+                    failures: List = []
+                    patterns = task3.load_block_list(task3.BLOCK_LIST_FILE) if task3.LEAN_BROWSER else None
+                    threads = [threading.Thread(target=task3.tab_worker_loop,
+                                                args=(tab, jobs, task3.DOWNLOAD_ROOT, failures))
+                               for tab in task3.TabPool(driver, tabs, block_patterns=patterns).tabs]
+                    for t in threads:
+                        t.start()
+                    for t in threads:
+                        t.join()
+                    results["failed"] = len(failures)
+                    results["ok"] = len(symbols) * len(tfs) - len(failures)
+                else:
+                    for sym in symbols:
+                        for tf in tfs:
+                            error = task3.run_tracked_job(driver, sym, tf, task3.DOWNLOAD_ROOT)
+                            results["failed" if error else "ok"] += 1
+                elapsed = time.time() - started
+            finally:
+                driver.quit()
+                trace.close()
+
+    jobs = results["ok"] + results["failed"]
+    return {
+        "jobs": jobs,
+        "tabs": tabs,
+        "failed": results["failed"],
+        "seconds": round(elapsed, 2),
+        "jobs_per_min": round(jobs / (elapsed / 60), 2) if elapsed else 0.0,
+        "peak_rss_mb": round(mem.peak_kb / 1024, 1) if mem.peak_kb else None,
+        "latency": latency.to_page(),
+        "throttle": throttle.stats() if throttle else None,
+        "rate": task3.GOVERNOR.summary(),
+        "trace": str(trace.path),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    d = MockLatency()
+    parser = argparse.ArgumentParser(description="Task3 오프라인 벤치마크 (로컬 모의 차트 페이지)")
+    parser.add_argument("--symbols", type=int, default=3, help=f"종목 수 (최대 {len(BENCH_SYMBOLS)})")
+    parser.add_argument("--timeframes", default="", help="쉼표로 구분한 시간프레임 (기본: 전체) 예) D,1h")
+    parser.add_argument("--scale", type=float, default=1.0, help="모의 페이지 지연 전체 배율")
+    parser.add_argument("--chart-ms", type=int, default=d.chart_ms)
+    parser.add_argument("--switch-ms", type=int, default=d.switch_ms)
+    parser.add_argument("--dialog-ms", type=int, default=d.dialog_ms)
+    parser.add_argument("--search-ms", type=int, default=d.search_ms)
+    parser.add_argument("--history-ms", type=int, default=d.history_ms)
+    parser.add_argument("--export-ms", type=int, default=d.export_ms)
+    parser.add_argument("--chunk", type=int, default=d.chunk, help="드래그 1회당 추가되는 과거 봉 수")
+    parser.add_argument("--tabs", type=int, default=1, help="브라우저 1개 안의 차트 창 수 (탭 풀 비교용)")
+    parser.add_argument("--throttle", type=int, default=0,
+                        help="모의 서버의 분당 차트 로딩/내보내기 한도 (0 = 제한 없음, 속도 조절기 확인용)")
+    parser.add_argument("--throttle-penalty", type=float, default=10.0, help="한도 초과 시 모의 서버 거부 시간(초)")
+    parser.add_argument("--throttle-mode", default="status", choices=MockThrottle.MODES,
+                        help="제한 알림 방식: status(HTTP 429) / banner / empty(빈 차트)")
+    parser.add_argument("--keep", action="store_true", help="임시 폴더(데이터셋/트레이스)를 지우지 않음")
+    parser.add_argument("--json", type=Path, help="결과를 JSON으로 저장")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    latency = MockLatency(args.chart_ms, args.switch_ms, args.dialog_ms, args.search_ms,
+                          args.history_ms, args.export_ms, args.chunk, args.scale)
+    symbols = BENCH_SYMBOLS[:max(1, min(args.symbols, len(BENCH_SYMBOLS)))]
+    timeframes = [t.strip() for t in args.timeframes.split(",") if t.strip()] or None
+    work_dir = Path(tempfile.mkdtemp(prefix="tv_bench_"))
+    try:
+        throttle = MockThrottle(args.throttle, args.throttle_penalty, args.throttle_mode) if args.throttle else None
+        result = run_bench(symbols, timeframes, latency, work_dir, args.tabs, throttle)
+        summarize(load_spans([Path(result["trace"])]), top=20)
+        print(f"\n[BENCH] 작업 {result['jobs']}개 (실패 {result['failed']}), {result['seconds']}s, "
+              f"{result['jobs_per_min']} jobs/min, 최대 메모리 {result['peak_rss_mb']} MB")
+        if throttle:
+            st = result["throttle"]
+            print(f"[BENCH] 모의 서버 요청 제한 {st['per_min']}/min ({st['mode']}): 허용 {st['allowed']}, 거부 {st['rejected']}")
+        for kind, st in result["rate"].items():
+            print(f"[BENCH] 속도 조절 {kind}: {st['per_min']}/min, 대기 {st['waited']}s, 제한 감지 {st['throttles']}회")
+        if args.json:
+            args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"[INFO] 결과 저장: {args.json}")
+        sys.exit(1 if result["failed"] else 0)
+    finally:
+        if args.keep:
+            print(f"[INFO] 작업 폴더: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 경량 브라우저 실행 프로필 (Task3 / Task4)
+
+- 헤드리스(--headless=new), 확장 프로그램/동기화/번역 등 백그라운드 기능 끄기
+- CDP `Network.setBlockedURLs`로 차트 캔버스/CSV 내보내기와 무관한 리소스(광고, 폰트, 이미지,
+  소셜 위젯, 분석 스크립트)를 차단해 페이지 로딩 시간과 브라우저당 메모리를 줄입니다.
+- 차단 목록은 기본 목록(DEFAULT_BLOCKED_URLS) 또는 TV_BLOCK_LIST 파일(한 줄에 패턴 1개, # 주석)로 지정
+- 페이지 로딩 시간(Navigation Timing + 차트 캔버스 표시까지)을 LATENCY에 단계별로 기록합니다.
+"""
+from __future__ import annotations
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from selenium.webdriver.chrome.options import Options
+
+from tradingview_wait import LATENCY
+
+# CDP URL 패턴 ('*' 와일드카드) - 차트 데이터(websocket/JS/CSS)는 건드리지 않음
+DEFAULT_BLOCKED_URLS = [
+    # 이미지/폰트 (차트는 캔버스, 아이콘은 인라인 SVG)
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # 광고
+    "*doubleclick.net*", "*googlesyndication.com*", "*adservice.google.*", "*amazon-adsystem.com*",
+    # 분석/추적
+    "*google-analytics.com*", "*googletagmanager.com*", "*facebook.net*", "*hotjar.com*",
+    "*telemetry.tradingview.com*", "*snowplow*",
+    # 소셜 위젯
+    "*platform.twitter.com*", "*platform.linkedin.com*",
+]
+
+# 경량 실행 시 추가하는 크롬 옵션
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+]
+
+NAVIGATION_TIMING_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+if (!nav) return null;
+return {dom: nav.domContentLoadedEventEnd / 1000, load: nav.loadEventEnd / 1000,
+        resources: performance.getEntriesByType('resource').length};
+"""
+
+
+def load_block_list(path: str | Path | None) -> List[str]:
+    """차단 목록 파일 읽기 (없거나 비어 있으면 기본 목록)"""
+    if not path:
+        return list(DEFAULT_BLOCKED_URLS)
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except OSError as e:
+        print(f"[WARN] 차단 목록 파일 읽기 실패, 기본 목록 사용: {e}")
+        return list(DEFAULT_BLOCKED_URLS)
+    patterns = [ln.strip() for ln in lines if ln.strip() and not ln.strip().startswith("#")]
+    return patterns or list(DEFAULT_BLOCKED_URLS)
+
+
+def apply_lean_options(options: Options, headless: bool = True, window_size: str = "1600,1000") -> None:
+    """크롬 옵션에 경량 실행 프로필 적용 (webdriver.Chrome 생성 전에 호출)"""
+    if headless:
+        options.add_argument("--headless=new")
+        # 헤드리스는 창 크기 기본값이 작아 차트 레이아웃이 달라지므로 고정
+        options.add_argument(f"--window-size={window_size}")
+    for arg in LEAN_ARGUMENTS:
+        options.add_argument(arg)
+
+
+def block_resources(driver, patterns: List[str]) -> None:
+    """CDP로 URL 패턴 차단 (드라이버 생성 직후 1회, 이후 모든 페이지 이동에 적용)"""
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    print(f"[INFO] 리소스 차단 패턴 {len(patterns)}개 적용")
+
+
+def record_page_load(driver, step: str, started: float) -> Dict | None:
+    """driver.get 이후 차트 캔버스가 보일 때까지의 시간과 Navigation Timing을 LATENCY에 기록"""
+    to_canvas = time.time() - started
+    LATENCY.record(f"{step}.canvas", to_canvas)
+    try:
+        timing = driver.execute_script(NAVIGATION_TIMING_JS)
+    except Exception:
+        timing = None
+    if timing:
+        LATENCY.record(f"{step}.dom_content_loaded", timing["dom"])
+        if timing["load"] > 0:
+            LATENCY.record(f"{step}.load_event", timing["load"])
+    return timing
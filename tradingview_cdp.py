@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+크롬 DevTools 프로토콜(CDP) asyncio 클라이언트 (tradingview_async 용)
+
+- Selenium이 띄운 크롬(로그인/경량 옵션/리소스 차단 그대로)의 디버깅 주소에 WebSocket으로 직접 붙어,
+  명령은 id별 Future로, 이벤트는 리스너로 받습니다. 응답을 기다리는 동안 이벤트 루프는 다른 탭/작업을 진행합니다.
+- 탭마다 Target.attachToTarget(flatten) 세션 1개, 명령은 sessionId로 구분하므로 연결 1개로 여러 탭을 동시에 다룹니다.
+- Selenium용 페이지 스크립트(arguments[…] / 마지막 인자 callback)를 그대로 Runtime.evaluate 로 실행할 수 있게 감싸므로,
+  지연 로딩/선택자 해석/차트 전환 등 기존 페이지 내 루틴을 그대로 씁니다.
+- 외부 라이브러리 없이 표준 라이브러리만 사용 (RFC 6455 클라이언트, 텍스트 프레임 + 조각/핑 처리)
+"""
+from __future__ import annotations
+import os
+import json
+import base64
+import struct
+import asyncio
+import itertools
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+# 스크립트 인자로 요소를 넘길 때 쓰는 표시 ({"__css": 선택자} → 페이지 안에서 querySelector)
+CSS_ARG = "__css"
+
+
+class CDPError(RuntimeError):
+    """CDP 명령 오류 응답 또는 연결 끊김 (다시 시도해도 소용없는 경우가 많아 대기 루프에서 삼키지 않음)"""
+
+
+class ScriptError(CDPError):
+    """페이지 스크립트 예외, 또는 페이지 이동 중 실행 컨텍스트가 사라진 경우 (폴링에서는 다음 확인으로 넘어감)"""
+
+
+def browser_ws_url(debugger_address: str, timeout: float = 10) -> str:
+    """'host:port' 디버깅 주소 → 브라우저 WebSocket URL (/json/version)"""
+    with urllib.request.urlopen(f"http://{debugger_address}/json/version", timeout=timeout) as r:
+        return json.load(r)["webSocketDebuggerUrl"]
+
+
+def debugger_address(driver) -> str:
+    """Selenium이 띄운 크롬의 디버깅 주소 (capabilities 의 goog:chromeOptions.debuggerAddress)"""
+    return driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+
+# -----------------------------
+# 연결 (WebSocket + 명령/이벤트 분배)
+# -----------------------------
+class CDPConnection:
+    """브라우저 WebSocket 연결 1개: send()는 응답까지 await, 이벤트는 on()/wait_event()로 받음"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[str, List[Callable[[Dict, str | None], None]]] = {}
+        self._send_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, ws_url: str) -> "CDPConnection":
+        url = urlparse(ws_url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {url.path or '/'} HTTP/1.1\r\nHost: {url.netloc}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            writer.close()
+            raise CDPError(f"WebSocket 연결 실패: {head.splitlines()[0].decode('latin-1')}")
+        return cls(reader, writer)
+
+    # 프레임 송수신
+    async def _send_frame(self, opcode: int, data: bytes) -> None:
+        n = len(data)
+        if n < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+        elif n < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+        # 클라이언트 → 서버 프레임은 마스킹 필수
+        mask = os.urandom(4)
+        masked = (int.from_bytes(data, "big") ^ int.from_bytes((mask * (n // 4 + 1))[:n], "big")).to_bytes(n, "big") \
+            if n else b""
+        async with self._send_lock:
+            self._writer.write(header + mask + masked)
+            await self._writer.drain()
+
+    async def _recv_message(self) -> str | None:
+        parts: List[bytes] = []
+        while True:
+            b1, b2 = await self._reader.readexactly(2)
+            opcode, n = b1 & 0x0F, b2 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await self._reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await self._reader.readexactly(8))[0]
+            data = await self._reader.readexactly(n)
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                await self._send_frame(0xA, data)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                parts.append(data)
+                if b1 & 0x80:
+                    return b"".join(parts).decode("utf-8")
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                text = await self._recv_message()
+                if text is None:
+                    break
+                msg = json.loads(text)
+                if "id" in msg:
+                    fut = self._pending.pop(msg["id"], None)
+                    if fut and not fut.done():
+                        if "error" in msg:
+                            fut.set_exception(CDPError(f"{msg['error'].get('message')} ({msg['error'].get('data', '')})"))
+                        else:
+                            fut.set_result(msg.get("result", {}))
+                    continue
+                for cb in list(self._listeners.get(msg.get("method"), [])):
+                    cb(msg.get("params", {}), msg.get("sessionId"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(CDPError("DevTools 연결이 끊어졌습니다."))
+            self._pending.clear()
+
+    # 명령 / 이벤트
+    async def send(self, method: str, params: Dict | None = None, session_id: str | None = None,
+                   timeout: float | None = 30) -> Dict:
+        msg_id = next(self._ids)
+        msg: Dict[str, Any] = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        await self._send_frame(0x1, json.dumps(msg).encode("utf-8"))
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    def on(self, method: str, callback: Callable[[Dict, str | None], None]) -> Callable[[], None]:
+        """이벤트 리스너 등록, 해제 함수 반환"""
+        self._listeners.setdefault(method, []).append(callback)
+        return lambda: self._listeners[method].remove(callback)
+
+    async def close(self) -> None:
+        try:
+            await self._send_frame(0x8, b"")
+        except (ConnectionError, RuntimeError):
+            pass
+        self._writer.close()
+        self._task.cancel()
+
+
+# -----------------------------
+# 탭 (페이지 타깃 + 세션)
+# -----------------------------
+def _wrap_script(body: str, args: Tuple, is_async: bool) -> str:
+    """Selenium 형식 스크립트(arguments / callback)를 Runtime.evaluate 식으로 감쌈 (DOM 노드는 null로 직렬화)"""
+    return f"""(function () {{
+    var args = {json.dumps(list(args))}.map(function (a) {{
+        return (a && typeof a === 'object' && a['{CSS_ARG}']) ? document.querySelector(a['{CSS_ARG}']) : a;
+    }});
+    var plain = function (v) {{
+        return JSON.parse(JSON.stringify(v === undefined ? null : v, function (k, x) {{
+            return (typeof Node !== 'undefined' && x instanceof Node) ? null : x;
+        }}));
+    }};
+    var body = function () {{
+{body}
+    }};
+    if (!{str(is_async).lower()}) return plain(body.apply(null, args));
+    return new Promise(function (resolve) {{ body.apply(null, args.concat([resolve])); }}).then(plain);
+}})()"""
+
+
+class CDPTab:
+    """브라우저 안의 페이지 1개 (별도 창으로 열어 가려져도 스로틀링되지 않게 함)"""
+
+    def __init__(self, conn: CDPConnection, target_id: str, session_id: str, index: int):
+        self.conn = conn
+        self.target_id = target_id
+        self.session_id = session_id
+        self.index = index
+        self.name = f"cdp-tab-{index}"
+
+    @classmethod
+    async def open(cls, conn: CDPConnection, index: int, width: int = 1600, height: int = 1000) -> "CDPTab":
+        target = await conn.send("Target.createTarget", {"url": "about:blank", "newWindow": True})
+        attached = await conn.send("Target.attachToTarget", {"targetId": target["targetId"], "flatten": True})
+        tab = cls(conn, target["targetId"], attached["sessionId"], index)
+        await tab.send("Page.enable")
+        await tab.send("Emulation.setDeviceMetricsOverride",
+                       {"width": width, "height": height, "deviceScaleFactor": 1, "mobile": False})
+        for method, params in (("Emulation.setFocusEmulationEnabled", {"enabled": True}),
+                               ("Page.setWebLifecycleState", {"state": "active"})):
+            try:
+                await tab.send(method, params)
+            except CDPError as e:
+                print(f"[WARN] {tab.name} {method} 실패(무시하고 계속): {e}")
+        return tab
+
+    async def send(self, method: str, params: Dict | None = None, timeout: float | None = 30) -> Dict:
+        return await self.conn.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    def wait_event(self, method: str, predicate: Callable[[Dict], bool] | None = None) -> asyncio.Future:
+        """이 탭의 다음 이벤트를 받을 Future (명령을 보내기 전에 만들어 둘 것)"""
+        fut = asyncio.get_running_loop().create_future()
+
+        def _cb(params: Dict, session_id: str | None) -> None:
+            if session_id == self.session_id and not fut.done() and (predicate is None or predicate(params)):
+                fut.set_result(params)
+        off = self.conn.on(method, _cb)
+        fut.add_done_callback(lambda _: off())
+        return fut
+
+    async def script(self, body: str, *args, is_async: bool = False, timeout: float = 30) -> Any:
+        """Selenium execute_script / execute_async_script 형식 스크립트를 실행하고 결과(JSON 값) 반환"""
+        try:
+            res = await self.send("Runtime.evaluate", {
+                "expression": _wrap_script(body, args, is_async),
+                "awaitPromise": True,
+                "returnByValue": True,
+            }, timeout=timeout + 5)
+        except CDPError as e:
+            # 'Execution context was destroyed' / 'Cannot find context' : 페이지 이동 중, 연결 문제 아님
+            if "context" in str(e).lower():
+                raise ScriptError(f"페이지 스크립트 오류: {e}") from e
+            raise
+        if "exceptionDetails" in res:
+            detail = res["exceptionDetails"]
+            raise ScriptError(f"페이지 스크립트 오류: {detail.get('exception', {}).get('description') or detail.get('text')}")
+        return res["result"].get("value")
+
+    async def navigate(self, url: str, timeout: float = 30) -> None:
+        """페이지 이동 후 load 이벤트까지 대기"""
+        loaded = self.wait_event("Page.loadEventFired")
+        res = await self.send("Page.navigate", {"url": url})
+        if res.get("errorText"):
+            loaded.cancel()
+            raise CDPError(f"페이지 이동 실패: {res['errorText']}")
+        try:
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARN] {self.name} load 이벤트 시간 초과 ({timeout}s), 계속 진행: {url}")
+
+    async def close(self) -> None:
+        try:
+            await self.conn.send("Target.closeTarget", {"targetId": self.target_id}, timeout=5)
+        except (CDPError, asyncio.TimeoutError):
+            pass
+
+
+# -----------------------------
+# 다운로드 (브라우저 전체, 탭별 완료 대기)
+# -----------------------------
+class DownloadTracker:
+    """Browser.setDownloadBehavior(allowAndName)로 파일을 guid 이름으로 받고, 시작한 탭별로 완료를 기다림
+
+    - 파일 이름이 guid라 여러 탭이 같은 폴더로 동시에 받아도 섞이지 않습니다 (폴더 전환 잠금 불필요).
+    - 페이지 타깃의 메인 프레임 ID는 타깃 ID와 같으므로 downloadWillBegin.frameId 로 탭을 구분합니다.
+    """
+
+    def __init__(self, conn: CDPConnection, directory: Path):
+        self.conn = conn
+        self.directory = Path(directory)
+        self._begun: Dict[str, asyncio.Queue] = {}
+        self._done: Dict[str, asyncio.Future] = {}
+        conn.on("Browser.downloadWillBegin", self._on_begin)
+        conn.on("Browser.downloadProgress", self._on_progress)
+
+    async def enable(self) -> "DownloadTracker":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        await self.conn.send("Browser.setDownloadBehavior", {
+            "behavior": "allowAndName", "downloadPath": str(self.directory), "eventsEnabled": True})
+        return self
+
+    def _queue(self, frame_id: str) -> asyncio.Queue:
+        return self._begun.setdefault(frame_id, asyncio.Queue())
+
+    def _future(self, guid: str) -> asyncio.Future:
+        if guid not in self._done:
+            self._done[guid] = asyncio.get_running_loop().create_future()
+        return self._done[guid]
+
+    def _on_begin(self, params: Dict, _session: str | None) -> None:
+        self._future(params["guid"])
+        self._queue(params["frameId"]).put_nowait(params)
+
+    def _on_progress(self, params: Dict, _session: str | None) -> None:
+        fut = self._future(params["guid"])
+        if fut.done():
+            return
+        if params["state"] == "completed":
+            fut.set_result(params)
+        elif params["state"] == "canceled":
+            fut.set_exception(CDPError("다운로드가 취소되었습니다."))
+
+    def reset(self, tab: CDPTab) -> None:
+        """이 탭에서 이전에 시작된(기다리지 않은) 다운로드 알림 버리기 (내보내기 직전 호출)"""
+        q = self._queue(tab.target_id)
+        while not q.empty():
+            q.get_nowait()
+
+    async def wait(self, tab: CDPTab, timeout: float = 60) -> Path:
+        """이 탭이 시작한 다음 다운로드가 끝날 때까지 대기 후 '<guid>_<원래 이름>' 으로 바꾼 경로 반환"""
+        async def _wait() -> Path:
+            begin = await self._queue(tab.target_id).get()
+            await self._future(begin["guid"])
+            self._done.pop(begin["guid"], None)
+            src = self.directory / begin["guid"]
+            dest = self.directory / f"{begin['guid']}_{begin.get('suggestedFilename') or 'export.csv'}"
+            os.replace(src, dest)
+            return dest
+        try:
+            return await asyncio.wait_for(_wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("CSV 다운로드가 완료되지 않았습니다.")
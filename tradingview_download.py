@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 내보내기 다운로드 감시 (Task1 / Task3 공용)
+
+- 내보내기 버튼을 누르기 *직전*에 감시를 시작하고, 그 이후에 새로 완성된 CSV 1개를 돌려줍니다.
+- Linux에서는 inotify(IN_MOVED_TO / IN_CLOSE_WRITE)로 `.crdownload` → `.csv` 이름 변경을 즉시 감지하므로
+  폴더에 파일이 몇 개 쌓여 있든 지연이 ms 단위로 유지됩니다.
+- inotify를 쓸 수 없는 환경(Windows/macOS 등)에서는 짧은 간격의 폴링으로 대체합니다.
+- 작업(job)마다 전용 다운로드 폴더를 CDP `Browser.setDownloadBehavior`로 지정해서,
+  동시에 여러 내보내기가 돌거나 이전 실행의 잔여 파일이 있어도 다른 종목 파일을 집어오지 않습니다.
+"""
+from __future__ import annotations
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import uuid
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+# inotify 이벤트 마스크 (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+PARTIAL_SUFFIX = ".crdownload"
+POLL_INTERVAL = 0.05
+# 폴링 방식에서 파일 크기가 이 시간(초) 동안 변하지 않아야 다운로드 완료로 판단 (쓰기 버퍼 비우기 대기)
+STABLE_SECONDS = 0.5
+# 작업별 다운로드 폴더가 만들어지는 하위 폴더 이름
+JOBS_SUBDIR = "_jobs"
+
+
+def _load_libc():
+    """inotify 함수가 있는 libc 로드 (없으면 None → 폴링 사용)"""
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # 심볼 존재 확인 (glibc 2.9 미만 등에서는 AttributeError)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_LIBC = _load_libc()
+
+
+# -----------------------------
+# 작업별 다운로드 폴더
+# -----------------------------
+def make_job_id(symbol: str, tf_short: str) -> str:
+    """(종목, 시간프레임) 작업 ID 생성 - 폴더명으로 쓰므로 ':' '/' 등은 치환"""
+    safe_symbol = "".join(ch if ch.isalnum() or ch in ".-" else "_" for ch in symbol)
+    return f"{safe_symbol}_{tf_short}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def job_download_dir(root: Path, job_id: str) -> Path:
+    """작업 ID 전용 다운로드 폴더 (root/_jobs/<job_id>)"""
+    return Path(root) / JOBS_SUBDIR / job_id
+
+
+def set_download_dir(driver, directory: Path) -> None:
+    """이후 다운로드가 directory에 저장되도록 CDP로 지정 (내보내기 확인 클릭 직전에 호출)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+        "behavior": "allow",
+        "downloadPath": str(directory),
+        "eventsEnabled": True,
+    })
+
+
+def cleanup_job_dir(directory: Path) -> None:
+    """파일을 옮긴 뒤 비어 있는 작업 폴더 정리 (남은 파일이 있으면 디버깅용으로 유지)"""
+    try:
+        Path(directory).rmdir()
+    except OSError:
+        pass
+
+
+class DownloadWatcher:
+    """다운로드 폴더 감시자 (with 문으로 사용)
+
+    with DownloadWatcher(download_dir) as watcher:
+        export_csv(driver)
+        path = watcher.wait(timeout=60)
+    """
+
+    def __init__(self, directory: Path, suffix: str = ".csv", use_inotify: bool = True):
+        self.directory = Path(directory)
+        self.suffix = suffix
+        self._fd: int | None = None
+        self._baseline: Set[str] = set()
+        self._use_inotify = use_inotify and _LIBC is not None
+
+    # -----------------------------
+    # 수명 관리
+    # -----------------------------
+    def start(self) -> "DownloadWatcher":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._use_inotify:
+            fd = _LIBC.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+            if fd >= 0:
+                wd = _LIBC.inotify_add_watch(fd, os.fsencode(str(self.directory)), _IN_MOVED_TO | _IN_CLOSE_WRITE)
+                if wd >= 0:
+                    self._fd = fd
+                    return self
+                os.close(fd)
+            print("[WARN] inotify 사용 불가 → 폴링 방식으로 감시합니다.")
+            self._use_inotify = False
+        # 폴링 방식: 시작 시점에 이미 있던 파일은 결과에서 제외
+        self._baseline = self._list_names()
+        return self
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "DownloadWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -----------------------------
+    # 대기
+    # -----------------------------
+    def wait(self, timeout: float = 60) -> Path:
+        """이번 내보내기로 완성된 파일 경로 반환, 시간 초과 시 TimeoutError"""
+        deadline = time.monotonic() + timeout
+        if self._fd is not None:
+            found = self._wait_inotify(deadline)
+        else:
+            found = self._wait_polling(deadline)
+        if found is None:
+            raise TimeoutError(f"{timeout}초 안에 {self.suffix} 다운로드가 완료되지 않았습니다: {self.directory}")
+        return found
+
+    def _wait_inotify(self, deadline: float) -> Path | None:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return None
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(buf):
+                _wd, _mask, _cookie, length = _IN_EVENT_HEADER.unpack_from(buf, offset)
+                offset += _IN_EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+                if self._is_complete(name):
+                    return self.directory / name
+
+    def _wait_polling(self, deadline: float) -> Path | None:
+        # 이름만 보고 넘기면 아직 덜 써진 파일을 읽을 수 있으므로, 크기가 STABLE_SECONDS 동안 그대로일 때 완료로 봄
+        sizes: Dict[str, Tuple[int, float]] = {}
+        while time.monotonic() < deadline:
+            names = self._list_names()
+            for name in names - self._baseline:
+                if not self._is_complete(name) or name + PARTIAL_SUFFIX in names:
+                    continue
+                try:
+                    size = (self.directory / name).stat().st_size
+                except OSError:
+                    continue
+                now = time.monotonic()
+                prev = sizes.get(name)
+                if prev is None or prev[0] != size:
+                    sizes[name] = (size, now)
+                elif size > 0 and now - prev[1] >= STABLE_SECONDS:
+                    return self.directory / name
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def _list_names(self) -> Set[str]:
+        with os.scandir(self.directory) as it:
+            return {e.name for e in it}
+
+    def _is_complete(self, name: str) -> bool:
+        return name.lower().endswith(self.suffix) and not name.endswith(PARTIAL_SUFFIX)
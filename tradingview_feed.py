@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 데이터 피드 직접 수집 (Task3 / Task4, TV_COLLECT_MODE=feed)
+
+- 차트는 WebSocket으로 봉 데이터를 받습니다. 지연 로딩으로 과거 데이터를 끌어올 때도 같은 연결로 들어오므로,
+  크롬 DevTools 성능 로그(Network.webSocketFrameSent / Received)를 읽어 봉 메시지를 그대로 해석하면
+  CSV 내보내기(메뉴 클릭 → 옵션 → 확인 → 파일 대기)를 통째로 건너뛸 수 있습니다.
+- 프레임 형식: "~m~<길이>~m~<JSON>" 여러 개가 이어 붙은 문자열 (하트비트 "~h~N" 포함)
+  - 보낸 메시지 create_series / modify_series : [세션, 시리즈ID, 턴어라운드ID, 심볼ID, 주기, …]
+  - 받은 메시지 timescale_update / du         : [세션, {시리즈ID: {"s": [{"i": n, "v": [t, o, h, l, c, vol]}], "t": 턴어라운드ID}}]
+- 종목/주기가 바뀌면(modify_series) 이전 봉은 버리고, 이전 요청에 대한 늦은 응답(다른 턴어라운드 ID)도 무시합니다.
+- 수집한 프레임은 JSONL로 기록해 두었다가 tradingview_replay.py 로 로컬에서 다시 재생/검증할 수 있습니다.
+"""
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from tradingview_ingest import TIME_COLUMN
+
+# 차트 메인 시리즈 ID (비교 종목/지표는 다른 ID)
+MAIN_SERIES_ID = "sds_1"
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+DIR_SENT = "sent"
+DIR_RECEIVED = "recv"
+
+_SENT_EVENT = "Network.webSocketFrameSent"
+_RECEIVED_EVENT = "Network.webSocketFrameReceived"
+
+
+# -----------------------------
+# 프레임 해석
+# -----------------------------
+def split_frames(payload: str) -> List[str]:
+    """'~m~<len>~m~<body>' 로 이어진 프레임 문자열 → 본문 목록 (형식이 아니면 통째로 1개)"""
+    if not payload.startswith("~m~"):
+        return [payload]
+    out: List[str] = []
+    pos = 0
+    while payload.startswith("~m~", pos):
+        head = pos + 3
+        sep = payload.find("~m~", head)
+        if sep < 0 or not payload[head:sep].isdigit():
+            break
+        size = int(payload[head:sep])
+        body_start = sep + 3
+        out.append(payload[body_start:body_start + size])
+        pos = body_start + size
+    return out
+
+
+def iter_messages(payload: str) -> Iterator[Dict]:
+    """프레임 문자열에서 JSON 메시지({"m": 이름, "p": [...]})만 차례로 반환 (하트비트/세션 정보 제외)"""
+    for body in split_frames(payload):
+        if not body.startswith("{"):
+            continue
+        try:
+            msg = json.loads(body)
+        except ValueError:
+            continue
+        if isinstance(msg, dict) and "m" in msg:
+            yield msg
+
+
+class FeedDecoder:
+    """보낸/받은 WebSocket 프레임을 순서대로 넣으면 메인 시리즈 봉을 시각 기준으로 모음"""
+
+    def __init__(self, series_id: str = MAIN_SERIES_ID):
+        self.series_id = series_id
+        self.turnaround: str | None = None
+        self.frames = 0
+        self._rows: Dict[int, List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def feed(self, direction: str, payload: str) -> None:
+        self.frames += 1
+        for msg in iter_messages(payload):
+            if direction == DIR_SENT:
+                self._on_sent(msg)
+            else:
+                self._on_received(msg)
+
+    def _on_sent(self, msg: Dict) -> None:
+        p = msg.get("p") or []
+        if msg["m"] in ("create_series", "modify_series") and len(p) > 2 and p[1] == self.series_id:
+            # 종목/주기 변경 → 이전 봉은 다른 시리즈이므로 버림
+            self.turnaround = p[2]
+            self._rows.clear()
+
+    def _on_received(self, msg: Dict) -> None:
+        if msg["m"] not in ("timescale_update", "du"):
+            return
+        p = msg.get("p") or []
+        data = p[1].get(self.series_id) if len(p) > 1 and isinstance(p[1], dict) else None
+        if not data:
+            return
+        t = data.get("t")
+        if self.turnaround and t and t != self.turnaround:
+            return
+        for bar in data.get("s") or []:
+            v = bar.get("v") or []
+            if len(v) < 5:
+                continue
+            # 거래량이 없는 심볼(지수 등)은 NaN
+            self._rows[int(v[0])] = [float(x) for x in v[1:5]] + [float(v[5]) if len(v) > 5 else np.nan]
+
+    def bars(self) -> Dict[str, np.ndarray]:
+        """{time: int64[], open/high/low/close/volume: float64[]} (시간순)"""
+        times = np.array(sorted(self._rows), dtype=np.int64)
+        values = np.array([self._rows[t] for t in times.tolist()], dtype=np.float64).reshape(len(times), len(BAR_COLUMNS))
+        out = {TIME_COLUMN: times}
+        for j, name in enumerate(BAR_COLUMNS):
+            out[name] = np.ascontiguousarray(values[:, j])
+        return out
+
+
+# -----------------------------
+# 크롬 성능 로그에서 프레임 읽기
+# -----------------------------
+def enable_capture(options) -> None:
+    """크롬 옵션에 성능 로그(WebSocket 프레임 이벤트 포함) 수집 설정 (드라이버 생성 전에 호출)"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def read_recorded(path: Path) -> Iterator[Dict]:
+    """기록된 프레임 JSONL → {"dir": "sent"|"recv", "data": 프레임} 차례로 반환"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def decode_recorded(path: Path, series_id: str = MAIN_SERIES_ID) -> FeedDecoder:
+    """기록된 프레임 파일을 브라우저 없이 바로 해석"""
+    decoder = FeedDecoder(series_id)
+    for rec in read_recorded(path):
+        decoder.feed(rec["dir"], rec["data"])
+    return decoder
+
+
+class FeedCapture:
+    """드라이버 성능 로그에서 WebSocket 프레임을 꺼내 FeedDecoder에 전달 (record_path 지정 시 JSONL로 기록)"""
+
+    def __init__(self, driver, series_id: str = MAIN_SERIES_ID, record_path: Path | None = None):
+        self.driver = driver
+        self.decoder = FeedDecoder(series_id)
+        self.record_path = Path(record_path) if record_path else None
+
+    def drain(self) -> None:
+        """이전 작업에서 쌓인 로그 버리기 (작업 시작 직전에 호출)"""
+        self.driver.get_log("performance")
+
+    def collect(self) -> FeedDecoder:
+        """지금까지 쌓인 프레임을 모두 해석해 decoder 반환 (여러 번 호출 가능)"""
+        records = []
+        for entry in self.driver.get_log("performance"):
+            try:
+                event = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = event.get("method")
+            if method not in (_SENT_EVENT, _RECEIVED_EVENT):
+                continue
+            payload = event.get("params", {}).get("response", {}).get("payloadData")
+            if not isinstance(payload, str):
+                continue
+            direction = DIR_SENT if method == _SENT_EVENT else DIR_RECEIVED
+            self.decoder.feed(direction, payload)
+            if self.record_path:
+                records.append(json.dumps({"dir": direction, "data": payload}, ensure_ascii=False))
+        if records:
+            self.record_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(records) + "\n")
+        return self.decoder
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+저장된 봉으로 보조지표 계산 (Task3 / Task4, TV_INDICATOR_SOURCE=local)
+
+- 지표 대화상자(검색 → 결과 클릭 → 닫기)를 거치지 않고, 데이터셋의 종가 배열로 TV_INDICATORS 를 직접 계산해
+  같은 데이터셋에 열로 병합합니다. 브라우저는 원시 봉(OHLCV)만 내보내면 됩니다.
+- TradingView(Pine) 정의와 동일:
+  RSI  : change = close - close[1], up/down = ta.rma(…, 14), rsi = 100 - 100 / (1 + up / down), RSI-based MA = SMA 14
+  MACD : ta.ema(close, 12) - ta.ema(close, 26), signal = ta.ema(macd, 9), histogram = macd - signal
+  ta.rma(alpha = 1/n), ta.ema(alpha = 2/(n+1)) 모두 처음 n개 평균(SMA)으로 시작합니다.
+- 점화식 y = a·x + (1-a)·y[1] 은 블록 단위 닫힌 식(누적합)으로 계산하고, 블록 사이 상태만 넘깁니다.
+- 증분 갱신: 지표별 마지막 상태(직전 봉까지)를 <symbol>/<tf>/_indicators.json 에 저장해 두고,
+  다음 실행에서는 그 봉 이후 새로 들어온 봉만 계산합니다. 마지막 봉은 진행 중일 수 있어 상태는 그 앞 봉 기준입니다.
+"""
+from __future__ import annotations
+import os
+import json
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tradingview_ingest import TIME_COLUMN
+from tradingview_storage import BarDataset
+
+STATE_FILE = "_indicators.json"
+
+# 블록 안 (1-a)^-k 가 이 값을 넘지 않도록 블록 길이를 정함 (float64 범위 안에서 닫힌 식 계산)
+_MAX_GROWTH_LOG10 = 150.0
+
+State = Dict[str, object]
+
+
+# -----------------------------
+# 점화식 (ta.rma / ta.ema)
+# -----------------------------
+def decay_filter(x: np.ndarray, alpha: float, init: float) -> np.ndarray:
+    """y[t] = alpha·x[t] + (1-alpha)·y[t-1], y[-1] = init 를 블록 단위 벡터 연산으로 계산"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty(len(x))
+    if alpha >= 1.0:
+        out[:] = x
+        return out
+    beta = 1.0 - alpha
+    block = max(1, int(_MAX_GROWTH_LOG10 / -np.log10(beta)))
+    k = np.arange(min(block, len(x)))
+    grow, decay = beta ** -k, beta ** k
+    y = init
+    for s in range(0, len(x), block):
+        seg = x[s:s + block]
+        m = len(seg)
+        # y[j] = beta^(j+1)·y + alpha·Σ_{i<=j} beta^(j-i)·x[i]
+        res = np.cumsum(alpha * seg * grow[:m]) * decay[:m] + y * beta * decay[:m]
+        out[s:s + m] = res
+        y = res[-1]
+    return out
+
+
+def pine_ma(x: np.ndarray, length: int, alpha: float) -> np.ndarray:
+    """Pine ta.rma/ta.ema: 처음 length-1개는 NaN, length번째는 SMA, 이후는 점화식"""
+    out = np.full(len(x), np.nan)
+    if len(x) < length:
+        return out
+    seed = float(np.mean(x[:length]))
+    out[length - 1] = seed
+    out[length:] = decay_filter(x[length:], alpha, seed)
+    return out
+
+
+def rolling_mean(x: np.ndarray, length: int, tail: np.ndarray | None = None) -> np.ndarray:
+    """ta.sma: 창 안에 NaN이 있으면 NaN, tail(직전 length-1개)이 있으면 이어서 계산"""
+    head = np.full(length - 1, np.nan) if tail is None else np.asarray(tail, dtype=np.float64)
+    arr = np.concatenate([head, x])
+    if len(arr) < length:
+        return np.full(len(x), np.nan)
+    return sliding_window_view(arr, length).mean(axis=1)[-len(x):] if len(x) else np.empty(0)
+
+
+def _warm(state: State) -> bool:
+    return all(v is not None and np.all(np.isfinite(v)) for v in state.values())
+
+
+# -----------------------------
+# 지표 (close, 이전 상태) → (열, 직전 봉 기준 새 상태)
+#   state=None 이면 close 전체로 처음부터 계산, 있으면 close는 상태 봉 이후의 새 봉들
+# -----------------------------
+def rsi(close: np.ndarray, state: State | None = None, length: int = 14,
+        ma_length: int = 14) -> Tuple[Dict[str, np.ndarray], State | None]:
+    if state is None:
+        change = np.diff(close)
+        up = pine_ma(np.maximum(change, 0.0), length, 1.0 / length)
+        down = pine_ma(-np.minimum(change, 0.0), length, 1.0 / length)
+        up, down = np.r_[np.nan, up], np.r_[np.nan, down]
+        tail = None
+    else:
+        change = np.diff(np.r_[state["close"], close])
+        up = decay_filter(np.maximum(change, 0.0), 1.0 / length, state["up"])
+        down = decay_filter(-np.minimum(change, 0.0), 1.0 / length, state["down"])
+        tail = np.asarray(state["tail"], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(down == 0, 100.0, np.where(up == 0, 0.0, 100.0 - 100.0 / (1.0 + up / down)))
+    value[np.isnan(up) | np.isnan(down)] = np.nan
+    ma = rolling_mean(value, ma_length, tail)
+
+    new_state = None
+    if len(close) >= 2:
+        p = len(close) - 2
+        prev = np.concatenate([tail if tail is not None else np.empty(0), value[:p + 1]])
+        new_state = {"close": float(close[p]), "up": float(up[p]), "down": float(down[p]),
+                     "tail": prev[-(ma_length - 1):].tolist() if ma_length > 1 else []}
+        if len(new_state["tail"]) < ma_length - 1 or not _warm(new_state):
+            new_state = None
+    return {"rsi": value, "rsi_ma": ma}, new_state
+
+
+def macd(close: np.ndarray, state: State | None = None, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[Dict[str, np.ndarray], State | None]:
+    a_fast, a_slow, a_sig = 2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1)
+    if state is None:
+        ema_fast = pine_ma(close, fast, a_fast)
+        ema_slow = pine_ma(close, slow, a_slow)
+        line = ema_fast - ema_slow
+        sig = np.full(len(close), np.nan)
+        start = slow - 1
+        if len(close) > start:
+            sig[start:] = pine_ma(line[start:], signal, a_sig)
+    else:
+        ema_fast = decay_filter(close, a_fast, state["fast"])
+        ema_slow = decay_filter(close, a_slow, state["slow"])
+        line = ema_fast - ema_slow
+        sig = decay_filter(line, a_sig, state["signal"])
+
+    new_state = None
+    if len(close) >= 2:
+        p = len(close) - 2
+        new_state = {"fast": float(ema_fast[p]), "slow": float(ema_slow[p]), "signal": float(sig[p])}
+        if not _warm(new_state):
+            new_state = None
+    return {"macd": line, "macd_signal": sig, "macd_hist": line - sig}, new_state
+
+
+# TV_INDICATORS 검색어(소문자) → 계산 함수 (열 이름은 tradingview_ingest 고정 스키마와 같음)
+INDICATOR_FUNCS: Dict[str, Callable] = {
+    "relative strength index": rsi,
+    "rsi": rsi,
+    "macd": macd,
+}
+
+
+def resolve_indicators(keywords: List[str]) -> List[str]:
+    """검색어 목록 → 계산할 지표 함수 이름 목록 (중복 제거, 모르는 지표는 경고 후 제외)"""
+    names: List[str] = []
+    for kw in keywords:
+        fn = INDICATOR_FUNCS.get(kw.strip().lower())
+        if fn is None:
+            print(f"[WARN] 로컬 계산을 지원하지 않는 지표: {kw}")
+        elif fn.__name__ not in names:
+            names.append(fn.__name__)
+    return names
+
+
+# -----------------------------
+# 데이터셋 갱신
+# -----------------------------
+def _load_state(path) -> Dict | None:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"[WARN] 지표 상태 읽기 실패, 처음부터 계산합니다: {e}")
+        return None
+
+
+def _save_state(path, saved: Dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(saved, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def update_indicators(root, symbol: str, tf_short: str, keywords: List[str]) -> int:
+    """데이터셋의 종가로 지표 열을 계산해 병합하고 상태 저장, 갱신한 봉 수 반환
+
+    - 저장된 상태의 봉(시각/종가)이 그대로 있으면 그 이후 봉만 계산, 아니면(과거 봉 수정 등) 전체 다시 계산
+    """
+    names = resolve_indicators(keywords)
+    ds = BarDataset(root, symbol, tf_short)
+    if not names or "close" not in ds.columns():
+        return 0
+    funcs = {fn.__name__: fn for fn in INDICATOR_FUNCS.values()}
+    state_path = ds.path / STATE_FILE
+    saved = _load_state(state_path)
+
+    states: Dict[str, State | None] = {name: None for name in names}
+    bars = None
+    if saved and sorted(saved.get("states", {})) == sorted(names) and all(saved["states"].values()):
+        part = ds.read(start=saved["time"], columns=["close"])
+        if len(part[TIME_COLUMN]) and part[TIME_COLUMN][0] == saved["time"] and part["close"][0] == saved["close"]:
+            bars = {c: v[1:] for c, v in part.items()}
+            states = dict(saved["states"])
+    if bars is None:
+        bars = ds.read(columns=["close"])
+
+    valid = np.isfinite(bars["close"])
+    times, close = bars[TIME_COLUMN][valid], bars["close"][valid]
+    if not len(times):
+        return 0
+
+    out: Dict[str, np.ndarray] = {TIME_COLUMN: times}
+    new_states: Dict[str, State | None] = {}
+    for name in names:
+        cols, new_states[name] = funcs[name](close, states[name])
+        out.update(cols)
+    ds.merge(out)
+
+    if len(times) >= 2:
+        _save_state(state_path, {"time": int(times[-2]), "close": float(close[-2]), "states": new_states})
+    return len(times)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 내보내기 CSV 스트리밍 정규화 (Task3 / Task4)
+
+- 파일 전체를 읽지 않고 batch_rows 행씩 끊어 읽어 {열이름: numpy 배열} 묶음(batch)을 순서대로 돌려줍니다.
+- time 열: ISO 문자열(Z / ±HH:MM 오프셋) 또는 epoch 숫자 → int64 epoch 초 (벡터 변환)
+- 값 열  : float64 (빈 칸은 NaN)
+- 열 이름: 차트/지표 구성에 따라 달라지는 헤더(RSI, MACD, Signal, Histogram …)를 고정 스키마 이름으로 변환
+- 따옴표 유무/BOM 등 내보내기마다 다른 형식은 csv 모듈이 처리합니다.
+"""
+from __future__ import annotations
+import re
+import csv
+import warnings
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+DEFAULT_BATCH_ROWS = 50_000
+TIME_COLUMN = "time"
+
+# 내보내기 헤더(소문자) → 고정 스키마 이름
+SCHEMA_ALIASES = {
+    "time": "time",
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "volume": "volume",
+    "vol": "volume",
+    "rsi": "rsi",
+    "relative strength index": "rsi",
+    "rsi-based ma": "rsi_ma",
+    "regular bullish": "rsi_bull_div",
+    "regular bearish": "rsi_bear_div",
+    "upper bollinger band": "rsi_bb_upper",
+    "lower bollinger band": "rsi_bb_lower",
+    "macd": "macd",
+    "signal": "macd_signal",
+    "histogram": "macd_hist",
+    "basis": "bb_basis",
+    "upper": "bb_upper",
+    "lower": "bb_lower",
+}
+
+_SLUG_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_header(header: List[str]) -> List[str]:
+    """내보내기 헤더 → 고정 스키마 열 이름 (모르는 열은 소문자_슬러그, 중복은 _2, _3 …)"""
+    out: List[str] = []
+    for i, raw in enumerate(header):
+        key = raw.strip().strip('"').lower()
+        name = TIME_COLUMN if i == 0 else SCHEMA_ALIASES.get(key) or _SLUG_RE.sub("_", key).strip("_") or f"col{i}"
+        base, n = name, 2
+        while name in out:
+            name, n = f"{base}_{n}", n + 1
+        out.append(name)
+    return out
+
+
+def parse_times(values: np.ndarray) -> np.ndarray:
+    """time 열 문자열 배열 → int64 epoch 초"""
+    if not len(values):
+        return np.empty(0, dtype=np.int64)
+    first = values[0]
+    if first.replace(".", "", 1).lstrip("-").isdigit():
+        return values.astype(np.float64).astype(np.int64)
+    # 'YYYY-MM-DDTHH:MM:SS' 부분은 numpy가 한 번에 파싱, 뒤쪽 오프셋은 종류별로 한 번씩만 계산
+    base = values.astype("U19").astype("datetime64[s]").astype(np.int64)
+    tails = np.char.lstrip(np.char.replace(values, values.astype("U19"), ""), ".0123456789")
+    if not (tails != "").any():
+        return base
+    uniq, inverse = np.unique(tails, return_inverse=True)
+    offsets = np.array([_offset_seconds(t) for t in uniq], dtype=np.int64)
+    return base - offsets[inverse]
+
+
+def _offset_seconds(tail: str) -> int:
+    if tail in ("", "Z"):
+        return 0
+    sign = -1 if tail[0] == "-" else 1
+    hh, _, mm = tail[1:].partition(":")
+    return sign * (int(hh) * 3600 + int(mm or 0) * 60)
+
+
+def _parse_block_fast(lines: List[str], width: int) -> Dict[str, np.ndarray] | None:
+    """숫자만 있는 행 묶음을 문자열 치환 + np.fromstring 으로 한 번에 변환 (형식이 어긋나면 None)"""
+    if width < 2:
+        return None
+    times = []
+    rest = []
+    for ln in lines:
+        t, _, v = ln.partition(",")
+        times.append(t)
+        rest.append(v.rstrip("\r\n"))
+    # 행을 ','로 이어 붙이면 빈 칸은 모두 ',,'로 나타남 (양 끝도 ','로 감싸서 같은 규칙 적용)
+    values = "," + ",".join(rest).replace('"', "") + ","
+    if ",," in values:
+        # ',,,'처럼 겹치는 경우가 있어 두 번 치환
+        values = values.replace(",,", ",nan,").replace(",,", ",nan,")
+    with warnings.catch_warnings():
+        # 숫자가 아닌 칸이 있으면 경고와 함께 중간에서 멈춤 → 아래 개수 검사로 걸러서 csv 경로 사용
+        # (numpy 2.x 일부 버전은 경고 대신 ValueError)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            nums = np.fromstring(values.strip(","), dtype=np.float64, sep=",")
+        except ValueError:
+            return None
+    if len(nums) != len(times) * (width - 1):
+        return None
+    return {"times": np.char.strip(np.array(times), '" '), "values": nums.reshape(len(times), width - 1)}
+
+
+def _parse_block_csv(lines: List[str], width: int) -> Dict[str, np.ndarray]:
+    """따옴표 안 쉼표, 열 개수 불일치 등 예외 형식용 (csv 모듈, 느림)"""
+    rows = [r for r in csv.reader(lines) if r]
+    rows = [r if len(r) == width else (r + [""] * width)[:width] for r in rows]
+    values = np.full((len(rows), max(width - 1, 0)), np.nan)
+    for i, r in enumerate(rows):
+        for j, v in enumerate(r[1:]):
+            try:
+                values[i, j] = float(v) if v.strip() else np.nan
+            except ValueError:
+                pass
+    return {"times": np.array([r[0].strip() for r in rows]), "values": values}
+
+
+def iter_bar_batches(path: Path, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """CSV를 batch_rows 행씩 읽어 {time: int64[], 열: float64[]} 묶음을 차례로 반환"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        header_line = f.readline()
+        if not header_line.strip():
+            return
+        names = normalize_header(next(csv.reader([header_line])))
+        width = len(names)
+        while True:
+            lines = [ln for ln in islice(f, batch_rows) if ln.strip()]
+            if not lines:
+                break
+            block = _parse_block_fast(lines, width) or _parse_block_csv(lines, width)
+            batch = {TIME_COLUMN: parse_times(block["times"])}
+            for j, name in enumerate(names[1:]):
+                batch[name] = np.ascontiguousarray(block["values"][:, j])
+            yield batch
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 수집 작업 저널 (Task3 / Task4)
+
+- (종목, 시간프레임) 작업마다 상태(running/done/failed/skipped), 시도 횟수, 저장 위치, 소요 시간을
+  JSON 한 줄씩 덧붙여 기록합니다(append-only, 줄마다 fsync).
+- 실행이 중간에 죽어도 저널을 다시 읽으면 작업별 마지막 상태가 복원되므로,
+  --resume 으로 완료된 작업은 건너뛰고 실패/중단된 작업만 다시 시도할 수 있습니다.
+- 마감 시각 때문에 시작하지 못한 작업은 skipped 로 남겨, 다음 실행에서도 미완료 작업으로 잡힙니다.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterable
+
+JOURNAL_SUBDIR = "journal"
+
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_SKIPPED = "skipped"
+
+
+class JobJournal:
+    """작업 상태 저널 (스레드 안전, 파일 1개 = 실행 1회)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._replay()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    # -----------------------------
+    # 생성 / 복원
+    # -----------------------------
+    @classmethod
+    def open_run(cls, state_root: Path, resume: bool = False) -> "JobJournal":
+        """resume=True면 가장 최근 저널을 이어 쓰고, 아니면 새 저널 파일 생성"""
+        folder = Path(state_root) / JOURNAL_SUBDIR
+        if resume:
+            existing = sorted(folder.glob("run_*.jsonl"))
+            if existing:
+                print(f"[INFO] 저널 이어서 진행: {existing[-1]}")
+                return cls(existing[-1])
+            print("[WARN] 이어서 진행할 저널이 없어 새로 시작합니다.")
+        return cls(folder / f"run_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    def _replay(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # 비정상 종료로 마지막 줄이 잘린 경우
+                    continue
+                self._jobs[rec["job"]] = rec
+
+    # -----------------------------
+    # 기록
+    # -----------------------------
+    @staticmethod
+    def key(symbol: str, tf_short: str) -> str:
+        return f"{symbol}|{tf_short}"
+
+    def _append(self, rec: Dict) -> None:
+        rec["ts"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._jobs[rec["job"]] = rec
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def start(self, symbol: str, tf_short: str) -> int:
+        """작업 시작 기록, 이번 시도 번호(1부터) 반환"""
+        with self._lock:
+            key = self.key(symbol, tf_short)
+            attempt = self._jobs.get(key, {}).get("attempt", 0) + 1
+            self._append({"job": key, "state": STATE_RUNNING, "attempt": attempt, "started": time.time()})
+            return attempt
+
+    def finish(self, symbol: str, tf_short: str, output: Path | str, seconds: float) -> None:
+        with self._lock:
+            key = self.key(symbol, tf_short)
+            attempt = self._jobs.get(key, {}).get("attempt", 1)
+            self._append({"job": key, "state": STATE_DONE, "attempt": attempt,
+                          "output": str(output), "seconds": round(seconds, 2)})
+
+    def fail(self, symbol: str, tf_short: str, error: str, seconds: float) -> None:
+        with self._lock:
+            key = self.key(symbol, tf_short)
+            attempt = self._jobs.get(key, {}).get("attempt", 1)
+            self._append({"job": key, "state": STATE_FAILED, "attempt": attempt,
+                          "error": error, "seconds": round(seconds, 2)})
+
+    def skip(self, symbol: str, tf_short: str, reason: str) -> None:
+        """시작하지 않은 작업 기록 (시도 횟수는 그대로, pending()에서는 미완료로 취급)"""
+        with self._lock:
+            key = self.key(symbol, tf_short)
+            attempt = self._jobs.get(key, {}).get("attempt", 0)
+            self._append({"job": key, "state": STATE_SKIPPED, "attempt": attempt, "reason": reason})
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+    # -----------------------------
+    # 조회
+    # -----------------------------
+    def state(self, symbol: str, tf_short: str) -> str | None:
+        rec = self._jobs.get(self.key(symbol, tf_short))
+        return rec["state"] if rec else None
+
+    def pending(self, jobs: Iterable[Tuple[str, Tuple]]) -> List[Tuple[str, Tuple]]:
+        """완료되지 않은 작업만 (실패/중단/건너뛴 작업 포함)"""
+        return [(sym, tf) for sym, tf in jobs if self.state(sym, tf[0]) != STATE_DONE]
+
+    def summary(self) -> Dict[str, int]:
+        out = {STATE_DONE: 0, STATE_FAILED: 0, STATE_RUNNING: 0, STATE_SKIPPED: 0}
+        for rec in self._jobs.values():
+            out[rec["state"]] = out.get(rec["state"], 0) + 1
+        return out
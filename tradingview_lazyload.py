@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 지연 로딩(과거 데이터 끌어오기) 브라우저 내 실행기 (Task2 / Task3 공용)
+
+- 휠 축소 + 좌->우 드래그 전체를 페이지 안의 async 루틴(window.__tvLazyLoad)으로 한 번에 실행합니다.
+  Python은 execute_async_script 로 1번만 호출하고 Promise 결과(진행 통계)를 받습니다.
+  (탭 풀에서는 시작만 하고 결과를 주기적으로 확인해, 기다리는 동안 다른 탭이 드라이버를 씁니다)
+- 각 이벤트 사이 간격은 requestAnimationFrame 기준(백그라운드 탭에서는 50ms 타이머로 대체)이라
+  WebDriver 왕복/파이썬 sleep 없이 브라우저가 그릴 수 있는 만큼만 빠르게 진행됩니다.
+- 드래그마다 메인 시리즈의 첫 봉 시각/봉 개수를 읽어, 더 늘지 않거나 목표 날짜에 닿으면 멈춥니다.
+  (내부 API를 못 읽으면 fallback_drags 만큼 고정 간격으로 드래그)
+- 드래그 1회 = 과거 봉 요청 1회이므로, gate(예: 속도 조절기 feed 예약)를 주면 드래그마다 토큰을 받아 진행합니다.
+  페이지 루틴은 드래그 전에 window.__tvLazyTokens 를 1개 쓰고, 없으면 기다립니다. 파이썬은 결과를 폴링하다가
+  토큰이 떨어지면 gate()로 공유 버킷에서 차례를 받아 1개를 넣어 줍니다 (워커/탭 전체 합계가 상한을 지킴).
+"""
+from __future__ import annotations
+import time
+from typing import Callable, Dict, Tuple
+
+# 차트 메인 시리즈의 첫 봉 시각(초)과 봉 개수 (내부 API 경로가 바뀌면 null)
+HISTORY_STATE_JS = """
+try {
+    var api = window.TradingViewApi;
+    var widget = api && api._activeChartWidgetWV && api._activeChartWidgetWV.value();
+    var bars = widget && widget._chartWidget.model().mainSeries().bars();
+    if (!bars || !bars.size()) return null;
+    var first = bars.first();
+    var t = first.value ? first.value[0] : first.time;
+    return {first: Math.floor(t), count: bars.size()};
+} catch (e) { return null; }
+"""
+
+# 문서당 1회만 설치되는 지연 로딩 루틴
+_LAZY_LOAD_INSTALL_JS = """
+if (!window.__tvLazyLoad) {
+    window.__tvLazyLoad = async function (canvas, opts) {
+        var historyState = function () {
+""" + HISTORY_STATE_JS + """
+        };
+        var frame = function () {
+            return new Promise(function (r) {
+                var done = false;
+                var fin = function () { if (!done) { done = true; r(); } };
+                requestAnimationFrame(fin);
+                setTimeout(fin, 50);  // 백그라운드 탭에서는 rAF가 멈추므로 타이머로 대체
+            });
+        };
+        var sleep = function (ms) { return new Promise(function (r) { setTimeout(r, ms); }); };
+        var mouse = function (type, x, y, buttons) {
+            canvas.dispatchEvent(new MouseEvent(type, {
+                clientX: x, clientY: y, button: 0, buttons: buttons, bubbles: true
+            }));
+        };
+
+        var t0 = performance.now();
+        var rect = canvas.getBoundingClientRect();
+        var cx = rect.left + rect.width / 2, cy = rect.top + rect.height / 2;
+
+        // 1) 축소(스크롤 다운)
+        for (var i = 0; i < opts.wheels; i++) {
+            canvas.dispatchEvent(new PointerEvent('pointermove', {
+                clientX: cx, clientY: cy, pointerId: 1, pointerType: 'mouse', bubbles: true
+            }));
+            canvas.dispatchEvent(new WheelEvent('wheel', {
+                clientX: cx, clientY: cy, deltaX: 0, deltaY: 200, deltaMode: 0, bubbles: true
+            }));
+            await frame();
+        }
+
+        var tWheel = performance.now();
+
+        // 2) 좌->우 드래그 (히스토리가 더 늘지 않을 때까지)
+        var state = historyState(), start = state, adaptive = !!state;
+        var limit = adaptive ? opts.maxDrags : opts.fallbackDrags;
+        var x0 = rect.left + 100, x1 = rect.left + rect.width - 100;
+        var drags = 0, stalls = 0;
+        while (drags < limit) {
+            if (adaptive && opts.targetTs !== null && state.first <= opts.targetTs) break;
+            if (opts.gated) {
+                // 호출 측이 공유 버킷에서 받은 토큰 1개 = 드래그(과거 봉 요청) 1회
+                var waitUntil = performance.now() + opts.tokenWaitMs;
+                while (window.__tvLazyTokens <= 0 && performance.now() < waitUntil) await sleep(20);
+                if (window.__tvLazyTokens <= 0) break;  // 토큰이 오지 않음 (호출 측 중단)
+                window.__tvLazyTokens--;
+            }
+            mouse('mousedown', x0, cy, 1);
+            for (var s = 1; s <= 10; s++) mouse('mousemove', x0 + (x1 - x0) * s / 10, cy, 1);
+            mouse('mouseup', x1, cy, 0);
+            drags++;
+
+            if (!adaptive) { await sleep(opts.fixedDelayMs); continue; }
+            var next = null, deadline = performance.now() + opts.stallTimeoutMs;
+            while (performance.now() < deadline) {
+                await frame();
+                var cur = historyState();
+                if (cur && (cur.first !== state.first || cur.count !== state.count)) { next = cur; break; }
+            }
+            if (next) { stalls = 0; state = next; }
+            else if (++stalls >= opts.stallDrags) break;
+        }
+
+        return {
+            drags: drags, adaptive: adaptive,
+            loaded: adaptive ? state.count - start.count : 0,
+            count: state ? state.count : null, first: state ? state.first : null,
+            elapsed: (performance.now() - t0) / 1000,
+            wheelElapsed: (tWheel - t0) / 1000, dragElapsed: (performance.now() - tWheel) / 1000
+        };
+    };
+}
+"""
+
+# 설치 + 호출해 결과를 기다림 (arguments: canvas, opts, callback)
+LAZY_LOAD_JS = _LAZY_LOAD_INSTALL_JS + """
+var callback = arguments[arguments.length - 1];
+window.__tvLazyLoad(arguments[0], arguments[1]).then(callback, function (e) { callback({error: String(e)}); });
+"""
+
+# 설치 + 시작만 하고 바로 반환, 결과는 window.__tvLazyResult 에 남김 (arguments: canvas, opts)
+#   gated 이면 첫 드래그 토큰 1개를 넣고 시작 (호출 측이 시작 전에 한 번 예약해 둔 몫)
+LAZY_LOAD_START_JS = _LAZY_LOAD_INSTALL_JS + """
+window.__tvLazyResult = null;
+window.__tvLazyTokens = arguments[1].gated ? 1 : 0;
+window.__tvLazyLoad(arguments[0], arguments[1]).then(
+    function (r) { window.__tvLazyResult = r; },
+    function (e) { window.__tvLazyResult = {error: String(e)}; });
+"""
+
+# 폴링: 결과(끝나기 전엔 null)와 남은 토큰 수 / 토큰 1개 추가
+LAZY_STATUS_JS = "return {result: window.__tvLazyResult, tokens: window.__tvLazyTokens || 0};"
+LAZY_GRANT_JS = "window.__tvLazyTokens = (window.__tvLazyTokens || 0) + 1;"
+# 토큰 대기 동안 폴링 간격(초) (탭 풀이 아니어도 gate 를 쓰면 폴링 방식으로 실행)
+GATE_POLL_INTERVAL = 0.05
+# 페이지 루틴이 토큰을 기다리는 최대 시간(초): 조절기의 최대 정지(10분)보다 길게, 넘으면 호출 측 중단으로 보고 종료
+TOKEN_WAIT = 900.0
+
+
+def lazy_load_options(wheels: int = 30, max_drags: int = 100, fallback_drags: int = 50,
+                      stall_drags: int = 3, stall_timeout: float = 1.5, target_ts: int | None = None,
+                      fixed_delay: float = 0.7, gated: bool = False) -> Tuple[Dict, float]:
+    """페이지 내 루틴에 넘길 옵션과 스크립트 제한 시간(초) (Selenium / DevTools 실행기 공용)
+
+    gated : 드래그마다 호출 측이 넣어 주는 토큰을 기다림 (토큰 대기 시간은 제한 시간에 포함되지 않음)
+    """
+    opts = {
+        "wheels": wheels,
+        "maxDrags": max_drags,
+        "fallbackDrags": fallback_drags,
+        "stallDrags": stall_drags,
+        "stallTimeoutMs": int(stall_timeout * 1000),
+        "targetTs": target_ts,
+        "fixedDelayMs": int(fixed_delay * 1000),
+        "gated": gated,
+        "tokenWaitMs": int(TOKEN_WAIT * 1000),
+    }
+    # 최악의 경우(매 드래그마다 정체 대기)보다 넉넉하게 스크립트 타임아웃 설정
+    budget = max(max_drags * stall_timeout, fallback_drags * fixed_delay) + wheels * 0.1 + 30
+    return opts, budget
+
+
+def run_lazy_load(driver, canvas, wheels: int = 30, max_drags: int = 100, fallback_drags: int = 50,
+                  stall_drags: int = 3, stall_timeout: float = 1.5, target_ts: int | None = None,
+                  fixed_delay: float = 0.7, poll: float = 0.0,
+                  gate: Callable[[], float] | None = None) -> Dict:
+    """브라우저 안에서 지연 로딩을 끝까지 수행하고 {drags, loaded, count, first, elapsed, wheelElapsed, dragElapsed} 반환
+
+    - poll > 0 : 스크립트 호출로 끝날 때까지 붙잡지 않고, 시작만 한 뒤 poll초 간격으로 결과를 확인
+                 (탭 풀에서 그 사이 다른 탭이 드라이버를 쓸 수 있도록)
+    - gate     : 드래그 1회마다 차례를 기다리는 함수 (기다린 초 반환, 예: lambda: GOVERNOR.acquire("feed"))
+                 첫 드래그 몫은 호출 측이 시작 전에 미리 받아 둠. 주면 항상 폴링 방식으로 실행
+    """
+    opts, budget = lazy_load_options(wheels, max_drags, fallback_drags, stall_drags, stall_timeout,
+                                     target_ts, fixed_delay, gated=gate is not None)
+    if poll > 0 or gate is not None:
+        poll = poll or GATE_POLL_INTERVAL
+        driver.execute_script(LAZY_LOAD_START_JS, canvas, opts)
+        deadline = time.time() + budget
+        while True:
+            status = driver.execute_script(LAZY_STATUS_JS)
+            if status["result"] is not None:
+                result = status["result"]
+                break
+            if time.time() > deadline:
+                raise TimeoutError(f"지연 로딩이 {budget:.0f}초 안에 끝나지 않았습니다.")
+            if gate is not None and status["tokens"] <= 0:
+                # 페이지가 토큰을 다 썼음 → 공유 버킷에서 다음 차례를 받아 넣어 줌 (기다린 만큼 제한 시간 연장)
+                deadline += gate()
+                driver.execute_script(LAZY_GRANT_JS)
+            else:
+                time.sleep(poll)
+    else:
+        driver.set_script_timeout(budget)
+        result = driver.execute_async_script(LAZY_LOAD_JS, canvas, opts)
+    if result.get("error"):
+        raise RuntimeError(f"지연 로딩 스크립트 오류: {result['error']}")
+    return result
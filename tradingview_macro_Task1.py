@@ -33,6 +33,8 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from tradingview_download import DownloadWatcher
+
 # ================================================================
 # 상수 정의
 # ================================================================
@@ -215,35 +217,28 @@ def export_csv_data(driver: webdriver.Chrome) -> None:
         # 5단계: Export 확인 버튼 클릭
         export_confirm = driver.find_element("xpath", EXPORT_CONFIRM_XPATH)
         export_confirm.click()
-        time.sleep(5)  # 다운로드 대기
         
         print("[INFO] CSV 내보내기가 완료되었습니다.")
         
     except Exception as e:
         raise RuntimeError(f"CSV 내보내기 실패: {e}")
 
-def wait_and_rename_csv() -> str:
-    """CSV 파일 다운로드 대기 및 이름 변경"""
+def wait_and_rename_csv(watcher: DownloadWatcher) -> str:
+    """CSV 파일 다운로드 대기 및 이름 변경 (내보내기 직전에 시작한 감시자 사용)"""
     try:
-        # 다운로드 완료 대기 (최대 30초)
-        for i in range(30):
-            csv_files = list(DOWNLOAD_ROOT.glob("*.csv"))
-            if csv_files:
-                latest_file = max(csv_files, key=lambda p: p.stat().st_mtime)
-                
-                # 파일명 변경
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                new_name = f"GOOG_Weekly_{timestamp}.csv"
-                dest_path = DOWNLOAD_ROOT / new_name
-                latest_file.rename(dest_path)
-                
-                return str(dest_path)
-            
-            time.sleep(1)
-            print(f"다운로드 대기 중... ({i+1}/30)")
-        
+        # 다운로드 완료 대기 (최대 30초) - .crdownload → .csv 변경 즉시 반환
+        latest_file = watcher.wait(timeout=30)
+
+        # 파일명 변경
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        new_name = f"GOOG_Weekly_{timestamp}.csv"
+        dest_path = DOWNLOAD_ROOT / new_name
+        latest_file.rename(dest_path)
+
+        return str(dest_path)
+
+    except TimeoutError:
         raise TimeoutError("CSV 다운로드가 완료되지 않았습니다.")
-        
     except Exception as e:
         raise RuntimeError(f"파일 처리 오류: {e}")
 
@@ -269,13 +264,13 @@ def main():
         print("[INFO] 주(Week) 타임프레임 선택 중...")
         select_timeframe_week(driver)
         
-        # CSV 데이터 내보내기
-        print("[INFO] CSV 데이터 내보내기 시작...")
-        export_csv_data(driver)
-        
-        # 다운로드 완료 대기 및 파일명 변경
-        print("[INFO] 다운로드 완료 대기 중...")
-        saved_file = wait_and_rename_csv()
+        # CSV 데이터 내보내기 + 다운로드 완료 대기 및 파일명 변경
+        with DownloadWatcher(DOWNLOAD_ROOT) as watcher:
+            print("[INFO] CSV 데이터 내보내기 시작...")
+            export_csv_data(driver)
+
+            print("[INFO] 다운로드 완료 대기 중...")
+            saved_file = wait_and_rename_csv(watcher)
         
         print(f"\n[SUCCESS] ✅ 다운로드 완료!")
         print(f"파일 위치: {saved_file}")
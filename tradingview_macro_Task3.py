@@ -19,31 +19,94 @@ Task 3: TradingView 크롤링 매크로 (확장판)
 """
 from __future__ import annotations
 import os
+import re
 import time
 import json
+import queue
+import shutil
+import calendar
+import argparse
+import threading
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException, \
+    InvalidSessionIdException, WebDriverException
 
 from selenium.webdriver.common.keys import Keys
 
 from selenium.webdriver.common.action_chains import ActionChains
 
+from tradingview_wait import LATENCY, settle, dom_quiet, chart_ready, chart_focused, any_of
+from tradingview_lazyload import run_lazy_load, HISTORY_STATE_JS
+from tradingview_storage import get_marks, ingest_csv, ingest_bars
+from tradingview_feed import FeedCapture, enable_capture
+from tradingview_resample import DAILY_TF, DERIVED_TIMEFRAMES, derive_from_daily
+from tradingview_indicators import update_indicators
+from tradingview_trace import TRACER, traced, open_trace
+from tradingview_retry import run_step
+from tradingview_selectors import get_selector_cache, find_first, resolve
+from tradingview_browser import apply_lean_options, block_resources, load_block_list, record_page_load
+from tradingview_journal import JobJournal, STATE_DONE
+from tradingview_tabs import TabPool, TAB_POOL_ARGUMENTS, TAB_POLL_INTERVAL, is_tab
+from tradingview_download import DownloadWatcher, make_job_id, job_download_dir, set_download_dir, cleanup_job_dir
+from tradingview_ratelimit import RateGovernor, ThrottleDetected, THROTTLE_PROBE_JS, throttle_reason
+
 
 # -----------------------------
 # 전역 설정
 # -----------------------------
 COOKIES_FILE = "tradingview_cookies.json"
+# 사이트 주소 (벤치마크에서는 로컬 모의 페이지 주소로 바꿔서 사용)
+TV_BASE_URL = os.environ.get("TV_BASE_URL", "https://www.tradingview.com").rstrip("/")
 # 기본 다운로드 루트 (필요시 절대경로로 바꾸세요)
 DOWNLOAD_ROOT = Path(os.environ.get("TV_DOWNLOAD_ROOT", "./downloads")).resolve()
 # 크롬 사용자 프로필 디렉토리(로그인/쿠키 유지)
 USER_PROFILE_DIR = Path(os.environ.get("TV_CHROME_PROFILE", "./chrome_profile")).resolve()
+# 병렬 워커(--workers)별 프로필 복사본/다운로드 폴더 루트
+WORKER_ROOT = Path(os.environ.get("TV_WORKER_ROOT", "./workers")).resolve()
+# 1이면 이미 열린 차트에서 종목/주기만 전환(새로고침 생략), 0이면 매번 URL로 새로 진입
+FAST_SWITCH = os.environ.get("TV_FAST_SWITCH", "1") != "0"
+# 1이면 (종목, 시간프레임)별 마지막 저장 봉 이후만 지연 로딩/병합하는 증분 수집
+INCREMENTAL = os.environ.get("TV_INCREMENTAL", "1") != "0"
+# 종목/주기별 컬럼형 데이터셋 루트 (DB_ROOT/<symbol>/<tf>/part=*.npz)
+DB_ROOT = Path(os.environ.get("TV_DB_ROOT", "./tv_db")).resolve()
+# 1이면 데이터셋에 병합한 뒤에도 원본 내보내기 CSV를 DOWNLOAD_ROOT/<symbol>/<tf>/ 에 보관
+KEEP_RAW_CSV = os.environ.get("TV_KEEP_RAW_CSV", "0") == "1"
+# 후보 XPath 중 마지막으로 성공한 것을 먼저 시도하도록 학습 결과를 DB_ROOT/_state/selectors.json 에 보관
+SELECTORS = get_selector_cache(DB_ROOT / "_state")
+# 수집 방식: export(CSV 내보내기, 기본) / feed(DevTools WebSocket 프레임에서 봉을 직접 해석, 실패 시 export로 대체)
+COLLECT_MODE = os.environ.get("TV_COLLECT_MODE", "export").strip().lower()
+# feed 모드에서 받은 프레임을 작업별 JSONL로 남길 폴더 (tradingview_replay.py 재생/검증용, 비우면 기록 안 함)
+FEED_RECORD_DIR = os.environ.get("TV_FEED_RECORD", "").strip()
+# 1이면 경량 실행 프로필(확장 끄기 + 광고/폰트/이미지/분석 리소스 차단), 0이면 일반 크롬 (기본, 선택 사항)
+LEAN_BROWSER = os.environ.get("TV_LEAN_BROWSER", "0") == "1"
+# 경량 프로필에서 헤드리스 실행 여부 (기본 0: 로그인된 계정의 헤드리스 감지 위험, 수동 로그인 창은 항상 화면에 표시)
+HEADLESS = os.environ.get("TV_HEADLESS", "0") == "1"
+# 차단할 URL 패턴 파일 (비우면 tradingview_browser.DEFAULT_BLOCKED_URLS)
+BLOCK_LIST_FILE = os.environ.get("TV_BLOCK_LIST", "").strip()
+# 1이면 주/월/연봉(W, M, 12M)은 브라우저로 받지 않고 저장된 일봉에서 계산 (D 작업 직후)
+RESAMPLE_FROM_DAILY = os.environ.get("TV_RESAMPLE_FROM_DAILY", "0") == "1"
+# 일봉 세션 시작이 UTC로 전날이 되는 거래소용 UTC 오프셋(시간), 미국/유럽/한국 종목은 0
+SESSION_UTC_OFFSET = int(float(os.environ.get("TV_SESSION_UTC_OFFSET", "0")) * 3600)
+# 종류별 분당 요청 상한 (워커/탭 전체 공유, 0이면 간격 제한 없이 제한 신호 감지/일시 정지만)
+#   chart = 차트 로딩/전환, feed = 지연 로딩 드래그(과거 봉 요청, 기본 0: 드래그 간격 제한 없음), export = CSV 내보내기
+RATE_LIMITS = {
+    "chart": float(os.environ.get("TV_RATE_CHART", "30")),
+    "feed": float(os.environ.get("TV_RATE_FEED", "0")),
+    "export": float(os.environ.get("TV_RATE_EXPORT", "20")),
+}
+# 제한 신호 없이 계속 성공할 때 위 상한에 곱해 올라갈 수 있는 최대 배율 (기본 1: 설정한 상한을 넘지 않음)
+RATE_CEILING = float(os.environ.get("TV_RATE_CEILING", "1.0"))
+# 제한 신호(429/배너/빈 차트) 감지 시 전체 정지 시간(초), 연속 감지 시 2배씩 (최대 10분)
+THROTTLE_BACKOFF = float(os.environ.get("TV_THROTTLE_BACKOFF", "30"))
+GOVERNOR = RateGovernor(RATE_LIMITS, ceiling=RATE_CEILING, backoff=THROTTLE_BACKOFF)
 
 # 시간프레임 목록 (short, human_label, url_interval, requires_lazyload)
 TIMEFRAMES = [
@@ -54,10 +117,29 @@ TIMEFRAMES = [
     ('1h',  '1 hour',    '60',    True),   # 60분
     ('10m', '10 minutes','10',    True),   # 10분
 ]
+# 브라우저로 수집할 시간프레임 (일봉에서 계산하는 프레임 제외)
+BROWSER_TIMEFRAMES = [tf for tf in TIMEFRAMES if not (RESAMPLE_FROM_DAILY and tf[0] in DERIVED_TIMEFRAMES)]
 
 
 # 지표 추가시 검색에 사용할 키워드들 (예: 'Relative Strength Index', 'MACD' 등)
 INDICATORS = [s.strip() for s in os.environ.get("TV_INDICATORS", "Relative Strength Index, MACD").split(",")]
+# 지표 적용 방식: session = 차트 범례에 없을 때만 추가(레이아웃에 저장되어 종목/주기 변경 후에도 유지),
+#                 every   = 매 작업마다 다시 추가(기존 방식)
+INDICATOR_MODE = os.environ.get("TV_INDICATOR_MODE", "session").strip().lower()
+# 지표 값 출처: ui    = 차트에 지표를 추가해 CSV로 내보냄(기존 방식)
+#               local = 지표 대화상자를 건너뛰고 저장된 봉으로 직접 계산(원시 봉만 내보냄)
+INDICATOR_SOURCE = os.environ.get("TV_INDICATOR_SOURCE", "ui").strip().lower()
+# feed 모드는 지표 단계를 건너뛰고 봉(OHLCV)만 받으므로(내보내기 대체 포함) 지표는 저장 후 직접 계산
+if COLLECT_MODE == "feed" and INDICATOR_SOURCE != "local":
+    print("[INFO] TV_COLLECT_MODE=feed → 지표는 저장된 봉으로 직접 계산합니다 (TV_INDICATOR_SOURCE=local)")
+    INDICATOR_SOURCE = "local"
+# 검색 키워드 → 차트 범례(legend)에 표시되는 짧은 이름
+INDICATOR_LEGEND_NAMES = {
+    "Relative Strength Index": "RSI",
+    "Moving Average Convergence Divergence": "MACD",
+    "Bollinger Bands": "BB",
+    "Moving Average": "MA",
+}
 
 # 종목 리스트 (최대 30개). 환경변수 TV_TICKERS 또는 tickers.txt(한 줄. 한 종목)로도 입력 가능
 TV_TICKERS = ["MSFT", "AAPL", "NVDA", "GOOGL", "AMZN", "META", "GOOG", "BRK.B", "LLY", "AVGO",\
@@ -65,6 +147,16 @@ TV_TICKERS = ["MSFT", "AAPL", "NVDA", "GOOGL", "AMZN", "META", "GOOG", "BRK.B",
               "ORCL", "COST", "MRK", "BAC", "ABBV", "CVX", "CRM", "KO", "NFLX", "AMD"]
 DEFAULT_TICKERS = ["GOOG"]
 
+# 지연 로딩: 이 날짜(YYYY-MM-DD)보다 과거 봉까지 로드되면 중단 (비우면 히스토리가 더 늘지 않을 때까지)
+LAZY_TARGET_DATE = os.environ.get("TV_LAZY_TARGET_DATE", "").strip()
+# 드래그 후 봉 개수/시작 봉이 변하지 않은 횟수가 이만큼 연속되면 중단
+LAZY_STALL_DRAGS = int(os.environ.get("TV_LAZY_STALL_DRAGS", "3"))
+# 드래그 1회 후 새 히스토리가 들어오기를 기다리는 최대 시간(초)
+LAZY_STALL_TIMEOUT = float(os.environ.get("TV_LAZY_STALL_TIMEOUT", "1.5"))
+# 프레임별 드래그 상한 (차트 상태를 읽을 수 없을 때는 FALLBACK 횟수만큼 고정 드래그)
+LAZY_MAX_DRAGS = {"D": 40, "1h": 150, "10m": 400}
+LAZY_FALLBACK_DRAGS = {"D": 6, "1h": 30, "10m": 50}
+
 
 # -----------------------------
 # 유틸
@@ -91,12 +183,20 @@ def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def setup_driver(download_dir: Path) -> webdriver.Chrome:
-    ensure_dir(USER_PROFILE_DIR)
+@traced("driver.start")
+def setup_driver(download_dir: Path, profile_dir: Path | None = None,
+                 lean: bool | None = None, tabs: int = 1) -> webdriver.Chrome:
+    """크롬 실행 (lean=None이면 TV_LEAN_BROWSER 설정을 따름, 수동 로그인용은 lean=False)
+
+    tabs > 1 이면 탭 풀용으로 백그라운드 창 스로틀링을 끈 채 실행 (창은 TabPool이 엶)
+    """
+    lean = LEAN_BROWSER if lean is None else lean
+    profile_dir = profile_dir or USER_PROFILE_DIR
+    ensure_dir(profile_dir)
     ensure_dir(download_dir)
 
     chrome_options = Options()
-    chrome_options.add_argument(f"--user-data-dir={str(USER_PROFILE_DIR)}")
+    chrome_options.add_argument(f"--user-data-dir={str(profile_dir)}")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
@@ -109,10 +209,24 @@ def setup_driver(download_dir: Path) -> webdriver.Chrome:
         "safebrowsing.enabled": True,
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    if COLLECT_MODE == "feed":
+        enable_capture(chrome_options)
+    if lean:
+        apply_lean_options(chrome_options, headless=HEADLESS)
+    if tabs > 1:
+        for arg in TAB_POOL_ARGUMENTS:
+            chrome_options.add_argument(arg)
 
     driver = webdriver.Chrome(options=chrome_options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     driver.set_window_size(1600, 1000)
+    if lean:
+        # 헤드리스에서도 다운로드가 막히지 않도록 기본 폴더를 CDP로 지정 (작업마다 export_csv에서 다시 전환)
+        set_download_dir(driver, download_dir)
+        try:
+            block_resources(driver, load_block_list(BLOCK_LIST_FILE))
+        except Exception as e:
+            print(f"[WARN] 리소스 차단 설정 실패(무시하고 계속): {e}")
     return driver
 
 
@@ -126,13 +240,14 @@ def save_cookies(driver: webdriver.Chrome) -> None:
         print(f"[WARN] 쿠키 저장 실패: {e}")
 
 
+@traced("driver.load_cookies")
 def load_cookies(driver: webdriver.Chrome) -> bool:
     if not Path(COOKIES_FILE).exists():
         return False
 
     try:
         # 메인 먼저 열기
-        driver.get("https://www.tradingview.com/")
+        driver.get(f"{TV_BASE_URL}/")
         time.sleep(3)
         with open(COOKIES_FILE, "r", encoding="utf-8") as f:
             for cookie in json.load(f):
@@ -152,82 +267,187 @@ def manual_login(driver: webdriver.Chrome) -> None:
     input("로그인 후 Enter를 누르면 진행합니다... ")
     save_cookies(driver)
 
-def go_chart(driver: webdriver.Chrome, symbol: str, interval: str | None = None) -> None:
-    base = f"https://www.tradingview.com/chart/?symbol={symbol}"
+@traced("chart.go")
+def go_chart(driver: webdriver.Chrome, symbol: str, interval: str | None = None, fast: bool = True) -> None:
+    """차트 이동: 이미 열린 차트가 있으면 페이지 안에서 종목/주기만 전환, 실패 시 전체 새로고침"""
+    GOVERNOR.acquire("chart")
+    if fast and FAST_SWITCH and chart_loaded(driver):
+        if switch_chart_in_page(driver, symbol, interval):
+            return
+        print(f"[WARN] 페이지 내 전환 실패 → 새로고침: {symbol} {interval or ''}")
+
+    base = f"{TV_BASE_URL}/chart/?symbol={symbol}"
     url = base if interval is None else f"{base}&interval={interval}"
+    started = time.time()
     driver.get(url)
     WebDriverWait(driver, 20).until(
         EC.presence_of_element_located((By.CSS_SELECTOR, 'canvas[data-name="pane-top-canvas"]'))
     )
+    record_page_load(driver, "chart.page_load", started)
 
 
+def chart_loaded(driver: webdriver.Chrome) -> bool:
+    """현재 탭에 TradingView 차트 앱이 이미 떠 있는지"""
+    try:
+        return "/chart/" in driver.current_url and bool(
+            driver.find_elements(By.CSS_SELECTOR, 'canvas[data-name="pane-top-canvas"]'))
+    except Exception:
+        return False
 
-def lazy_load_short_tf(driver: webdriver.Chrome, tf_short: str, tf_label: str) -> None:
-    """일/시/10분 프레임에서 과거 데이터 로딩(휠 스크롤+좌->우 드래그)"""
+
+def check_throttle(driver: webdriver.Chrome, kind: str) -> None:
+    """요청 직후 페이지의 제한 신호 확인: 있으면 조절기에 보고하고 ThrottleDetected, 없으면 성공 보고"""
+    try:
+        probe = driver.execute_script(THROTTLE_PROBE_JS)
+    except Exception:
+        return
+    reason, soft = throttle_reason(probe)
+    if reason is None:
+        GOVERNOR.success(kind)
+        return
+    GOVERNOR.throttled(kind, reason, soft=soft)
+    raise ThrottleDetected(f"요청 제한 감지({kind}): {reason}")
+
+
+# 차트 내부 API로 종목/주기 변경 후 콜백 (arguments: symbol, interval|null, callback)
+SWITCH_API_JS = """
+var callback = arguments[arguments.length - 1];
+var symbol = arguments[0], interval = arguments[1];
+try {
+    var chart = window.TradingViewApi.activeChart();
+    var setInterval_ = function () {
+        if (!interval) { callback(true); return; }
+        chart.setResolution(interval, function () { callback(true); });
+    };
+    chart.setSymbol(symbol, setInterval_);
+} catch (e) { callback(false); }
+"""
+
+# 현재 차트의 종목/주기 (API 우선, 없으면 헤더 툴바 텍스트)
+CHART_STATE_JS = """
+try {
+    var chart = window.TradingViewApi.activeChart();
+    return {symbol: chart.symbol(), interval: chart.resolution(), source: 'api'};
+} catch (e) {
+    var sym = document.querySelector('#header-toolbar-symbol-search');
+    var itv = document.querySelector('#header-toolbar-intervals');
+    return {symbol: sym ? sym.textContent.trim() : null, interval: itv ? itv.textContent.trim() : null, source: 'dom'};
+}
+"""
+
+# URL interval 파라미터 → 헤더 툴바 표시 이름
+_INTERVAL_HEADER_LABELS = {"12M": "12M", "1M": "M", "1W": "W", "1D": "D", "60": "1h", "10": "10m"}
+
+
+def chart_matches(state: Dict | None, symbol: str, interval: str | None) -> bool:
+    if not state or not state.get("symbol"):
+        return False
+    sym_ok = state["symbol"].upper().split(":")[-1] == symbol.upper().split(":")[-1]
+    if interval is None:
+        return sym_ok
+    cur = (state.get("interval") or "").upper()
+    if state.get("source") == "api":
+        # 내부 API는 '1D' 대신 'D' 같은 축약형을 돌려줄 수 있음
+        norm = lambda v: v[1:] if v in ("1D", "1W", "1M") else v
+        itv_ok = norm(cur) == norm(interval.upper())
+    else:
+        itv_ok = _INTERVAL_HEADER_LABELS.get(interval, interval).upper() in cur
+    return sym_ok and itv_ok
+
+
+def switch_chart_in_page(driver: webdriver.Chrome, symbol: str, interval: str | None) -> bool:
+    """새로고침 없이 현재 차트에서 종목/주기 전환 (내부 API → 키보드 입력 순), 성공 여부 반환"""
+    ensure_dialog_closed(driver, 2)
+    try:
+        driver.set_script_timeout(20)
+        if driver.execute_async_script(SWITCH_API_JS, symbol, interval) and \
+                chart_matches(driver.execute_script(CHART_STATE_JS), symbol, interval):
+            settle(driver, "chart.switch", chart_ready(), timeout=10)
+            return True
+    except Exception:
+        pass
+
+    # 키보드: 차트에 종목명을 타이핑하면 종목 검색창, 숫자/주기를 타이핑하면 주기 변경창이 열림
+    try:
+        focus_chart_canvas(driver)
+        body = driver.find_element(By.TAG_NAME, "body")
+        body.send_keys(symbol)
+        WebDriverWait(driver, 4).until(EC.presence_of_element_located((By.XPATH, "//div[@role='dialog']//input")))
+        settle(driver, "chart.symbol_search", dom_quiet(0.3), timeout=3)
+        body.send_keys(Keys.ENTER)
+        ensure_dialog_closed(driver, 4)
+        if interval:
+            focus_chart_canvas(driver)
+            driver.find_element(By.TAG_NAME, "body").send_keys(interval)
+            settle(driver, "chart.interval_entry", dom_quiet(0.2), timeout=2)
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ENTER)
+        settle(driver, "chart.switch", chart_ready(), timeout=10)
+        return chart_matches(driver.execute_script(CHART_STATE_JS), symbol, interval)
+    except Exception:
+        try: driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+        except Exception: pass
+        return False
+
+
+
+def lazy_load_short_tf(driver: webdriver.Chrome, tf_short: str, tf_label: str,
+                       target_ts: int | None = None) -> Dict:
+    """일/시/10분 프레임에서 과거 데이터 로딩(휠 스크롤+좌->우 드래그), 로드 결과 반환
+
+    휠/드래그 전체는 브라우저 안의 루틴이 requestAnimationFrame 간격으로 수행하고,
+    파이썬은 execute_async_script 로 한 번만 기다립니다.
+    """
     try:
         canvas = driver.find_element(By.CSS_SELECTOR, 'canvas[data-name="pane-top-canvas"]')
     except NoSuchElementException:
         print("[WARN] 캔버스를 찾지 못했습니다.")
-        return
+        return {"drags": 0, "loaded": 0, "count": None, "first": None}
+
+    # 드래그 1회 = 과거 봉 요청 1회: feed 상한이 있으면 드래그마다 공유 버킷에서 차례를 받음 (첫 드래그 몫은 여기서)
+    GOVERNOR.acquire("feed")
+    result = run_lazy_load(
+        driver, canvas,
+        wheels=30,
+        max_drags=LAZY_MAX_DRAGS.get(tf_short, 100),
+        fallback_drags=LAZY_FALLBACK_DRAGS.get(tf_short, 50),
+        stall_drags=LAZY_STALL_DRAGS,
+        stall_timeout=LAZY_STALL_TIMEOUT,
+        target_ts=target_ts if target_ts is not None else parse_target_date(LAZY_TARGET_DATE),
+        poll=TAB_POLL_INTERVAL if is_tab(driver) else 0.0,
+        gate=(lambda: GOVERNOR.acquire("feed")) if GOVERNOR.interval("feed") > 0 else None,
+    )
+    check_throttle(driver, "feed")
+    # 브라우저 안에서 잰 휠/드래그 구간을 span으로 기록
+    TRACER.record("lazy_load.wheel", result.get("wheelElapsed", 0.0))
+    TRACER.record("lazy_load.drag", result.get("dragElapsed", 0.0), drags=result["drags"], loaded=result["loaded"])
+    if result["adaptive"]:
+        first_day = time.strftime("%Y-%m-%d", time.gmtime(result["first"]))
+        print(f"[INFO] 지연 로딩({tf_short}): 드래그 {result['drags']}회, +{result['loaded']} bars "
+              f"(총 {result['count']}, 시작 {first_day}, {result['elapsed']:.1f}s)")
+    else:
+        print(f"[WARN] 차트 히스토리 상태를 읽지 못해 고정 횟수로 드래그했습니다. ({tf_short}: {result['drags']}회)")
+    return result
+
+
+def read_history_state(driver: webdriver.Chrome) -> Dict | None:
+    """현재 차트에 로드된 {first: 첫 봉 epoch초, count: 봉 개수} (읽을 수 없으면 None)"""
+    try:
+        return driver.execute_script(HISTORY_STATE_JS)
+    except Exception:
+        return None
 
-    size = canvas.size
-    center_x = size["width"] // 2
-    center_y = size["height"] // 2
-
-    # 축소(스크롤 다운) 반복
-    for i in range(30):
-        wheel_script = f"""
-        var canvas = arguments[0];
-        var rect = canvas.getBoundingClientRect();
-        var clientX = rect.left + {center_x};
-        var clientY = rect.top  + {center_y};
-
-        canvas.dispatchEvent(new PointerEvent('pointermove', {{
-            clientX: clientX, clientY: clientY, pointerId: 1, pointerType: 'mouse', bubbles: true
-        }}));
-        var e = new WheelEvent('wheel', {{
-            clientX: clientX, clientY: clientY, deltaX: 0, deltaY: 200, deltaMode: 0, bubbles: true
-        }});
-        canvas.dispatchEvent(e);
-        """
-        driver.execute_script(wheel_script, canvas)
-        time.sleep(0.05)
-
-    # 프레임별 드래그 횟수
-    drag_count = 6 if tf_short == "D" else (30 if tf_short == "1h" else 50)
-    for i in range(drag_count):
-        start_x, end_x = 100, size["width"] - 100
-        drag_script = f"""
-        var canvas = arguments[0];
-        var rect = canvas.getBoundingClientRect();
-
-        var down = new MouseEvent('mousedown', {{
-            clientX: rect.left + {start_x}, clientY: rect.top + {center_y},
-            button: 0, buttons: 1, bubbles: true
-        }});
-        canvas.dispatchEvent(down);
-
-        var steps = 10;
-        var stepX = ({end_x} - {start_x}) / steps;
-        for (var s = 1; s <= steps; s++) {{
-            var move = new MouseEvent('mousemove', {{
-                clientX: rect.left + {start_x} + stepX*s,
-                clientY: rect.top + {center_y},
-                button: 0, buttons: 1, bubbles: true
-            }});
-            canvas.dispatchEvent(move);
-        }}
-
-        var up = new MouseEvent('mouseup', {{
-            clientX: rect.left + {end_x}, clientY: rect.top + {center_y},
-            button: 0, buttons: 0, bubbles: true
-        }});
-        canvas.dispatchEvent(up);
-        """
-        driver.execute_script(drag_script, canvas)
-        time.sleep(0.7)
+
+def parse_target_date(value: str) -> int | None:
+    if not value:
+        return None
+    try:
+        return calendar.timegm(time.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        print(f"[WARN] TV_LAZY_TARGET_DATE 형식 오류(YYYY-MM-DD): {value}")
+        return None
 
 
+@traced("indicator.add")
 def add_indicator(driver: webdriver.Chrome, keyword: str) -> None:
     """지표 패널에서 keyword로 검색 후 첫 결과 추가 (안정화+재시도)"""
     for attempt in range(2):
@@ -241,24 +461,20 @@ def add_indicator(driver: webdriver.Chrome, keyword: str) -> None:
             "//div[@role='dialog']//input[@placeholder or @aria-label]",
             "//input[contains(@placeholder,'Search') or contains(@placeholder,'검색')]",
         ]
-        for xp in search_candidates:
+        el = find_first(driver, SELECTORS, "indicator.search_input", search_candidates, clickable=False)
+        if el is not None:
             try:
-                elems = WebDriverWait(driver, 4).until(EC.presence_of_all_elements_located((By.XPATH, xp)))
-                for el in elems:
-                    if el.is_displayed():
-                        el.clear()
-                        el.send_keys(keyword)
-                        time.sleep(1)
-                        typed = True
-                        break
-                if typed: break
+                el.clear()
+                el.send_keys(keyword)
+                settle(driver, "indicator.search_results", dom_quiet(0.3), timeout=3)
+                typed = True
             except Exception:
-                continue
+                pass
         if not typed:
             try:
                 body = driver.find_element(By.TAG_NAME, "body")
-                for ch in keyword: body.send_keys(ch); time.sleep(0.02)
-                time.sleep(1.0)
+                body.send_keys(keyword)
+                settle(driver, "indicator.search_results", dom_quiet(0.3), timeout=3)
                 typed = True
             except Exception:
                 pass
@@ -275,36 +491,22 @@ def add_indicator(driver: webdriver.Chrome, keyword: str) -> None:
             "(//div[@role='dialog']//div[@role='button' or @role='option']//span[normalize-space()])[1]",
             "(//div[@role='dialog']//div[@role='button' or @role='option'])[1]",
         ]
-        try:
-            el = WebDriverWait(driver, 3).until(EC.element_to_be_clickable((By.XPATH, exact_xp)))
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-            try: el.click()
-            except Exception: driver.execute_script("arguments[0].click();", el)
+        # 정확히 일치하는 결과 → 첫 번째 결과 순으로, 찾기+클릭을 페이지 안에서 한 번에 처리
+        if resolve(driver, [exact_xp], timeout=3, click=True).get("index", -1) >= 0:
             clicked = True
-        except Exception:
-            for xp in generic_xps:
-                try:
-                    el = WebDriverWait(driver, 3).until(EC.element_to_be_clickable((By.XPATH, xp)))
-                    driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                    try: el.click()
-                    except Exception: driver.execute_script("arguments[0].click();", el)
-                    clicked = True
-                    break
-                except Exception:
-                    continue
+        else:
+            clicked = find_first(driver, SELECTORS, "indicator.first_result", generic_xps, timeout=3, click=True) is not None
             if not clicked:
                 try:
                     driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ENTER)
-                    time.sleep(0.6)
+                    settle(driver, "indicator.enter_result", dom_quiet(), timeout=2)
                     clicked = True
                 except Exception:
                     pass
 
         # 닫고 포커스 복구
-        try:
-            close_btn = driver.find_element(By.XPATH, "//div[@role='dialog']//button[contains(@aria-label,'Close') or contains(.,'닫기')]")
-            driver.execute_script("arguments[0].click();", close_btn)
-        except Exception:
+        close_xp = "//div[@role='dialog']//button[contains(@aria-label,'Close') or contains(.,'닫기')]"
+        if resolve(driver, [close_xp], timeout=0.5, click=True).get("index", -1) < 0:
             try: driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
             except Exception: pass
         ensure_dialog_closed(driver, 3); focus_chart_canvas(driver)
@@ -318,157 +520,564 @@ def add_indicator(driver: webdriver.Chrome, keyword: str) -> None:
 
 
 
-def export_csv(driver: webdriver.Chrome) -> None:
-    """현재 차트에서 CSV 내보내기"""
+# 차트 범례에 표시된 지표(스터디) 이름 목록
+_LEGEND_TITLES_JS = """
+return Array.from(document.querySelectorAll('[data-name="legend-source-title"]'))
+    .map(function (e) { return (e.textContent || '').trim(); });
+"""
 
-    # 1) 내보내기 메뉴 열기 (Task2의 XPath 먼저 시도)
-    export_btn_candidates = [
-        "/html/body/div[2]/div/div[3]/div/div/div[3]/div[1]/div/div/div/div/div[14]/div/div/div/button",
-        # 대체: 'Export chart data' 툴팁/라벨 탐색
-        "//button[contains(@aria-label,'Export') or .//span[contains(.,'Export')]]",
-        "//button[.//span[contains(.,'데이터 내보내기') or contains(.,'내보내기')]]",
-    ]
-    opened = False
-    for xp in export_btn_candidates:
-        try:
-            WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp))).click()
-            time.sleep(0.8)
-            opened = True
-            break
-        except Exception:
-            continue
-    if not opened:
+
+def missing_indicators(driver: webdriver.Chrome, keywords: List[str]) -> List[str]:
+    """차트 범례에 아직 없는 지표 키워드 목록"""
+    try:
+        titles = WebDriverWait(driver, 3, poll_frequency=0.1).until(
+            lambda d: d.execute_script(_LEGEND_TITLES_JS) or False
+        )
+    except TimeoutException:
+        titles = []
+    upper = [t.upper() for t in titles]
+    missing = []
+    for kw in keywords:
+        alias = INDICATOR_LEGEND_NAMES.get(kw, kw).upper()
+        if not any(t == alias or t.startswith(alias + " ") for t in upper):
+            missing.append(kw)
+    return missing
+
+
+def ensure_indicators(driver: webdriver.Chrome) -> List[str]:
+    """설정된 지표가 차트에 없을 때만 추가하고 레이아웃을 저장 (이후 종목/주기 변경에도 유지)
+
+    추가한 뒤에도 범례에 없는 지표 키워드 목록을 반환 (빈 목록이면 모두 있음)
+    """
+    missing = missing_indicators(driver, INDICATORS)
+    if not missing:
+        return []
+    print(f"   Adding indicators: {', '.join(missing)}")
+    for kw in missing:
+        add_indicator(driver, kw)
+    settle(driver, "indicator.render", chart_ready(), timeout=8)
+    save_chart_layout(driver)
+    # 방금 추가한 것만 다시 확인
+    return missing_indicators(driver, missing)
+
+
+# 저장된 레이아웃의 주소: /chart/<레이아웃 id>/ (이름 없는 새 레이아웃은 /chart/ 뿐)
+_LAYOUT_ID_RE = re.compile(r"/chart/([A-Za-z0-9]+)/")
+# 이름 없는 레이아웃에서 Ctrl+S 시 뜨는 '새 차트 레이아웃 저장' 대화상자
+SAVE_LAYOUT_DIALOG_XPATHS = [
+    "//div[@role='dialog'][.//input and (contains(.,'Save new chart layout') or contains(.,'Save chart layout')"
+    " or contains(.,'차트 레이아웃 저장') or contains(.,'레이아웃 저장'))]",
+]
+
+
+def save_chart_layout(driver: webdriver.Chrome) -> bool:
+    """차트 레이아웃 저장(Ctrl+S) → 다음 go_chart 에서도 같은 지표가 로드됨
+
+    레이아웃 id가 없으면(저장된 적 없는 레이아웃) 이름 입력 대화상자가 떠서 다음 단계를 막으므로 저장하지 않고,
+    그래도 대화상자가 뜨면 닫고 사라질 때까지 확인합니다.
+    """
+    if not _LAYOUT_ID_RE.search(driver.current_url or ""):
+        print("[INFO] 저장된 차트 레이아웃이 아니라 레이아웃 저장을 건너뜁니다 (지표는 이번 세션에만 유지)")
+        return False
+    try:
+        ActionChains(driver).key_down(Keys.CONTROL).send_keys("s").key_up(Keys.CONTROL).perform()
+        settle(driver, "indicator.save_layout", dom_quiet(0.3), timeout=3)
+        if resolve(driver, SAVE_LAYOUT_DIALOG_XPATHS, timeout=0.5, absent=True).get("index", -1) < 0:
+            print("[WARN] 레이아웃 저장 대화상자가 열려 닫습니다 (레이아웃 저장 안 됨)")
+            ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+            if resolve(driver, SAVE_LAYOUT_DIALOG_XPATHS, timeout=2, absent=True).get("index", -1) < 0:
+                print("[WARN] 레이아웃 저장 대화상자가 닫히지 않았습니다")
+            focus_chart_canvas(driver)
+            return False
+        return True
+    except Exception as e:
+        print(f"[WARN] 차트 레이아웃 저장 실패: {e}")
+        return False
+
+
+def click_learned(driver: webdriver.Chrome, name: str, candidates: List[str], timeout: float = 4,
+                  quiet: float = 0.15, settle_timeout: float = 2.0) -> bool:
+    """선택자 캐시가 학습한 순서로 후보를 찾아 클릭하고 DOM이 잠잠해질 때까지 대기 (스크립트 1회, 못 찾으면 False)"""
+    with TRACER.span(name) as sp:
+        el = find_first(driver, SELECTORS, name, candidates, timeout=timeout,
+                        click=True, quiet=quiet, settle_timeout=settle_timeout)
+        sp["ok"] = el is not None
+    return el is not None
+
+
+# 내보내기 단계별 후보 XPath (Task2의 XPath 먼저, 이후 대체 선택자 / asyncio 실행기와 공용)
+# 1) 내보내기 메뉴 버튼 ('Export chart data' 툴팁/라벨 탐색 포함)
+EXPORT_MENU_BUTTON_XPATHS = [
+    "/html/body/div[2]/div/div[3]/div/div/div[3]/div[1]/div/div/div/div/div[14]/div/div/div/button",
+    "//button[contains(@aria-label,'Export') or .//span[contains(.,'Export')]]",
+    "//button[.//span[contains(.,'데이터 내보내기') or contains(.,'내보내기')]]",
+]
+# 2) 'Export chart data' 메뉴 항목
+EXPORT_MENU_ITEM_XPATHS = [
+    "/html/body/div[6]/div[2]/span/div[1]/div/div/div[4]",
+    "//div[@role='menuitem' or @data-name='menu-item']//div[contains(.,'Export')]",
+    "//div[contains(.,'데이터 내보내기')]",
+]
+# 3) 옵션 패널의 'Bars' (OHLCV) 탭과 ISO time 체크
+EXPORT_BARS_TAB_XPATHS = [
+    "/html/body/div[6]/div[2]/div/div[1]/div/div[2]/div/div[3]/span/span[1]",
+    "//span[contains(.,'Bars') or contains(.,'바')]",
+]
+EXPORT_ISO_TIME_XPATHS = [
+    "//span[contains(text(), 'ISO time')]",
+    "//label[.//span[contains(.,'ISO')]]",
+]
+# 4) Export 확인 버튼
+EXPORT_CONFIRM_XPATHS = [
+    "/html/body/div[6]/div[2]/div/div[1]/div/div[3]/div/span/button",
+    "//button[.//span[contains(.,'Export')] or contains(.,'내보내기')]",
+]
+
+
+def export_csv(driver: webdriver.Chrome, download_dir: Path | None = None) -> None:
+    """현재 차트에서 CSV 내보내기 (download_dir 지정 시 확인 클릭 직전에 저장 폴더를 전환)"""
+    GOVERNOR.acquire("export")
+
+    # 1) 내보내기 메뉴 열기
+    if not click_learned(driver, "export.menu_button", EXPORT_MENU_BUTTON_XPATHS):
         raise RuntimeError("내보내기 버튼을 찾지 못했습니다. XPath를 확인하세요.")
 
-    # 2) 'Export chart data' 항목 클릭 (Task2 XPath + 대체)
-    item_candidates = [
-        "/html/body/div[6]/div[2]/span/div[1]/div/div/div[4]",
-        "//div[@role='menuitem' or @data-name='menu-item']//div[contains(.,'Export')]",
-        "//div[contains(.,'데이터 내보내기')]",
-    ]
-    clicked = False
-    for xp in item_candidates:
-        try:
-            WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp))).click()
-            time.sleep(0.8)
-            clicked = True
-            break
-        except Exception:
-            continue
-    if not clicked:
+    # 2) 'Export chart data' 항목 클릭
+    if not click_learned(driver, "export.menu_item", EXPORT_MENU_ITEM_XPATHS):
         raise RuntimeError("Export 메뉴 항목을 찾지 못했습니다. XPath를 확인하세요.")
 
     # 3) 옵션 패널에서 'Bars' (OHLCV) 선택 및 ISO time 선택
     try:
-        # 'Bars' 탭
-        bars_candidates = [
-            "/html/body/div[6]/div[2]/div/div[1]/div/div[2]/div/div[3]/span/span[1]",
-            "//span[contains(.,'Bars') or contains(.,'바')]",
-        ]
-        for xp in bars_candidates:
-            try:
-                WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp))).click()
-                time.sleep(0.5)
-                break
-            except Exception:
-                continue
+        click_learned(driver, "export.bars_tab", EXPORT_BARS_TAB_XPATHS, settle_timeout=1.5)
+        click_learned(driver, "export.iso_time", EXPORT_ISO_TIME_XPATHS, settle_timeout=1.5)
 
-        # ISO time 체크
-        iso_candidates = [
-            "//span[contains(text(), 'ISO time')]",
-            "//label[.//span[contains(.,'ISO')]]",
-        ]
-        for xp in iso_candidates:
-            try:
-                WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp))).click()
-                time.sleep(0.5)
-                break
-            except Exception:
-                continue
+        # 이번 작업 전용 폴더로 다운로드 경로 지정
+        if download_dir is not None:
+            set_download_dir(driver, download_dir)
 
         # Export 버튼
-        export_confirm_candidates = [
-            "/html/body/div[6]/div[2]/div/div[1]/div/div[3]/div/span/button",
-            "//button[.//span[contains(.,'Export')] or contains(.,'내보내기')]",
-        ]
-        for xp in export_confirm_candidates:
-            try:
-                WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp))).click()
-                time.sleep(0.5)
-                break
-            except Exception:
-                continue
+        if not click_learned(driver, "export.confirm", EXPORT_CONFIRM_XPATHS, settle_timeout=1.5):
+            # 다운로드를 60초 기다리지 않고 바로 이 단계만 다시 시도하도록 실패 처리
+            raise RuntimeError("Export 확인 버튼을 찾지 못했습니다.")
     except Exception as e:
         raise RuntimeError(f"Export 옵션 설정 실패: {e}")
 
 
-def wait_for_download(download_dir: Path, timeout: int = 60) -> Path:
-    """다운로드 완료까지 대기(.crdownload 소멸) 후 최신 파일 경로 반환"""
-    end = time.time() + timeout
-    last_size = -1
-    target: Path|None = None
-
-    while time.time() < end:
-        csvs = sorted(download_dir.glob("*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-        partials = list(download_dir.glob("*.crdownload"))
-        # 다운로드가 막 시작하면 .crdownload가 생기고, 끝나면 사라짐
-        if csvs and not partials:
-            newest = csvs[0]
-            # 파일 크기가 안정될 때까지 한 번 더 확인
-            size = newest.stat().st_size
-            if size == last_size:
-                target = newest
-                break
-            last_size = size
-        time.sleep(1)
-
-    if not target:
+@traced("export.wait_download")
+def wait_for_download(watcher: DownloadWatcher, timeout: int = 60) -> Path:
+    """내보내기 직전에 시작한 감시자로 이번 내보내기가 만든 CSV 경로 반환"""
+    try:
+        return watcher.wait(timeout)
+    except TimeoutError:
         raise TimeoutException("CSV 다운로드가 완료되지 않았습니다.")
-    return target
 
 
-def run_for_symbol(driver: webdriver.Chrome, symbol: str, out_root: Path) -> None:
-    print(f"\n===== SYMBOL: {symbol} =====")
-
-    # 각 시간프레임을 URL 파라미터로 직접 진입 → 지표 추가 → 데이터 다운로드
-    for tf_short, tf_label, url_interval, requires_lazy in TIMEFRAMES:
-        print(f"\n-- Timeframe: {tf_short} ({tf_label}) --")
-
-        # 1. 메뉴 클릭 대신 URL 파라미터로 안정적으로 진입
-        go_chart(driver, symbol, interval=url_interval)
-        time.sleep(2) # 차트 로딩 대기
-
-        # 2. 페이지 이동 후, 이 시점에서 지표를 다시 추가
-        print(f"   Adding indicators for {tf_short}...")
-        for kw in INDICATORS:
-            add_indicator(driver, kw)
-        # 잠시 대기하여 지표가 완전히 그려지도록 합니다.
-        time.sleep(3)
-
-        # 3. 일/시/10분 등 지연 로딩이 필요한 프레임에서 과거 데이터 끌어오기
-        if requires_lazy:
-            lazy_load_short_tf(driver, tf_short, tf_label)
-
-        # 4. CSV 내보내기
-        export_csv(driver)
-
-        # 5. 저장 경로 구성 및 파일 이동/이름 변경
+def reset_ui(driver: webdriver.Chrome) -> None:
+    """재시도 전에 열려 있는 메뉴/대화상자를 닫아 단계 시작 상태로 되돌림"""
+    try:
+        ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+    except Exception:
+        pass
+    ensure_dialog_closed(driver, timeout=2)
+
+
+def store_derived(symbol: str, since: int | None, label: str) -> None:
+    """일봉 저장 직후 W/M/12M 데이터셋을 일봉에서 다시 계산 (since 이후 기간만)"""
+    with TRACER.span("store.resample"):
+        added = run_step("store", lambda: derive_from_daily(DB_ROOT, symbol, since=since,
+                                                            utc_offset=SESSION_UTC_OFFSET), label=label)
+    print(f"[OK] Resampled from {DAILY_TF}: " + ", ".join(f"{tf} +{n}" for tf, n in added.items()))
+    if INDICATOR_SOURCE == "local":
+        for tf in added:
+            store_indicators(symbol, tf, label)
+
+
+def store_indicators(symbol: str, tf_short: str, label: str) -> None:
+    """저장된 봉으로 지표 열 계산 (지난 상태 이후 새 봉만)"""
+    with TRACER.span("store.indicators"):
+        rows = run_step("store", lambda: update_indicators(DB_ROOT, symbol, tf_short, INDICATORS), label=label)
+    print(f"[OK] Indicators({tf_short}): {rows} bars updated")
+
+
+def run_job(driver: webdriver.Chrome, symbol: str, timeframe: Tuple[str, str, str, bool],
+            out_root: Path, download_dir: Path | None = None) -> Path:
+    """(종목, 시간프레임) 1개 작업 수행 후 저장 위치(원본 CSV 또는 데이터셋 폴더) 반환
+
+    각 단계(navigate/indicators/lazy_load/export/download/store)는 자기 예산 안에서
+    그 단계만 다시 시도하므로, 뒤 단계가 흔들려도 앞에서 불러온 차트/과거 데이터는 유지됩니다.
+    """
+    tf_short, tf_label, url_interval, requires_lazy = timeframe
+    download_dir = download_dir or out_root
+    label = f"{symbol} {tf_short}"
+    job_id = make_job_id(symbol, tf_short)
+    print(f"\n-- {symbol} Timeframe: {tf_short} ({tf_label}) --")
+
+    # feed 모드: 이전 작업 프레임을 비우고 이번 차트 이동부터 WebSocket 프레임 수집
+    capture = None
+    if COLLECT_MODE == "feed":
+        record = Path(FEED_RECORD_DIR) / f"{job_id}.jsonl" if FEED_RECORD_DIR else None
+        capture = FeedCapture(driver, record_path=record)
+        capture.drain()
+
+    # 1. 메뉴 클릭 대신 URL 파라미터로 안정적으로 진입 (재시도 시에는 페이지 전체 새로고침)
+    nav = {"fast": True}
+
+    def _navigate() -> None:
+        try:
+            go_chart(driver, symbol, interval=url_interval, fast=nav["fast"])
+        except Exception:
+            check_throttle(driver, "chart")  # 429 페이지 등으로 차트가 안 뜬 경우 제한으로 보고
+            raise
+        settle(driver, "chart.load", chart_ready(), timeout=10) # 차트 로딩 대기
+        check_throttle(driver, "chart")
+        if not chart_loaded(driver):
+            raise RuntimeError("차트 캔버스를 찾지 못했습니다.")
+
+    run_step("navigate", _navigate, recover=lambda _: nav.update(fast=False), label=label)
+
+    # 2. 페이지 이동 후, 이 시점에서 지표를 다시 추가 (재시도 시에는 빠진 지표만 추가)
+    ind = {"first": True}
+
+    def _indicators() -> None:
+        if INDICATOR_MODE == "every" and ind.pop("first", False):
+            print(f"   Adding indicators for {tf_short}...")
+            for kw in INDICATORS:
+                add_indicator(driver, kw)
+            # 지표가 완전히 그려질 때까지(캔버스 다시 그리기 종료) 대기합니다.
+            settle(driver, "indicator.render", chart_ready(), timeout=8)
+            missing = missing_indicators(driver, INDICATORS)
+        else:
+            missing = ensure_indicators(driver)
+        if missing:
+            raise RuntimeError(f"지표 추가 실패: {', '.join(missing)}")
+
+    # local 모드(feed 모드 포함)는 저장 후 직접 계산하므로 지표 추가 생략
+    if INDICATOR_SOURCE != "local":
+        run_step("indicators", _indicators, recover=lambda _: reset_ui(driver), label=label)
+
+    # 3. 일/시/10분 등 지연 로딩이 필요한 프레임에서 과거 데이터 끌어오기
+    #    (증분 수집: 지난번 마지막 저장 봉까지만 로드, 이미 화면에 있으면 생략)
+    #    재시도해도 이미 불러온 봉은 차트에 남아 있으므로 이어서 로드됨
+    mark = get_marks(DB_ROOT).get(symbol, tf_short) if INCREMENTAL else None
+    if requires_lazy:
+        state = read_history_state(driver) if mark else None
+        if mark and state and state["first"] <= mark["last_ts"]:
+            print(f"[INFO] 지연 로딩 생략({tf_short}): 화면의 봉이 이미 마지막 저장 봉까지 포함")
+        else:
+            run_step("lazy_load",
+                     lambda: lazy_load_short_tf(driver, tf_short, tf_label,
+                                                target_ts=mark["last_ts"] if mark else None),
+                     recover=lambda _: reset_ui(driver), label=label)
+
+    # 4-a. feed 모드: 차트가 받은 봉 메시지를 바로 데이터셋에 병합 (내보내기/다운로드 생략)
+    if capture is not None:
+        decoder = capture.collect()
+        if len(decoder):
+            added = run_step("store", lambda: ingest_bars(decoder.bars(), DB_ROOT, symbol, tf_short), label=label)
+            print(f"[OK] Stored(feed): +{added} bars ({len(decoder)} bars, {decoder.frames} frames) "
+                  f"→ {DB_ROOT / symbol / tf_short}")
+            if INDICATOR_SOURCE == "local":
+                store_indicators(symbol, tf_short, label)
+            if RESAMPLE_FROM_DAILY and tf_short == DAILY_TF:
+                store_derived(symbol, mark["last_ts"] if mark else None, label)
+            return DB_ROOT / symbol / tf_short
+        print(f"[WARN] {label}: 피드에서 봉 메시지를 찾지 못했습니다 → CSV 내보내기로 대체")
+
+    # 4. CSV 내보내기 - 작업 ID 전용 폴더로 받아서 다른 작업/잔여 파일과 섞이지 않게 함
+    #    메뉴 클릭이 어긋나면 내보내기만, 파일이 안 오면 내보내기를 다시 눌러 다운로드만 재시도
+    job_dir = job_download_dir(download_dir, job_id)
+
+    def _download() -> Path:
+        try:
+            latest = wait_for_download(watcher)
+        except TimeoutException:
+            check_throttle(driver, "export")  # 파일 대신 제한 배너가 떴는지 확인
+            raise
+        GOVERNOR.success("export")
+        return latest
+
+    def _re_export(_: int) -> None:
+        reset_ui(driver)
+        export_csv(driver, job_dir)
+
+    # 탭 풀에서는 다운로드 폴더가 브라우저 전체 설정이므로 내보내기~다운로드 완료를 탭 사이에 1개씩
+    with getattr(driver, "download_lock", None) or nullcontext(), DownloadWatcher(job_dir) as watcher:
+        run_step("export", lambda: export_csv(driver, job_dir), recover=lambda _: reset_ui(driver), label=label)
+        latest = run_step("download", _download, recover=_re_export, label=label)
+
+    dest = store_export(symbol, tf_short, latest, out_root, mark["last_ts"] if mark else None, label)
+    cleanup_job_dir(job_dir)
+    return dest
+
+
+def store_export(symbol: str, tf_short: str, latest: Path, out_root: Path, since: int | None, label: str) -> Path:
+    """내보낸 CSV를 데이터셋에 병합 (+ 로컬 지표/일봉 재집계) 후 원본 정리, 저장 위치 반환
+
+    asyncio 실행기에서는 다음 작업의 차트 이동과 겹치도록 작업 스레드에서 호출합니다.
+    """
+    # 5. 데이터셋에 병합 (봉 시각 기준 중복 제거 → 재시도해도 중복 저장 없음)
+    added = run_step("store", lambda: ingest_csv(latest, DB_ROOT, symbol, tf_short), label=label)
+    print(f"[OK] Stored: +{added} bars → {DB_ROOT / symbol / tf_short} ({latest.name})")
+    if INDICATOR_SOURCE == "local":
+        store_indicators(symbol, tf_short, label)
+    if RESAMPLE_FROM_DAILY and tf_short == DAILY_TF:
+        store_derived(symbol, since, label)
+
+    # 6. 원본 CSV는 설정 시에만 보관
+    if KEEP_RAW_CSV:
         tf_dir = out_root / symbol / tf_short
         ensure_dir(tf_dir)
-        latest = wait_for_download(out_root)
         ts = time.strftime("%Y%m%d_%H%M%S")
         dest = tf_dir / f"{symbol}_{tf_short}_{ts}.csv"
         latest.replace(dest)
         print(f"[OK] Saved: {dest}")
+    else:
+        dest = DB_ROOT / symbol / tf_short
+        latest.unlink()
+    return dest
+
+
+def run_tracked_job(driver: webdriver.Chrome, symbol: str, timeframe: Tuple[str, str, str, bool],
+                    out_root: Path, download_dir: Path | None = None,
+                    journal: JobJournal | None = None) -> str | None:
+    """run_job 실행 + 저널 기록, 실패해도 예외를 올리지 않고 오류 메시지 반환 (성공 시 None)"""
+    tf_short = timeframe[0]
+    start = time.time()
+    if journal:
+        journal.start(symbol, tf_short)
+    try:
+        with TRACER.job(symbol, tf_short):
+            dest = run_job(driver, symbol, timeframe, out_root, download_dir)
+    except Exception as e:
+        print(f"[ERROR] {symbol} {tf_short}: {e}")
+        if journal:
+            journal.fail(symbol, tf_short, str(e), time.time() - start)
+        return str(e)
+    if journal:
+        journal.finish(symbol, tf_short, dest, time.time() - start)
+    return None
+
+
+def run_for_symbol(driver: webdriver.Chrome, symbol: str, out_root: Path,
+                   journal: JobJournal | None = None) -> None:
+    print(f"\n===== SYMBOL: {symbol} =====")
+
+    # 각 시간프레임을 URL 파라미터로 직접 진입 → 지표 추가 → 데이터 다운로드
+    # (저널에 완료로 기록된 작업은 건너뛰고, 한 작업의 실패가 나머지 작업을 막지 않음)
+    for timeframe in BROWSER_TIMEFRAMES:
+        if journal and journal.state(symbol, timeframe[0]) == STATE_DONE:
+            continue
+        run_tracked_job(driver, symbol, timeframe, out_root, journal=journal)
+
+
+# -----------------------------
+# 병렬 워커 풀 (--workers N)
+# -----------------------------
+def clone_profile(worker_id: int) -> Path:
+    """워커 전용 크롬 프로필 복사본 생성 (같은 user-data-dir은 동시에 열 수 없음)"""
+    dest = WORKER_ROOT / f"w{worker_id}" / "profile"
+    if dest.exists():
+        shutil.rmtree(dest, ignore_errors=True)
+    if USER_PROFILE_DIR.exists():
+        shutil.copytree(
+            USER_PROFILE_DIR, dest,
+            ignore=shutil.ignore_patterns("Singleton*", "lockfile", "*.lock"),
+            dirs_exist_ok=True,
+        )
+    ensure_dir(dest)
+    return dest
+
+
+def session_alive(driver: webdriver.Chrome) -> bool:
+    """드라이버 세션이 살아 있는지 (브라우저가 죽었거나 세션이 끊기면 False)"""
+    try:
+        driver.title
+        return True
+    except (InvalidSessionIdException, WebDriverException):
+        return False
+
+
+def quit_driver(driver: webdriver.Chrome) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def worker_loop(worker_id: int, jobs: "queue.Queue[Tuple[str, Tuple[str, str, str, bool]]]",
+                out_root: Path, failures: List[Tuple[str, str, str]],
+                journal: JobJournal | None = None) -> None:
+    """독립 드라이버 1개로 공유 큐의 (symbol, timeframe) 작업을 하나씩 처리
+
+    - 드라이버 시작(프로필 복사/쿠키 로드)이 실패하면 받은 작업을 실패로 기록하고 워커 종료 (남은 작업은 다른 워커가 처리)
+    - 작업 실패 후 세션이 죽어 있으면 드라이버를 다시 띄워 다음 작업 진행
+    """
+    download_dir = WORKER_ROOT / f"w{worker_id}" / "downloads"
+    driver = None
+    try:
+        while True:
+            try:
+                symbol, timeframe = jobs.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if driver is None:
+                    try:
+                        driver = setup_driver(download_dir, profile_dir=clone_profile(worker_id))
+                        load_cookies(driver)
+                    except Exception as e:
+                        error = f"드라이버 시작 실패: {e}"
+                        print(f"[ERROR] 워커 w{worker_id} {error}")
+                        failures.append((symbol, timeframe[0], error))
+                        if journal:
+                            journal.fail(symbol, timeframe[0], error, 0.0)
+                        return
+                error = run_tracked_job(driver, symbol, timeframe, out_root, download_dir, journal)
+                if error:
+                    failures.append((symbol, timeframe[0], error))
+                    if not session_alive(driver):
+                        print(f"[WARN] 워커 w{worker_id} 세션 끊김 → 다음 작업에서 드라이버를 다시 띄웁니다.")
+                        quit_driver(driver)
+                        driver = None
+            finally:
+                jobs.task_done()
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+        print(f"[INFO] 워커 w{worker_id} 종료")
+
+
+def run_parallel(tickers: List[str], workers: int, out_root: Path,
+                 journal: JobJournal | None = None) -> List[Tuple[str, str, str]]:
+    """종목 × 시간프레임 행렬을 작업 큐로 만들어 N개의 크롬 인스턴스에 분배"""
+    jobs: "queue.Queue[Tuple[str, Tuple[str, str, str, bool]]]" = queue.Queue()
+    plan = [(sym, timeframe) for sym in tickers for timeframe in BROWSER_TIMEFRAMES]
+    for job in (journal.pending(plan) if journal else plan):
+        jobs.put(job)
+    print(f"[INFO] 작업 {jobs.qsize()}개를 워커 {workers}개로 분배합니다.")
+
+    failures: List[Tuple[str, str, str]] = []
+    threads = [
+        threading.Thread(target=worker_loop, args=(i, jobs, out_root, failures, journal), name=f"tv-worker-{i}")
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 모든 워커가 시작에 실패해 큐에 남은 작업도 실패로 기록
+    while not jobs.empty():
+        symbol, timeframe = jobs.get_nowait()
+        failures.append((symbol, timeframe[0], "처리할 워커 없음 (드라이버 시작 실패)"))
+    return failures
+
+
+def tab_worker_loop(tab: webdriver.Chrome, jobs: "queue.Queue[Tuple[str, Tuple[str, str, str, bool]]]",
+                    out_root: Path, failures: List[Tuple[str, str, str]],
+                    journal: JobJournal | None = None) -> None:
+    """탭 1개로 공유 큐의 작업을 처리 (드라이버 명령은 탭 풀 잠금으로 다른 탭과 번갈아 실행)"""
+    download_dir = WORKER_ROOT / f"t{tab.tab_index}" / "downloads"
+    while True:
+        try:
+            symbol, timeframe = jobs.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            error = run_tracked_job(tab, symbol, timeframe, out_root, download_dir, journal)
+            if error:
+                failures.append((symbol, timeframe[0], error))
+        finally:
+            jobs.task_done()
+    print(f"[INFO] 탭 t{tab.tab_index} 종료")
+
+
+def run_tab_pool(tickers: List[str], tabs: int, out_root: Path,
+                 journal: JobJournal | None = None) -> List[Tuple[str, str, str]]:
+    """로그인된 크롬 1개에 차트 창 N개를 열고, 작업 큐를 탭별 스레드로 나눠 처리"""
+    jobs: "queue.Queue[Tuple[str, Tuple[str, str, str, bool]]]" = queue.Queue()
+    plan = [(sym, timeframe) for sym in tickers for timeframe in BROWSER_TIMEFRAMES]
+    for job in (journal.pending(plan) if journal else plan):
+        jobs.put(job)
+
+    driver = setup_driver(DOWNLOAD_ROOT, tabs=tabs)
+    failures: List[Tuple[str, str, str]] = []
+    try:
+        load_cookies(driver)
+        pool = TabPool(driver, tabs, block_patterns=load_block_list(BLOCK_LIST_FILE) if LEAN_BROWSER else None)
+        print(f"[INFO] 작업 {jobs.qsize()}개를 탭 {tabs}개로 분배합니다.")
+        threads = [
+            threading.Thread(target=tab_worker_loop, args=(tab, jobs, out_root, failures, journal),
+                             name=f"tv-tab-{tab.tab_index}")
+            for tab in pool.tabs
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        save_cookies(driver)
+        driver.quit()
+    return failures
+
+
+def ensure_login() -> None:
+    """워커 프로필 복사 전, 원본 프로필/쿠키에 로그인 상태를 만들어 둠"""
+    if Path(COOKIES_FILE).exists():
+        return
+    driver = setup_driver(DOWNLOAD_ROOT, lean=False)
+    try:
+        driver.get(f"{TV_BASE_URL}/")
+        manual_login(driver)
+    finally:
+        driver.quit()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TradingView 크롤링 매크로 (Task 3)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="동시에 띄울 크롬 인스턴스 수 (기본 1 = 단일 드라이버 순차 실행)")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="크롬 1개 안에서 동시에 처리할 차트 창 수 (--workers 대신 메모리를 아끼는 병렬 실행)")
+    parser.add_argument("--resume", action="store_true",
+                        help="가장 최근 실행 저널을 이어서 완료된 작업은 건너뛰고 실패/중단된 작업만 다시 실행")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     tickers = read_tickers()
     if not tickers:
         print("[ERROR] 종목 리스트가 비었습니다.")
         return
 
     ensure_dir(DOWNLOAD_ROOT)
+    journal = JobJournal.open_run(DB_ROOT / "_state", resume=args.resume)
+    trace = open_trace(DB_ROOT / "_state")
+    if args.tabs > 1 and COLLECT_MODE == "feed":
+        # 성능 로그(WebSocket 프레임)는 브라우저 전체에서 섞이므로 탭 풀 대신 크롬 인스턴스로 병렬 실행
+        print("[WARN] feed 수집은 탭 풀을 지원하지 않아 --workers 방식으로 실행합니다.")
+        args.workers, args.tabs = max(args.workers, args.tabs), 1
+    if args.workers > 1 or args.tabs > 1:
+        ensure_login()
+        try:
+            if args.tabs > 1:
+                failures = run_tab_pool(tickers, args.tabs, DOWNLOAD_ROOT, journal)
+            else:
+                failures = run_parallel(tickers, args.workers, DOWNLOAD_ROOT, journal)
+        finally:
+            journal.close()
+        for sym, tf, err in failures:
+            print(f"[FAIL] {sym} {tf}: {err}")
+        trace.close()
+        LATENCY.print_summary()
+        GOVERNOR.print_summary()
+        print(f"[INFO] 단계별 시간 기록: {trace.path} (요약: python tradingview_trace.py summary {trace.path})")
+        print(f"\n[ALL DONE] 모든 심볼 처리 완료. (실패 {len(failures)}건, 저널: {journal.path})")
+        return
+
+    # 경량(헤드리스) 실행이면 로그인 창을 띄울 수 없으므로 먼저 화면 있는 크롬으로 로그인
+    if LEAN_BROWSER and HEADLESS:
+        ensure_login()
     driver = setup_driver(DOWNLOAD_ROOT)
 
     try:
@@ -480,25 +1089,27 @@ def main():
         go_chart(driver, "GOOG")
 
         for sym in tickers:
-            run_for_symbol(driver, sym, DOWNLOAD_ROOT)
+            run_for_symbol(driver, sym, DOWNLOAD_ROOT, journal)
 
-        print("\n[ALL DONE] 모든 심볼 처리 완료.")
+        st = journal.summary()
+        print(f"\n[ALL DONE] 모든 심볼 처리 완료. (완료 {st['done']} / 실패 {st['failed']}, 저널: {journal.path})")
     except Exception as e:
         print(f"[ERROR] {e}")
     finally:
+        journal.close()
         save_cookies(driver)
         driver.quit()
+        trace.close()
+        LATENCY.print_summary()
+        GOVERNOR.print_summary()
+        print(f"[INFO] 단계별 시간 기록: {trace.path} (요약: python tradingview_trace.py summary {trace.path})")
 
 def ensure_dialog_closed(driver, timeout=4):
-    import time
-    end = time.time() + timeout
-    while time.time() < end:
-        try:
-            driver.find_element(By.XPATH, "//div[@role='dialog']")
-            time.sleep(0.1)
-        except Exception:
-            return True
-    return False
+    # 페이지 안에서 대화상자가 사라질 때까지 대기 (100ms 폴링 왕복 없이 스크립트 1회)
+    try:
+        return resolve(driver, ["//div[@role='dialog']"], timeout=timeout, absent=True).get("index", -1) >= 0
+    except Exception:
+        return False
 
 def focus_chart_canvas(driver):
     try:
@@ -506,7 +1117,8 @@ def focus_chart_canvas(driver):
             EC.presence_of_element_located((By.CSS_SELECTOR, 'canvas[data-name="pane-top-canvas"]'))
         )
         ActionChains(driver).move_to_element_with_offset(canvas, 5, 5).click().perform()
-        time.sleep(0.2)
+        # 포커스가 차트로 넘어오거나, 클릭으로 닫히는 팝업이 정리될 때까지
+        settle(driver, "chart.focus", any_of(chart_focused(), dom_quiet(0.2)), timeout=2)
         return True
     except Exception:
         return False
@@ -521,28 +1133,18 @@ def open_indicators_dialog(driver, retries=2):
             "//button[.//span[normalize-space()='Indicators' or contains(.,'지표') or contains(.,'전략')]]",
             "(//div[contains(@class,'toolbar') or contains(@id,'header')]//button[.//span[contains(.,'Indicators') or contains(.,'지표')]])[1]",
         ]
-        for xp in candidates:
-            try:
-                el = WebDriverWait(driver, 4).until(EC.element_to_be_clickable((By.XPATH, xp)))
-                try: el.click()
-                except Exception: driver.execute_script("arguments[0].click();", el)
-                WebDriverWait(driver, 4).until(EC.presence_of_element_located((By.XPATH, "//div[@role='dialog']")))
-                try:
-                    tech_tab = WebDriverWait(driver, 2).until(
-                        EC.element_to_be_clickable((By.XPATH, "//div[@role='dialog']//div[.//span[contains(.,'Technicals') or contains(.,'기술적')]]"))
-                    )
-                    driver.execute_script("arguments[0].click();", tech_tab)
-                except Exception:
-                    pass
+        if find_first(driver, SELECTORS, "indicator.dialog_button", candidates, click=True) is not None:
+            if resolve(driver, ["//div[@role='dialog']"], timeout=4, clickable=False).get("index", -1) >= 0:
+                # 'Technicals' 탭은 있으면 클릭 (없어도 검색은 가능)
+                resolve(driver, ["//div[@role='dialog']//div[.//span[contains(.,'Technicals') or contains(.,'기술적')]]"],
+                        timeout=2, click=True)
                 return True
-            except Exception:
-                continue
         try:
             driver.find_element(By.TAG_NAME, "body").send_keys("/")
             WebDriverWait(driver, 4).until(EC.presence_of_element_located((By.XPATH, "//div[@role='dialog']")))
             return True
         except Exception:
-            time.sleep(0.5)
+            settle(driver, "indicator.dialog_retry", dom_quiet(0.3), timeout=2)
     return False
 
 
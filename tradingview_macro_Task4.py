@@ -0,0 +1,333 @@
+# tradingview_macro_Task4.py
+# -*- coding: utf-8 -*-
+"""
+Task 4: TradingView 자동 수집 데몬
+- Task 3의 (종목 × 시간프레임) 수집을 매일 정해진 시각(기본 오전 9시)에 자동 실행
+- 동작 요약:
+  1) 시작 시 한 번만 로그인 확인 후, 크롬 드라이버 풀(--workers N)을 띄워 둔 채로 유지(warm pool)
+  2) cron 형식 일정(TV_SCHEDULE, 기본 "0 9 * * *")에 맞춰 잠들었다가 깨어남
+  3) 마감 시각(TV_DEADLINE_MINUTES)까지 작업을 나눠 처리, 오래 걸리는 작업(10분봉 등)부터 배정
+  4) 작업 하나가 실패하거나 드라이버가 죽어도 해당 드라이버만 다시 띄우고 다음 작업 계속
+  5) 작업별 소요 시간을 기록해 다음 실행의 작업 순서/시작 판단에 사용
+
+실행 예
+- python tradingview_macro_Task4.py --workers 3          # 데몬 (매일 09:00)
+- python tradingview_macro_Task4.py --workers 3 --once   # 지금 바로 1회 실행 후 종료
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple, Set
+
+from selenium import webdriver
+
+import tradingview_macro_Task3 as task3
+from tradingview_wait import LATENCY
+from tradingview_journal import JobJournal
+from tradingview_trace import open_trace
+
+
+# -----------------------------
+# 전역 설정
+# -----------------------------
+# cron 형식 "분 시 일 월 요일" (요일: 0=일요일 … 6=토요일)
+SCHEDULE = os.environ.get("TV_SCHEDULE", "0 9 * * *")
+# 예약 시각으로부터 이 시간(분) 안에 끝내야 함 - 넘으면 남은 작업은 다음 실행으로 미룸
+DEADLINE_MINUTES = int(os.environ.get("TV_DEADLINE_MINUTES", "240"))
+# 작업별 최근 소요 시간 기록 (작업 순서 결정용)
+DURATIONS_FILE = task3.DB_ROOT / "_state" / "job_durations.json"
+# 소요 시간 기록이 없을 때 쓰는 시간프레임별 추정치(초)
+DEFAULT_JOB_SECONDS = {"12M": 20, "M": 20, "W": 25, "D": 45, "1h": 90, "10m": 180}
+
+Job = Tuple[str, Tuple[str, str, str, bool]]
+
+
+# -----------------------------
+# cron 일정
+# -----------------------------
+class CronSchedule:
+    """5필드 cron 식("분 시 일 월 요일")의 다음 실행 시각 계산 (*, a-b, a,b, */n 지원)"""
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 식은 5개 필드여야 합니다: {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(f, lo, hi) for f, (lo, hi) in zip(fields, self._RANGES)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            rng, _, step = part.partition("/")
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start, end = (int(x) for x in rng.split("-"))
+            else:
+                start = end = int(rng)
+            values.update(range(start, end + 1, int(step or 1)))
+        if not values or min(values) < lo or max(values) > hi:
+            raise ValueError(f"cron 필드 범위 오류: {field!r} ({lo}-{hi})")
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        # cron 규칙: 일/요일 둘 다 지정되면 둘 중 하나만 맞아도 실행
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, dt: datetime) -> datetime:
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 4)
+        while t < limit:
+            if t.month not in self.months or not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+                continue
+            if t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"실행 시각을 찾을 수 없습니다: {self.expr!r}")
+
+
+# -----------------------------
+# 작업 소요 시간 기록
+# -----------------------------
+class JobDurations:
+    """(종목|시간프레임) → 최근 소요 시간(초) (지수 이동 평균)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, float] = {}
+        if path.exists():
+            try:
+                self._data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._data = {}
+
+    def estimate(self, symbol: str, tf_short: str) -> float:
+        return self._data.get(f"{symbol}|{tf_short}", DEFAULT_JOB_SECONDS.get(tf_short, 60))
+
+    def record(self, symbol: str, tf_short: str, seconds: float) -> None:
+        key = f"{symbol}|{tf_short}"
+        with self._lock:
+            prev = self._data.get(key)
+            self._data[key] = seconds if prev is None else 0.7 * prev + 0.3 * seconds
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# -----------------------------
+# 드라이버 풀 (실행 사이에도 유지)
+# -----------------------------
+class DriverPool:
+    """워커별 크롬 드라이버를 띄워 두고 재사용, 죽은 드라이버는 다시 띄움"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.drivers: List[webdriver.Chrome | None] = [None] * size
+
+    def download_dir(self, worker_id: int) -> Path:
+        return task3.WORKER_ROOT / f"w{worker_id}" / "downloads"
+
+    def _launch(self, worker_id: int) -> webdriver.Chrome:
+        driver = task3.setup_driver(self.download_dir(worker_id), profile_dir=task3.clone_profile(worker_id))
+        try:
+            task3.load_cookies(driver)
+            task3.go_chart(driver, "GOOG", fast=False)
+        except Exception:
+            # 반쯤 뜬 크롬이 남지 않도록 정리 후 실패 전달
+            task3.quit_driver(driver)
+            raise
+        print(f"[INFO] 드라이버 준비 완료: w{worker_id}")
+        return driver
+
+    def get(self, worker_id: int) -> webdriver.Chrome:
+        driver = self.drivers[worker_id]
+        if driver is not None:
+            try:
+                driver.current_url  # 세션 살아있는지 확인
+                return driver
+            except Exception:
+                print(f"[WARN] 드라이버 w{worker_id} 응답 없음 → 다시 띄웁니다.")
+                self.discard(worker_id)
+        self.drivers[worker_id] = self._launch(worker_id)
+        return self.drivers[worker_id]
+
+    def discard(self, worker_id: int) -> None:
+        driver, self.drivers[worker_id] = self.drivers[worker_id], None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def warm_up(self) -> None:
+        """모든 워커 드라이버를 미리 띄움, 실패한 슬롯은 비워 두고 첫 작업에서 get()이 다시 띄움"""
+        for i in range(self.size):
+            try:
+                self.get(i)
+            except Exception as e:
+                print(f"[WARN] 드라이버 w{i} 미리 띄우기 실패 → 첫 작업에서 다시 시도: {e}")
+
+    def close(self) -> None:
+        for i in range(self.size):
+            self.discard(i)
+
+
+# -----------------------------
+# 1회 실행 (마감 시각까지)
+# -----------------------------
+def build_plan(tickers: List[str], durations: JobDurations) -> List[Job]:
+    """오래 걸리는 작업부터 배정해(LPT) 워커들이 비슷한 시각에 끝나도록 정렬"""
+    jobs = [(sym, tf) for sym in tickers for tf in task3.BROWSER_TIMEFRAMES]
+    jobs.sort(key=lambda job: durations.estimate(job[0], job[1][0]), reverse=True)
+    return jobs
+
+
+def run_plan(pool: DriverPool, tickers: List[str], deadline: datetime, durations: JobDurations,
+             resume: bool = False) -> Dict[str, int]:
+    """작업 계획을 풀의 드라이버들로 처리, 마감 전에 못 끝낼 작업은 건너뜀"""
+    journal = JobJournal.open_run(task3.DB_ROOT / "_state", resume=resume)
+    trace = open_trace(task3.DB_ROOT / "_state")
+    jobs: "queue.Queue[Job]" = queue.Queue()
+    for job in journal.pending(build_plan(tickers, durations)):
+        jobs.put(job)
+    total = jobs.qsize()
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    lock = threading.Lock()
+    deadline_ts = deadline.timestamp()
+
+    def _worker(worker_id: int) -> None:
+        while True:
+            try:
+                symbol, timeframe = jobs.get_nowait()
+            except queue.Empty:
+                return
+            tf_short = timeframe[0]
+            if time.time() + durations.estimate(symbol, tf_short) > deadline_ts:
+                with lock:
+                    counts["skipped"] += 1
+                # 저널에 남겨 다음 실행(--resume)에서 미완료 작업으로 다시 잡히게 함
+                journal.skip(symbol, tf_short, "deadline")
+                print(f"[WARN] 마감 전에 끝낼 수 없어 건너뜀: {symbol} {tf_short}")
+                continue
+            start = time.time()
+            driver = None
+            try:
+                driver = pool.get(worker_id)
+            except Exception as e:
+                error = f"드라이버 시작 실패: {e}"
+            else:
+                error = task3.run_tracked_job(driver, symbol, timeframe, task3.DOWNLOAD_ROOT,
+                                              pool.download_dir(worker_id), journal)
+            if error:
+                with lock:
+                    counts["failed"] += 1
+                # 세션이 죽었을 때만 드라이버 교체 (XPath 누락/다운로드 시간 초과 등은 같은 드라이버로 다음 작업 진행)
+                if driver is None or not task3.session_alive(driver):
+                    print(f"[WARN] 워커 {worker_id} 드라이버 세션 종료 → 다음 작업에서 새로 시작")
+                    pool.discard(worker_id)
+            else:
+                durations.record(symbol, tf_short, time.time() - start)
+                with lock:
+                    counts["done"] += 1
+
+    print(f"[INFO] 작업 {total}개 시작, 마감 {deadline:%Y-%m-%d %H:%M}")
+    threads = [threading.Thread(target=_worker, args=(i,), name=f"tv-daemon-{i}") for i in range(pool.size)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    journal.close()
+    trace.close()
+    durations.save()
+    print(f"[INFO] 실행 결과: 완료 {counts['done']} / 실패 {counts['failed']} / 건너뜀 {counts['skipped']} "
+          f"(전체 {total}, 저널: {journal.path})")
+    LATENCY.print_summary()
+    task3.GOVERNOR.print_summary()
+    print(f"[INFO] 단계별 시간 기록: {trace.path}")
+    return counts
+
+
+def sleep_until(when: datetime) -> None:
+    """when 까지 대기 (시스템 절전/시계 변경에 대비해 최대 60초씩 나눠서 잠)"""
+    while True:
+        remaining = (when - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 60))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TradingView 자동 수집 데몬 (Task 4)")
+    parser.add_argument("--workers", type=int, default=1, help="유지할 크롬 드라이버 수")
+    parser.add_argument("--schedule", default=SCHEDULE, help='cron 식 "분 시 일 월 요일" (기본: 매일 09:00)')
+    parser.add_argument("--deadline-minutes", type=int, default=DEADLINE_MINUTES,
+                        help="예약 시각부터 이 시간 안에 끝내지 못한 작업은 건너뜀")
+    parser.add_argument("--once", action="store_true", help="지금 바로 1회 실행 후 종료")
+    parser.add_argument("--resume", action="store_true",
+                        help="--once와 함께: 가장 최근 저널을 이어서 미완료 작업만 실행")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    schedule = CronSchedule(args.schedule)
+    tickers = task3.read_tickers()
+    if not tickers:
+        print("[ERROR] 종목 리스트가 비었습니다.")
+        return
+
+    task3.ensure_dir(task3.DOWNLOAD_ROOT)
+    # 로그인은 최초 1회만 (이후에는 프로필/쿠키 재사용)
+    task3.ensure_login()
+    durations = JobDurations(DURATIONS_FILE)
+    pool = DriverPool(max(1, args.workers))
+
+    try:
+        pool.warm_up()
+        if args.once:
+            run_plan(pool, tickers, datetime.now() + timedelta(minutes=args.deadline_minutes), durations,
+                     resume=args.resume)
+            return
+
+        while True:
+            nxt = schedule.next_after(datetime.now())
+            print(f"[INFO] 다음 실행: {nxt:%Y-%m-%d %H:%M} ({args.schedule})")
+            sleep_until(nxt)
+            try:
+                run_plan(pool, tickers, nxt + timedelta(minutes=args.deadline_minutes), durations)
+            except Exception as e:
+                # 한 번의 실행 실패로 데몬이 멈추지 않도록 기록만 하고 다음 일정 대기
+                print(f"[ERROR] 실행 중 오류: {e}")
+    except KeyboardInterrupt:
+        print("\n[INFO] 사용자 중지")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
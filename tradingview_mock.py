@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 TradingView 모의 차트 페이지 (벤치마크 / 오프라인 점검용)
+
+- Task3 스크립트가 실제로 건드리는 부분만 흉내 냅니다.
+  - /chart/?symbol=…&interval=… : 지연 후 나타나는 차트 캔버스(pane-top-canvas)
+  - window.TradingViewApi        : activeChart().setSymbol / setResolution / symbol / resolution,
+                                   메인 시리즈 bars().size() / first() (지연 로딩 진행 상태)
+  - 지표 대화상자                 : 지표 버튼 → 검색 입력 → 결과 클릭 → 범례(legend-source-title)에 추가
+  - 내보내기                      : 내보내기 버튼 → 메뉴 항목 → Bars / ISO time / Export 확인 → CSV 다운로드
+  - 지연 로딩                     : 캔버스를 드래그할 때마다 history_ms 후 과거 봉 chunk개 추가 (주기별 최대치까지)
+    → 다운로드되는 CSV 크기도 로딩한 만큼 커짐
+- 각 동작의 지연 시간은 MockLatency 로 조절 (scale 로 한꺼번에 늘리거나 줄일 수 있음)
+- MockThrottle 을 주면 요청 제한도 흉내 냅니다 (tradingview_ratelimit 확인용).
+  차트 로딩/내보내기가 분당 한도를 넘으면 penalty초 동안 모든 요청(페이지, 차트 데이터, 과거 봉, 내보내기)을 거부하고,
+  페이지는 mode에 따라 HTTP 429 / "Too many requests" 배너 / 빈 차트로 알립니다.
+
+실행 예
+- python tradingview_mock.py --port 8700 --scale 1.0   # 브라우저로 http://127.0.0.1:8700/chart/?symbol=GOOG 열기
+- python tradingview_mock.py --throttle 20 --throttle-mode banner
+"""
+from __future__ import annotations
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict
+from urllib.parse import urlparse, parse_qs
+
+
+class MockLatency:
+    """모의 페이지 동작별 지연(ms)과 지연 로딩 설정"""
+
+    def __init__(self, chart_ms: int = 800, switch_ms: int = 300, dialog_ms: int = 150, search_ms: int = 120,
+                 history_ms: int = 250, export_ms: int = 400, chunk: int = 300, scale: float = 1.0):
+        self.chart_ms = chart_ms
+        self.switch_ms = switch_ms
+        self.dialog_ms = dialog_ms
+        self.search_ms = search_ms
+        self.history_ms = history_ms
+        self.export_ms = export_ms
+        self.chunk = chunk
+        self.scale = scale
+
+    def to_page(self) -> Dict:
+        s = self.scale
+        return {
+            "chartMs": int(self.chart_ms * s),
+            "switchMs": int(self.switch_ms * s),
+            "dialogMs": int(self.dialog_ms * s),
+            "searchMs": int(self.search_ms * s),
+            "historyMs": int(self.history_ms * s),
+            "exportMs": int(self.export_ms * s),
+            "chunk": self.chunk,
+        }
+
+
+class MockThrottle:
+    """모의 요청 제한: 종류(chart/export)별 최근 window초 요청이 per_min회를 넘으면 penalty초 동안 전부 거부
+
+    mode: status = HTTP 429 응답, banner = 200 + 페이지에 "Too many requests" 배너, empty = 200 + 빈 데이터만
+    """
+
+    MODES = ("status", "banner", "empty")
+    COUNTED = ("chart", "export")
+
+    def __init__(self, per_min: int = 0, penalty: float = 10.0, mode: str = "status", window: float = 60.0):
+        if mode not in self.MODES:
+            raise ValueError(f"mode는 {self.MODES} 중 하나: {mode}")
+        self.per_min = per_min
+        self.penalty = penalty
+        self.mode = mode
+        self.window = window
+        self.blocked_until = 0.0
+        self.allowed = 0
+        self.rejected = 0
+        self._hits: Dict[str, Deque[float]] = {k: deque() for k in self.COUNTED}
+        self._lock = threading.Lock()
+
+    def hit(self, kind: str) -> bool:
+        """요청 1개 허용 여부 (차트 데이터/내보내기는 한도에 세고, 과거 봉 요청은 거부 구간만 확인)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.per_min <= 0:
+                self.allowed += 1
+                return True
+            if now < self.blocked_until:
+                self.rejected += 1
+                return False
+            hits = self._hits.get(kind)
+            if hits is not None:
+                while hits and hits[0] <= now - self.window:
+                    hits.popleft()
+                if len(hits) >= self.per_min:
+                    self.blocked_until = now + self.penalty
+                    self.rejected += 1
+                    return False
+                hits.append(now)
+            self.allowed += 1
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"per_min": self.per_min, "mode": self.mode, "allowed": self.allowed, "rejected": self.rejected}
+
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Mock chart</title>
+<style>
+body { margin: 0; font: 13px sans-serif; }
+#header-toolbar { height: 38px; display: flex; gap: 8px; align-items: center; padding: 0 8px; border-bottom: 1px solid #ccc; }
+#chart { position: relative; width: 1400px; height: 800px; }
+#legend { position: absolute; left: 8px; top: 8px; }
+[role=dialog] { position: absolute; left: 300px; top: 80px; width: 480px; background: #fff; border: 1px solid #999; padding: 8px; }
+[data-name=menu] { position: absolute; left: 600px; top: 40px; background: #fff; border: 1px solid #999; }
+[role=option], [data-name=menu-item] { padding: 4px 8px; cursor: pointer; }
+</style></head>
+<body>
+<div id="header-toolbar">
+  <span id="header-toolbar-symbol-search"></span>
+  <span id="header-toolbar-intervals"></span>
+  <button data-name="open-indicators-dialog" aria-label="Indicators">fx</button>
+  <button aria-label="Export chart data">&#8615;</button>
+</div>
+<div id="chart"><div id="legend"></div></div>
+<script>
+(function () {
+    var CFG = __CONFIG__;
+    var STEP = {"12M": 31536000, "1M": 2592000, "1W": 604800, "1D": 86400, "D": 86400, "60": 3600, "10": 600};
+    var MAX_BARS = {"12M": 40, "1M": 480, "1W": 2000, "1D": 8000, "D": 8000, "60": 20000, "10": 40000};
+    var LEGEND = {"Relative Strength Index": "RSI", "Moving Average Convergence Divergence": "MACD"};
+    var CATALOG = ["Relative Strength Index", "RSI Divergence Indicator", "MACD",
+                   "Moving Average Convergence Divergence", "Bollinger Bands", "Moving Average"];
+    var LAST_TS = 1735689600;
+    var q = new URLSearchParams(location.search);
+    var S = {symbol: q.get("symbol") || "GOOG", interval: q.get("interval") || "1D", count: 300,
+             studies: JSON.parse(localStorage.getItem("mockStudies") || "[]")};
+    var chartEl = document.getElementById("chart");
+    var canvas = null;
+
+    var later = function (ms, fn) { setTimeout(fn, ms); };
+    var el = function (html) { var d = document.createElement("div"); d.innerHTML = html.trim(); return d.firstChild; };
+    var step = function () { return STEP[S.interval] || 86400; };
+
+    // 요청 제한 흉내: 서버가 거부하면 mode에 따라 배너 표시, 데이터는 비움 (제한 없으면 요청도 안 보냄)
+    function gate(kind, done) {
+        if (!CFG.throttle) { done(true); return; }
+        fetch("/api/hit?kind=" + kind, {cache: "no-store"})
+            .then(function (r) { return r.json(); })
+            .then(function (d) { notice(d.ok); done(d.ok); }, function () { notice(false); done(false); });
+    }
+    function notice(ok) {
+        var old = document.querySelector("[data-name=toast-throttle]");
+        if (old) old.remove();
+        if (ok || CFG.throttle !== "banner") return;
+        var toast = el('<div role="alert" data-name="toast-throttle">Too many requests. Please try again later.</div>');
+        document.body.appendChild(toast);
+        later(5000, function () { toast.remove(); });
+    }
+    var firstTs = function () { return LAST_TS - (S.count - 1) * step(); };
+
+    function draw() {
+        if (!canvas) return;
+        var ctx = canvas.getContext("2d");
+        ctx.fillStyle = "#fff"; ctx.fillRect(0, 0, canvas.width, canvas.height);
+        ctx.fillStyle = "#26a69a";
+        var n = Math.min(S.count, 200);
+        for (var i = 0; i < n; i++) {
+            var h = 50 + ((i * 37 + S.count + S.symbol.length * 13) % 300);
+            ctx.fillRect(i * 7, canvas.height - h, 5, h);
+        }
+    }
+    function renderHeader() {
+        document.getElementById("header-toolbar-symbol-search").textContent = S.symbol;
+        document.getElementById("header-toolbar-intervals").textContent = S.interval;
+        var legend = document.getElementById("legend");
+        legend.innerHTML = "";
+        S.studies.forEach(function (name) {
+            legend.appendChild(el('<div><span data-name="legend-source-title">' + (LEGEND[name] || name) + ' 14</span></div>'));
+        });
+    }
+    function loadChart(ms, cb) {
+        if (canvas) { canvas.remove(); canvas = null; }
+        gate("chart", function (ok) {
+            later(ms, function () {
+                canvas = el('<canvas data-name="pane-top-canvas" width="1400" height="760"></canvas>');
+                chartEl.appendChild(canvas);
+                S.count = ok ? 300 : 0;
+                renderHeader();
+                draw();
+                attachDrag();
+                if (cb) cb();
+            });
+        });
+    }
+
+    // 지연 로딩: 드래그 1회마다 history_ms 뒤 과거 봉 chunk개 추가
+    function attachDrag() {
+        var down = null;
+        canvas.addEventListener("mousedown", function (e) { down = e.clientX; });
+        canvas.addEventListener("mouseup", function (e) {
+            if (down === null || e.clientX - down < 50) { down = null; return; }
+            down = null;
+            gate("feed", function (ok) {
+                later(CFG.historyMs, function () {
+                    if (ok && S.count) S.count = Math.min(S.count + CFG.chunk, MAX_BARS[S.interval] || 5000);
+                    draw();
+                });
+            });
+        });
+    }
+
+    window.TradingViewApi = {
+        activeChart: function () {
+            return {
+                symbol: function () { return "NASDAQ:" + S.symbol; },
+                resolution: function () { return S.interval; },
+                setSymbol: function (sym, cb) {
+                    S.symbol = sym.split(":").pop();
+                    loadChart(CFG.switchMs, cb);
+                },
+                setResolution: function (itv, cb) {
+                    S.interval = itv;
+                    loadChart(CFG.switchMs, cb);
+                }
+            };
+        },
+        _activeChartWidgetWV: {value: function () {
+            return {_chartWidget: {model: function () {
+                return {mainSeries: function () {
+                    return {bars: function () {
+                        return canvas ? {size: function () { return S.count; },
+                                         first: function () { return {value: [firstTs()]}; }} : null;
+                    }};
+                }};
+            }}};
+        }}
+    };
+
+    function closeDialogs() {
+        document.querySelectorAll("[role=dialog], [data-name=menu]").forEach(function (d) { d.remove(); });
+    }
+    document.addEventListener("keydown", function (e) { if (e.key === "Escape") closeDialogs(); });
+
+    // 지표 대화상자
+    document.querySelector("[data-name=open-indicators-dialog]").addEventListener("click", function () {
+        later(CFG.dialogMs, function () {
+            closeDialogs();
+            var dlg = el('<div role="dialog" data-name="indicators-dialog">' +
+                '<div><span>Technicals</span></div>' +
+                '<input type="text" placeholder="Search">' +
+                '<div class="results"></div>' +
+                '<button aria-label="Close">x</button></div>');
+            document.body.appendChild(dlg);
+            var input = dlg.querySelector("input");
+            input.focus();
+            input.addEventListener("input", function () {
+                var term = input.value.toLowerCase();
+                later(CFG.searchMs, function () {
+                    var box = dlg.querySelector(".results");
+                    box.innerHTML = "";
+                    CATALOG.filter(function (n) { return term && n.toLowerCase().indexOf(term) >= 0; })
+                        .forEach(function (n) {
+                            var opt = el('<div role="option"><span>' + n + '</span></div>');
+                            opt.addEventListener("click", function () {
+                                S.studies.push(n);
+                                renderHeader();
+                                draw();
+                            });
+                            box.appendChild(opt);
+                        });
+                });
+            });
+            dlg.querySelector("button").addEventListener("click", closeDialogs);
+        });
+    });
+
+    // 레이아웃 저장(Ctrl+S) → 다음 로딩에도 지표 유지
+    document.addEventListener("keydown", function (e) {
+        if (e.ctrlKey && (e.key === "s" || e.key === "S")) {
+            e.preventDefault();
+            localStorage.setItem("mockStudies", JSON.stringify(S.studies));
+        }
+    });
+
+    // 내보내기: 메뉴 → 옵션 대화상자 → 확인 → CSV 다운로드
+    document.querySelector("[aria-label='Export chart data']").addEventListener("click", function () {
+        later(CFG.dialogMs, function () {
+            closeDialogs();
+            var menu = el('<div data-name="menu"><div data-name="menu-item"><div>Export chart data…</div></div></div>');
+            document.body.appendChild(menu);
+            menu.querySelector("[data-name=menu-item]").addEventListener("click", function () {
+                menu.remove();
+                later(CFG.dialogMs, openExportDialog);
+            });
+        });
+    });
+    function openExportDialog() {
+        var iso = false;
+        var dlg = el('<div role="dialog" data-name="export-dialog">' +
+            '<div><span>Bars</span> <span>Chart</span></div>' +
+            '<label><input type="checkbox"><span>ISO time</span></label>' +
+            '<div><button><span>Export</span></button></div></div>');
+        document.body.appendChild(dlg);
+        var box = dlg.querySelector("input[type=checkbox]");
+        box.addEventListener("change", function () { iso = box.checked; });
+        dlg.querySelector("button").addEventListener("click", function () {
+            gate("export", function (ok) {
+                later(CFG.exportMs, function () {
+                    if (ok) download(buildCsv(iso));
+                    dlg.remove();
+                });
+            });
+        });
+    }
+    function buildCsv(iso) {
+        var cols = ["time", "open", "high", "low", "close"];
+        var hasRsi = S.studies.indexOf("Relative Strength Index") >= 0;
+        var hasMacd = S.studies.indexOf("MACD") >= 0 || S.studies.indexOf("Moving Average Convergence Divergence") >= 0;
+        if (hasRsi) cols.push("RSI");
+        if (hasMacd) cols.push("Histogram", "MACD", "Signal");
+        var lines = [cols.join(",")];
+        var t = firstTs(), st = step(), price = 100;
+        for (var i = 0; i < S.count; i++, t += st) {
+            price = price * (1 + Math.sin(i * 0.7 + S.symbol.length) * 0.01);
+            var row = [iso ? new Date(t * 1000).toISOString().replace(".000Z", "Z") : t,
+                       price.toFixed(2), (price * 1.01).toFixed(2), (price * 0.99).toFixed(2), (price * 1.002).toFixed(2)];
+            if (hasRsi) row.push(i < 14 ? "" : (50 + 20 * Math.sin(i * 0.3)).toFixed(4));
+            if (hasMacd) row.push((Math.sin(i * 0.2)).toFixed(4), (Math.cos(i * 0.2)).toFixed(4), (Math.cos(i * 0.21)).toFixed(4));
+            lines.push(row.join(","));
+        }
+        return lines.join("\\n") + "\\n";
+    }
+    function download(text) {
+        var a = document.createElement("a");
+        a.href = URL.createObjectURL(new Blob([text], {type: "text/csv"}));
+        a.download = "NASDAQ_" + S.symbol + ", " + S.interval + ".csv";
+        document.body.appendChild(a);
+        a.click();
+        a.remove();
+    }
+
+    loadChart(CFG.chartMs);
+})();
+</script>
+</body></html>
+"""
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        mock: MockServer = self.server.owner  # type: ignore[attr-defined]
+        throttle = mock.throttle
+        if url.path == "/api/hit":
+            # 페이지의 차트 데이터 / 과거 봉 / 내보내기 요청 (실제 사이트의 데이터 피드 대신)
+            ok = throttle is None or throttle.hit(parse_qs(url.query).get("kind", ["chart"])[0])
+            status = 429 if not ok and throttle.mode == "status" else 200
+            self._send(status, "application/json", json.dumps({"ok": ok}).encode("utf-8"))
+            return
+        if url.path not in ("/", "/chart/", "/chart"):
+            self.send_error(404)
+            return
+        if throttle is not None and not throttle.hit("page"):
+            self._send(429, "text/html; charset=utf-8", b"<html><body><h1>Too Many Requests</h1></body></html>")
+            return
+        config = dict(mock.latency.to_page(), throttle=throttle.mode if throttle else None)
+        self._send(200, "text/html; charset=utf-8", _PAGE.replace("__CONFIG__", json.dumps(config)).encode("utf-8"))
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class MockServer:
+    """모의 차트 페이지 서버 (with 문 또는 start/stop), base_url 을 Task3의 TV_BASE_URL 로 사용"""
+
+    def __init__(self, latency: MockLatency | None = None, host: str = "127.0.0.1", port: int = 0,
+                 throttle: MockThrottle | None = None):
+        self.latency = latency or MockLatency()
+        self.throttle = throttle
+        self._server = ThreadingHTTPServer((host, port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self  # type: ignore[attr-defined]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        threading.Thread(target=self._server.serve_forever, name="tv-mock", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 TradingView 모의 차트 페이지")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--scale", type=float, default=1.0, help="모든 지연 시간 배율")
+    parser.add_argument("--throttle", type=int, default=0, help="분당 차트 로딩/내보내기 한도 (0 = 제한 없음)")
+    parser.add_argument("--throttle-penalty", type=float, default=10.0, help="한도 초과 시 거부 시간(초)")
+    parser.add_argument("--throttle-mode", default="status", choices=MockThrottle.MODES)
+    args = parser.parse_args()
+    throttle = MockThrottle(args.throttle, args.throttle_penalty, args.throttle_mode) if args.throttle else None
+    with MockServer(MockLatency(scale=args.scale), port=args.port, throttle=throttle) as server:
+        print(f"[INFO] 모의 차트: {server.base_url}/chart/?symbol=GOOG&interval=1D (Ctrl+C로 종료)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
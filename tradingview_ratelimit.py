@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 요청 속도 조절기 (Task3 / Task4 / asyncio 실행기 공용)
+
+- 워커(--workers) / 탭(--tabs) / asyncio 탭이 모두 프로세스 전역 조절기 1개를 공유합니다.
+  요청 종류별 토큰 버킷(분당 횟수 + 짧은 연속 허용)으로 간격을 맞춥니다.
+  chart  : 차트 로딩(URL 이동 / 페이지 내 종목·주기 전환)
+  feed   : 지연 로딩(과거 봉 요청)
+  export : CSV 내보내기
+- 제한 신호(HTTP 429, "Too many requests" 배너, 데이터가 빈 차트)를 감지하면:
+  1) 모든 종류의 속도 배율을 절반으로 낮추고
+  2) 전체 요청을 잠시 멈춥니다(연속 감지 시 2배씩 늘림).
+  여러 탭이 같은 제한을 동시에 보고해도 정지 구간 안에서는 1번만 반영합니다.
+- 신호 없이 성공한 요청이 ramp_after번 쌓이면 배율을 ramp_step씩 올립니다(최대 ceiling).
+  마지막으로 제한에 걸렸던 배율의 90% 위에서는 3배 더 천천히 올립니다.
+  → 가법 증가 / 승법 감소(AIMD)로 제한 바로 아래의 최대 처리량에 머뭅니다.
+- 제한 감지 전에 예약해 두고 기다리던 요청도 정지 구간이 끝난 뒤 새 간격으로 다시 줄을 섭니다.
+- 지연 로딩은 드래그(과거 봉 요청)마다 feed 토큰을 1개씩 받아 페이지 루틴에 넘깁니다 (tradingview_lazyload gate).
+- 빈 차트는 없는 종목일 수도 있으므로 약한 신호로 보고, 연속 soft_after번일 때만 제한으로 처리합니다.
+
+로컬 모의 서버로 확인 (크롬 없이 HTTP 요청만, 분당 30회 초과 시 10초간 거부)
+- python tradingview_ratelimit.py --limit 30 --penalty 10 --rate 60 --threads 4 --seconds 120
+"""
+from __future__ import annotations
+import time
+import asyncio
+import argparse
+import threading
+from typing import Dict, Tuple
+
+from tradingview_trace import TRACER
+
+RATE_KINDS = ("chart", "feed", "export")
+
+# 페이지 안에서 제한 신호 수집 (문서마다 1회 설치, 지난 확인 이후 새로 생긴 429 응답만 셈)
+#   리소스 타이밍 버퍼는 비우지 않음 (tradingview_wait 대기 훅이 항목 수 변화를 네트워크 활동으로 봄).
+#   w.seen 까지는 이미 센 항목이고, 버퍼가 차면 비우는 대신 크기를 늘려 새 응답이 계속 기록되게 함
+THROTTLE_PROBE_JS = """
+var w = window.__tvThrottle;
+if (!w) {
+    w = window.__tvThrottle = {seen: 0, size: 5000};
+    try {
+        performance.setResourceTimingBufferSize(w.size);
+        performance.addEventListener('resourcetimingbufferfull', function () {
+            w.size *= 2;
+            performance.setResourceTimingBufferSize(w.size);
+        });
+    } catch (e) {}
+}
+var nav = performance.getEntriesByType('navigation')[0];
+var res = performance.getEntriesByType('resource');
+if (res.length < w.seen) w.seen = 0;
+var http429 = 0;
+for (var i = w.seen; i < res.length; i++) { if (res[i].responseStatus === 429) http429++; }
+w.seen = res.length;
+
+var re = /too many requests|rate.?limit/i, banner = null;
+var nodes = document.querySelectorAll('[role=alert], [role=dialog], [class*=toast], [data-name*=toast], [class*=banner]');
+for (var j = 0; j < nodes.length && !banner; j++) {
+    var text = nodes[j].innerText || '';
+    if (re.test(text)) banner = text.trim().slice(0, 120);
+}
+var body = document.body ? document.body.innerText || '' : '';
+if (!banner && body.length < 2000 && re.test(body)) banner = body.trim().slice(0, 120);
+
+var empty = null;
+try {
+    var api = window.TradingViewApi;
+    var widget = api && api._activeChartWidgetWV && api._activeChartWidgetWV.value();
+    var bars = widget && widget._chartWidget.model().mainSeries().bars();
+    if (bars) empty = bars.size() === 0;
+} catch (e) {}
+return {status: nav ? nav.responseStatus || 0 : 0, http429: http429, banner: banner, empty: empty};
+"""
+
+
+class ThrottleDetected(RuntimeError):
+    """페이지에서 요청 제한 신호를 감지 (단계 재시도 전에 조절기가 속도를 낮추고 잠시 멈춤)"""
+
+
+def throttle_reason(probe: Dict | None) -> Tuple[str | None, bool]:
+    """THROTTLE_PROBE_JS 결과 → (제한 사유 또는 None, 약한 신호 여부)"""
+    if not probe:
+        return None, False
+    if probe.get("status") == 429 or probe.get("http429"):
+        return "HTTP 429", False
+    if probe.get("banner"):
+        return f"banner: {probe['banner']}", False
+    if probe.get("empty"):
+        return "empty chart", True
+    return None, False
+
+
+class _Bucket:
+    """종류 1개의 토큰 버킷 (GCRA: 다음 허용 시각 tat 만 보관, 대기는 호출 측에서)"""
+
+    def __init__(self, per_min: float):
+        self.per_min = per_min
+        self.tat = 0.0
+        self.granted = 0
+        self.waited = 0.0
+        self.throttles = 0
+
+
+class RateGovernor:
+    """종류별 분당 상한 × 공유 배율(factor)로 요청 간격을 맞추고, 제한 신호에 따라 배율을 조정"""
+
+    def __init__(self, limits: Dict[str, float], burst: int = 2, ceiling: float = 1.0, floor: float = 0.1,
+                 ramp_after: int = 10, ramp_step: float = 0.1, decrease: float = 0.5,
+                 backoff: float = 30.0, max_backoff: float = 600.0, soft_after: int = 2):
+        self.buckets = {kind: _Bucket(per_min) for kind, per_min in limits.items()}
+        self.burst = max(1, burst)
+        self.factor = 1.0
+        self.ceiling = max(ceiling, floor)
+        self.floor = floor
+        self.ramp_after = ramp_after
+        self.ramp_step = ramp_step
+        self.decrease = decrease
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.soft_after = soft_after
+        self.paused_until = 0.0
+        self.streak = 0
+        self.tripped = float("inf")
+        self._epoch = 0
+        self._ok = 0
+        self._soft = 0
+        self._lock = threading.Lock()
+
+    def rate(self, kind: str) -> float:
+        """현재 분당 허용 횟수 (0 = 제한 없음)"""
+        bucket = self.buckets.get(kind)
+        return bucket.per_min * self.factor if bucket and bucket.per_min > 0 else 0.0
+
+    def interval(self, kind: str) -> float:
+        """현재 요청 사이 최소 간격(초) (0 = 제한 없음)"""
+        rate = self.rate(kind)
+        return 60.0 / rate if rate > 0 else 0.0
+
+    def _reserve(self, kind: str, epoch: int | None) -> Tuple[float, int]:
+        """토큰 1개 예약 후 (기다려야 할 시간(초), 예약 시점 epoch) 반환
+
+        epoch 가 주어지면 그 뒤로 제한 감지가 없었을 때 0을 돌려줌 (이미 기다린 예약이 그대로 유효)
+        """
+        with self._lock:
+            if epoch == self._epoch:
+                return 0.0, epoch
+            now = time.monotonic()
+            start = max(now, self.paused_until)
+            bucket = self.buckets.get(kind)
+            rate = self.rate(kind)
+            if bucket is None or rate <= 0:
+                return start - now, self._epoch
+            interval = 60.0 / rate
+            at = max(start, bucket.tat - (self.burst - 1) * interval)
+            bucket.tat = max(bucket.tat, at) + interval
+            if epoch is None:
+                bucket.granted += 1
+            bucket.waited += at - now
+            return at - now, self._epoch
+
+    def acquire(self, kind: str) -> float:
+        """차례가 올 때까지 대기 (스레드용), 기다린 시간(초) 반환"""
+        waited, epoch = 0.0, None
+        while True:
+            wait, epoch_now = self._reserve(kind, epoch)
+            if epoch_now == epoch and wait <= 0:
+                break
+            epoch = epoch_now
+            if wait > 0:
+                time.sleep(wait)
+                waited += wait
+        TRACER.record(f"rate.{kind}", waited)
+        return waited
+
+    async def acquire_async(self, kind: str) -> float:
+        """acquire 의 코루틴 버전 (기다리는 동안 다른 탭 진행)"""
+        waited, epoch = 0.0, None
+        while True:
+            wait, epoch_now = self._reserve(kind, epoch)
+            if epoch_now == epoch and wait <= 0:
+                break
+            epoch = epoch_now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                waited += wait
+        TRACER.record(f"rate.{kind}", waited)
+        return waited
+
+    def success(self, kind: str) -> None:
+        """제한 신호 없이 끝난 요청 보고 (ramp_after번 쌓이면 배율 증가)"""
+        with self._lock:
+            self.streak = 0
+            self._soft = 0
+            self._ok += 1
+            # 지난번 제한에 걸린 배율 근처에서는 더 천천히 올림
+            needed = self.ramp_after * (3 if self.factor >= 0.9 * self.tripped else 1)
+            if self._ok >= needed and self.factor < self.ceiling:
+                self._ok = 0
+                self.factor = min(self.ceiling, self.factor + self.ramp_step)
+                print(f"[INFO] 요청 속도 상향: x{self.factor:.2f} ({self._describe()})")
+
+    def throttled(self, kind: str, reason: str, soft: bool = False) -> bool:
+        """제한 신호 보고, 실제로 속도를 낮췄으면 True (정지 구간 중 중복 보고/약한 신호 1회는 무시)"""
+        with self._lock:
+            now = time.monotonic()
+            if soft:
+                self._soft += 1
+                if self._soft < self.soft_after:
+                    print(f"[WARN] {kind} 제한 의심({reason}) {self._soft}/{self.soft_after}")
+                    return False
+            self._soft = 0
+            self._ok = 0
+            if now < self.paused_until:
+                return False
+            self.streak += 1
+            pause = min(self.backoff * 2 ** (self.streak - 1), self.max_backoff)
+            self.tripped = self.factor
+            self.factor = max(self.floor, self.factor * self.decrease)
+            self.paused_until = now + pause
+            self._epoch += 1
+            # 정지가 끝나면 몰아서 보내지 않고 새 간격으로 1개씩 재개
+            for k, bucket in self.buckets.items():
+                rate = self.rate(k)
+                bucket.tat = self.paused_until + ((self.burst - 1) * 60.0 / rate if rate > 0 else 0.0)
+            if kind in self.buckets:
+                self.buckets[kind].throttles += 1
+            print(f"[WARN] 요청 제한 감지({kind}: {reason}) → {pause:.0f}s 정지, 속도 x{self.factor:.2f} "
+                  f"({self._describe()})")
+            return True
+
+    def _describe(self) -> str:
+        return ", ".join(f"{k} {self.rate(k):.0f}/min" for k, b in self.buckets.items() if b.per_min > 0) \
+            or "제한 없음"
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                kind: {
+                    "per_min": round(self.rate(kind), 2),
+                    "granted": b.granted,
+                    "waited": round(b.waited, 2),
+                    "throttles": b.throttles,
+                }
+                for kind, b in self.buckets.items()
+            }
+
+    def print_summary(self) -> None:
+        for kind, st in self.summary().items():
+            print(f"[RATE] {kind:<8} now={st['per_min']:.1f}/min granted={st['granted']:<5} "
+                  f"waited={st['waited']:.1f}s throttled={st['throttles']}")
+
+
+# -----------------------------
+# 모의 서버 상대로 확인 (크롬 없이 HTTP 요청만)
+# -----------------------------
+def simulate(limit: int, penalty: float, rate: float, threads: int, seconds: float, mode: str = "status") -> Dict:
+    """MockServer(분당 limit회 제한)에 threads개 스레드가 조절기를 거쳐 chart 요청을 보내고 결과 요약 반환"""
+    import urllib.request
+    import urllib.error
+    from tradingview_mock import MockServer, MockThrottle
+
+    governor = RateGovernor({"chart": rate}, backoff=penalty, ramp_after=5)
+    timeline = []
+    with MockServer(throttle=MockThrottle(limit, penalty, mode)) as server:
+        deadline = time.monotonic() + seconds
+        start = time.monotonic()
+
+        def _worker() -> None:
+            while True:
+                governor.acquire("chart")
+                if time.monotonic() >= deadline:
+                    return
+                try:
+                    with urllib.request.urlopen(f"{server.base_url}/api/hit?kind=chart", timeout=5) as r:
+                        ok = r.status == 200 and r.read() == b'{"ok": true}'
+                except urllib.error.HTTPError as e:
+                    ok = e.code != 429
+                if ok:
+                    governor.success("chart")
+                else:
+                    governor.throttled("chart", "HTTP 429" if mode == "status" else "rejected")
+                timeline.append((round(time.monotonic() - start, 1), ok, round(governor.rate("chart"), 1)))
+
+        workers = [threading.Thread(target=_worker, name=f"tv-sim-{i}") for i in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        stats = server.throttle.stats()
+
+    ok = sum(1 for _, good, _ in timeline if good)
+    return {
+        "requests": len(timeline),
+        "ok": ok,
+        "rejected": len(timeline) - ok,
+        "ok_per_min": round(ok / (seconds / 60), 1),
+        "final_per_min": round(governor.rate("chart"), 1),
+        "server": stats,
+        "timeline": timeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 속도 조절기를 로컬 모의 서버(요청 제한 흉내)로 확인")
+    parser.add_argument("--limit", type=int, default=30, help="모의 서버의 분당 허용 횟수")
+    parser.add_argument("--penalty", type=float, default=10.0, help="제한 초과 시 모의 서버가 거부하는 시간(초)")
+    parser.add_argument("--mode", default="status", choices=["status", "banner", "empty"],
+                        help="모의 서버가 제한을 알리는 방식 (status = HTTP 429)")
+    parser.add_argument("--rate", type=float, default=60.0, help="조절기 시작 분당 횟수")
+    parser.add_argument("--threads", type=int, default=4, help="동시에 요청하는 스레드 수 (워커/탭 흉내)")
+    parser.add_argument("--seconds", type=float, default=120.0)
+    args = parser.parse_args()
+
+    result = simulate(args.limit, args.penalty, args.rate, args.threads, args.seconds, args.mode)
+    for t, good, per_min in result["timeline"]:
+        if not good:
+            print(f"[SIM] t={t:>6.1f}s 거부됨 → 조절기 {per_min}/min")
+    print(f"\n[SIM] 요청 {result['requests']}회, 성공 {result['ok']}회 ({result['ok_per_min']}/min, "
+          f"서버 한도 {args.limit}/min), 거부 {result['rejected']}회, 마지막 속도 {result['final_per_min']}/min")
+
+
+if __name__ == "__main__":
+    main()
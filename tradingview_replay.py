@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+기록된 TradingView WebSocket 프레임 재생 서버 (피드 수집 모드 검증용)
+
+- TV_FEED_RECORD 로 기록한 프레임 JSONL(또는 직접 만든 파일)을 로컬 HTTP + WebSocket 서버로 재생합니다.
+  GET /          : 재생용 페이지 (WebSocket 연결 + 차트 캔버스 자리)
+  GET /ws        : WebSocket, 받은 프레임(recv)은 그대로 전송하고
+                   보낸 프레임(sent)은 페이지가 서버로 다시 보내게 해서(echo) 원래 순서대로 DevTools 로그에 남깁니다.
+- 외부 라이브러리 없이 표준 라이브러리만 사용 (RFC 6455 텍스트 프레임만 지원)
+
+실행 예
+- python tradingview_replay.py serve recorded.jsonl --port 8765   # 서버만 띄우기
+- python tradingview_replay.py check recorded.jsonl               # 헤드리스 크롬으로 재생 → 피드 수집 결과를 파일 해석 결과와 비교
+"""
+from __future__ import annotations
+import json
+import time
+import base64
+import socket
+import struct
+import hashlib
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from tradingview_ingest import TIME_COLUMN
+from tradingview_feed import DIR_SENT, MAIN_SERIES_ID, FeedCapture, decode_recorded, enable_capture, read_recorded
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>TV replay</title></head>
+<body>
+<canvas data-name="pane-top-canvas" width="800" height="400"></canvas>
+<script>
+window.__replayDone = false;
+var ws = new WebSocket("ws://" + location.host + "/ws");
+ws.onmessage = function (e) {
+    if (e.data.indexOf('{"__echo":') === 0) { ws.send(JSON.parse(e.data).__echo); return; }
+    if (e.data === '{"__done":true}') { window.__replayDone = true; }
+};
+</script>
+</body></html>
+"""
+
+
+# -----------------------------
+# WebSocket 최소 구현
+# -----------------------------
+def _send_text(sock: socket.socket, text: str) -> None:
+    data = text.encode("utf-8")
+    n = len(data)
+    if n < 126:
+        header = struct.pack("!BB", 0x81, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, n)
+    sock.sendall(header + data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("클라이언트 연결 종료")
+        buf += chunk
+    return buf
+
+
+def _recv_text(sock: socket.socket) -> str:
+    """클라이언트(마스킹된) 프레임 1개 읽기 (핑/퐁 등 제어 프레임은 건너뜀)"""
+    while True:
+        b1, b2 = _recv_exact(sock, 2)
+        opcode, n = b1 & 0x0F, b2 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", _recv_exact(sock, 2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", _recv_exact(sock, 8))[0]
+        mask = _recv_exact(sock, 4) if b2 & 0x80 else b"\0\0\0\0"
+        data = bytes(b ^ mask[i % 4] for i, b in enumerate(_recv_exact(sock, n)))
+        if opcode == 0x8:
+            raise ConnectionError("클라이언트 연결 종료")
+        if opcode == 0x1:
+            return data.decode("utf-8")
+
+
+class _ReplayHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        raw = b""
+        while b"\r\n\r\n" not in raw:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            raw += chunk
+        lines = raw.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+        headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:])}
+        if headers.get("upgrade", "").lower() == "websocket":
+            self._replay(headers["sec-websocket-key"])
+            return
+        body = _PAGE.encode("utf-8")
+        self.request.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                             + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+    def _replay(self, key: str) -> None:
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        self.request.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                              f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        server: ReplayServer = self.server.owner  # type: ignore[attr-defined]
+        try:
+            for rec in server.frames:
+                if rec["dir"] == DIR_SENT:
+                    # 페이지가 보낸 것처럼 되돌려 받아야 DevTools 로그 순서가 원래와 같아짐
+                    _send_text(self.request, json.dumps({"__echo": rec["data"]}))
+                    _recv_text(self.request)
+                else:
+                    _send_text(self.request, rec["data"])
+                if server.delay:
+                    time.sleep(server.delay)
+            _send_text(self.request, '{"__done":true}')
+            while True:
+                _recv_text(self.request)
+        except (ConnectionError, OSError):
+            pass
+
+
+class ReplayServer:
+    """기록된 프레임 재생 서버 (with 문 또는 start/stop)"""
+
+    def __init__(self, frames: List[Dict], host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.frames = frames
+        self.delay = delay
+        self._server = socketserver.ThreadingTCPServer((host, port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="tv-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# -----------------------------
+# 검증: 헤드리스 크롬으로 재생 → 피드 수집
+# -----------------------------
+def check(frames_path: Path, series_id: str = MAIN_SERIES_ID, timeout: float = 30) -> bool:
+    """재생 페이지에서 FeedCapture로 모은 봉이 파일을 직접 해석한 결과와 같은지 확인"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    expected = decode_recorded(frames_path, series_id).bars()
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    enable_capture(options)
+    driver = webdriver.Chrome(options=options)
+    try:
+        with ReplayServer(list(read_recorded(frames_path))) as server:
+            capture = FeedCapture(driver, series_id)
+            driver.get(server.url)
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return window.__replayDone"))
+            got = capture.collect().bars()
+    finally:
+        driver.quit()
+    same = all(np.array_equal(got[c], expected[c], equal_nan=c != TIME_COLUMN) for c in expected)
+    print(f"[{'OK' if same else 'FAIL'}] 재생 {len(expected['time'])} bars / 수집 {len(got['time'])} bars")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록된 TradingView WebSocket 프레임 재생 서버")
+    parser.add_argument("command", choices=["serve", "check"])
+    parser.add_argument("frames", type=Path, help="프레임 JSONL ({\"dir\": \"sent\"|\"recv\", \"data\": …})")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="프레임 사이 지연(초)")
+    parser.add_argument("--series", default=MAIN_SERIES_ID)
+    args = parser.parse_args()
+
+    if args.command == "check":
+        raise SystemExit(0 if check(args.frames, args.series) else 1)
+
+    with ReplayServer(list(read_recorded(args.frames)), port=args.port, delay=args.delay) as server:
+        print(f"[INFO] 재생 서버: {server.url} (Ctrl+C로 종료)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
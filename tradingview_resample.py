@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+일봉(D)으로 주/월/연봉(W, M, 12M) 만들기 (Task3 / Task4, TV_RESAMPLE_FROM_DAILY=1)
+
+- 종목마다 6개 시간프레임 중 12M/M/W는 일봉을 묶기만 하면 정확히 같은 봉이 나오므로,
+  D 작업이 저장한 일봉 데이터셋에서 바로 계산하고 브라우저 작업(차트 이동 + 지표 + 내보내기)은 건너뜁니다.
+- 묶음 경계는 거래소 달력 기준: 주 = 월요일 시작, 월 = 1일 시작, 연 = 1월 1일 시작.
+  각 봉의 시각은 그 기간의 시작일 + 기간 첫 일봉의 세션 시작 시각(TradingView 표기와 동일)입니다.
+- 계산은 파이썬 반복문 없이 numpy 그룹 집계(reduceat)로 처리합니다.
+  open = 첫 값, high = 최댓값, low = 최솟값, close = 마지막 값, volume = 합계 (NaN은 건너뜀)
+- 지표 열(RSI, MACD 등)은 일봉 값을 묶어서는 만들 수 없으므로 OHLCV 열만 만듭니다.
+"""
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from tradingview_ingest import TIME_COLUMN
+from tradingview_storage import BarDataset, ingest_bars
+
+DAILY_TF = "D"
+# 일봉에서 만들 수 있는 시간프레임 (TIMEFRAMES의 short 이름)
+DERIVED_TIMEFRAMES = ["W", "M", "12M"]
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+_DAY = 86400
+
+
+# -----------------------------
+# 기간 경계
+# -----------------------------
+def period_start_days(days: np.ndarray, tf_short: str) -> np.ndarray:
+    """epoch 일수(int64) → 그 날이 속한 기간(W/M/12M)의 시작일 epoch 일수"""
+    if tf_short == "W":
+        # 1970-01-01은 목요일 → (일수 + 3) % 7 이 월요일부터 센 요일
+        return days - (days + 3) % 7
+    unit = {"M": "M", "12M": "Y"}[tf_short]
+    return days.astype("datetime64[D]").astype(f"datetime64[{unit}]").astype("datetime64[D]").astype(np.int64)
+
+
+def session_days(times: np.ndarray, utc_offset: int = 0) -> np.ndarray:
+    """일봉 시각(epoch 초) → 거래소 달력 날짜(epoch 일수)
+
+    - utc_offset: 세션 시작이 UTC로 전날이 되는 거래소(예: 시드니)는 거래소 UTC 오프셋(초)을 지정
+    """
+    return (np.asarray(times, dtype=np.int64) + utc_offset) // _DAY
+
+
+# -----------------------------
+# 집계
+# -----------------------------
+def resample(daily: Dict[str, np.ndarray], tf_short: str, utc_offset: int = 0) -> Dict[str, np.ndarray]:
+    """시간순 일봉 {time, open, high, low, close, volume} → tf_short(W/M/12M) 봉"""
+    times = np.asarray(daily[TIME_COLUMN], dtype=np.int64)
+    if not len(times):
+        return {TIME_COLUMN: times, **{c: np.empty(0) for c in BAR_COLUMNS if c in daily}}
+    days = session_days(times, utc_offset)
+    keys = period_start_days(days, tf_short)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+
+    # 기간 시작일 + 첫 일봉의 세션 시작 시각(하루 안 오프셋)
+    out = {TIME_COLUMN: keys[starts] * _DAY + (times[starts] - days[starts] * _DAY)}
+    if "open" in daily:
+        out["open"] = _first_valid(np.asarray(daily["open"], dtype=np.float64), starts, ends)
+    if "high" in daily:
+        out["high"] = np.fmax.reduceat(np.asarray(daily["high"], dtype=np.float64), starts)
+    if "low" in daily:
+        out["low"] = np.fmin.reduceat(np.asarray(daily["low"], dtype=np.float64), starts)
+    if "close" in daily:
+        out["close"] = _last_valid(np.asarray(daily["close"], dtype=np.float64), starts, ends)
+    if "volume" in daily:
+        vol = np.asarray(daily["volume"], dtype=np.float64)
+        total = np.add.reduceat(np.nan_to_num(vol, nan=0.0), starts)
+        seen = np.add.reduceat(~np.isnan(vol), starts) > 0
+        out["volume"] = np.where(seen, total, np.nan)
+    return out
+
+
+def _first_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """기간마다 처음 나오는 NaN 아닌 값 (모두 NaN이면 NaN)"""
+    idx = np.where(np.isnan(values), len(values), np.arange(len(values)))
+    first = np.minimum.reduceat(idx, starts)
+    ok = first <= ends
+    return np.where(ok, values[np.minimum(first, len(values) - 1)], np.nan)
+
+
+def _last_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """기간마다 마지막 NaN 아닌 값 (모두 NaN이면 NaN)"""
+    idx = np.where(np.isnan(values), -1, np.arange(len(values)))
+    last = np.maximum.reduceat(idx, starts)
+    ok = last >= starts
+    return np.where(ok, values[np.maximum(last, 0)], np.nan)
+
+
+# -----------------------------
+# 데이터셋 갱신
+# -----------------------------
+def derive_from_daily(root: Path, symbol: str, since: int | None = None,
+                      targets: List[str] | None = None, utc_offset: int = 0) -> Dict[str, int]:
+    """저장된 일봉으로 W/M/12M 데이터셋을 다시 계산해 병합, {tf: 새로 추가된 봉 수} 반환
+
+    - since: 이 시각(epoch 초) 이후 일봉만 바뀐 경우, 그 시각이 속한 기간부터만 다시 계산 (증분 수집)
+      기간 중간부터 묶으면 앞부분이 빠진 봉이 기존 봉을 덮어쓰므로 기간 시작일에 맞춰 읽습니다.
+    """
+    targets = targets or DERIVED_TIMEFRAMES
+    ds = BarDataset(root, symbol, DAILY_TF)
+    columns = [c for c in BAR_COLUMNS if c in ds.columns()]
+    if not columns:
+        return {tf: 0 for tf in targets}
+
+    aligned: Dict[str, int | None] = {}
+    for tf in targets:
+        if since is None:
+            aligned[tf] = None
+        else:
+            day = period_start_days(session_days(np.array([since]), utc_offset), tf)[0]
+            aligned[tf] = int(day) * _DAY - utc_offset
+    daily = ds.read(start=min(aligned.values()) if since is not None else None, columns=columns)
+
+    added = {}
+    for tf in targets:
+        part = daily
+        if aligned[tf] is not None:
+            mask = daily[TIME_COLUMN] >= aligned[tf]
+            part = {c: v[mask] for c, v in daily.items()}
+        added[tf] = ingest_bars(resample(part, tf, utc_offset), root, symbol, tf)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 일봉으로 주/월/연봉 데이터셋 다시 만들기")
+    parser.add_argument("symbols", nargs="+", help="종목 (DB_ROOT/<symbol>/D 가 있어야 함)")
+    parser.add_argument("--db-root", type=Path, default=Path("./tv_db"))
+    parser.add_argument("--utc-offset-hours", type=float, default=0.0, help="거래소 UTC 오프셋(시간)")
+    args = parser.parse_args()
+    for sym in args.symbols:
+        added = derive_from_daily(args.db_root.resolve(), sym, utc_offset=int(args.utc_offset_hours * 3600))
+        print(f"[OK] {sym}: " + ", ".join(f"{tf} +{n}" for tf, n in added.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 작업 단계별 재시도 (Task3 / Task4)
+
+- 작업 1개(종목 × 시간프레임)를 navigate → indicators → lazy_load → export → download → store
+  단계로 나누고, 단계마다 재시도 횟수와 대기(지수 백오프)를 따로 둡니다.
+- 실패한 단계는 그 단계의 처음부터만 다시 실행하고, 앞 단계(차트 로딩, 지표, 지연 로딩으로 불러온 과거 데이터)는
+  그대로 둡니다. 예) 내보내기 메뉴 클릭이 한 번 어긋나도 몇 분 걸린 지연 로딩을 다시 하지 않음
+- 단계별 재시도 횟수는 환경 변수로 조정 가능: TV_RETRY_<STEP>=횟수 (예: TV_RETRY_EXPORT=4)
+- asyncio 실행(tradingview_async)은 같은 예산으로 run_step_async 를 씁니다 (대기 중 다른 탭 진행)
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from tradingview_trace import TRACER
+
+T = TypeVar("T")
+
+
+class StepPolicy:
+    """단계 1개의 재시도 예산: 최대 시도 횟수, 첫 대기(초), 대기 배수, 최대 대기(초)"""
+
+    def __init__(self, attempts: int, backoff: float = 1.0, factor: float = 2.0, max_backoff: float = 15.0):
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt: int) -> float:
+        """attempt번째 실패 후 다음 시도까지 대기 시간"""
+        return min(self.backoff * self.factor ** (attempt - 1), self.max_backoff)
+
+
+# 단계별 기본 예산 (지연 로딩은 비싸므로 적게, 메뉴 클릭/다운로드는 넉넉히)
+STEP_POLICIES: Dict[str, StepPolicy] = {
+    "navigate": StepPolicy(3, backoff=2.0),
+    "indicators": StepPolicy(3, backoff=1.0),
+    "lazy_load": StepPolicy(2, backoff=2.0),
+    "export": StepPolicy(4, backoff=0.5, max_backoff=5.0),
+    "download": StepPolicy(3, backoff=1.0),
+    "store": StepPolicy(3, backoff=0.5),
+}
+
+for _name, _policy in STEP_POLICIES.items():
+    _env = os.environ.get(f"TV_RETRY_{_name.upper()}")
+    if _env:
+        _policy.attempts = max(1, int(_env))
+
+
+class StepFailed(RuntimeError):
+    """단계가 재시도 예산을 모두 쓰고도 실패 (마지막 예외를 __cause__로 보관)"""
+
+    def __init__(self, step: str, attempts: int, error: Exception):
+        super().__init__(f"{step} 단계 실패 ({attempts}회 시도): {error}")
+        self.step = step
+        self.attempts = attempts
+
+
+def run_step(step: str, fn: Callable[[], T], recover: Callable[[int], None] | None = None,
+             policy: StepPolicy | None = None, label: str = "") -> T:
+    """fn을 단계 예산 안에서 재시도해 결과 반환
+
+    - recover(attempt): 재시도 직전에 호출되는 정리 함수 (열린 대화상자 닫기, 페이지 새로 고침 등)
+    - 예산을 다 쓰면 StepFailed 발생
+    """
+    policy = policy or STEP_POLICIES.get(step) or StepPolicy(1)
+    tag = f"{label} {step}".strip()
+    for attempt in range(1, policy.attempts + 1):
+        try:
+            with TRACER.span(f"step.{step}", attempt=attempt):
+                return fn()
+        except Exception as e:
+            if attempt >= policy.attempts:
+                raise StepFailed(step, attempt, e) from e
+            wait = policy.delay(attempt)
+            print(f"[WARN] {tag} 실패 ({attempt}/{policy.attempts}): {e} → {wait:.1f}s 후 이 단계만 다시 시도")
+            time.sleep(wait)
+            if recover:
+                try:
+                    recover(attempt)
+                except Exception as re:
+                    print(f"[WARN] {tag} 복구 동작 실패: {re}")
+    raise AssertionError("unreachable")
+
+
+async def run_step_async(step: str, fn: Callable[[], Awaitable[T]],
+                         recover: Callable[[int], Awaitable[None]] | None = None,
+                         policy: StepPolicy | None = None, label: str = "") -> T:
+    """run_step 의 코루틴 버전 (fn/recover는 코루틴 함수, 백오프는 asyncio.sleep)"""
+    policy = policy or STEP_POLICIES.get(step) or StepPolicy(1)
+    tag = f"{label} {step}".strip()
+    for attempt in range(1, policy.attempts + 1):
+        try:
+            with TRACER.span(f"step.{step}", attempt=attempt):
+                return await fn()
+        except Exception as e:
+            if attempt >= policy.attempts:
+                raise StepFailed(step, attempt, e) from e
+            wait = policy.delay(attempt)
+            print(f"[WARN] {tag} 실패 ({attempt}/{policy.attempts}): {e} → {wait:.1f}s 후 이 단계만 다시 시도")
+            await asyncio.sleep(wait)
+            if recover:
+                try:
+                    await recover(attempt)
+                except Exception as re:
+                    print(f"[WARN] {tag} 복구 동작 실패: {re}")
+    raise AssertionError("unreachable")
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 선택자 학습 캐시 (Task3 / Task4)
+
+- 내보내기 버튼, 지표 대화상자처럼 후보 XPath 여러 개를 차례로 시도하는 요소마다
+  어떤 후보가 성공했는지(마지막 성공 후보 = winner)와 찾는 데 걸린 시간을 JSON 파일에 기록합니다.
+- 다음 조회부터는 winner를 가장 먼저 시도하므로, 첫 번째 절대 XPath가 UI 변경으로 깨져도
+  매 작업마다 4초씩 기다린 뒤 다음 후보로 넘어가는 일이 없습니다.
+- winner가 한두 번 실패했다고 바로 바꾸지 않고, DEMOTE_AFTER 번 연속 실패한 뒤에만 다른 후보로 교체합니다.
+- 후보 확인은 페이지 안의 해석기(window.__tvResolve)가 한 번에 처리합니다. 후보 전체를 DOM 변경/프레임마다
+  함께 검사해 처음 보이고 클릭 가능한 요소를 돌려주고, 필요하면 클릭 후 DOM 변경이 잠잠해질 때까지 기다리는 것까지
+  같은 호출 안에서 끝내므로 단계마다 WebDriver 왕복은 1번입니다.
+- 페이지 안의 click()은 pointerdown/mousedown 없는 합성 클릭이라, 포인터 이벤트로 열리는 메뉴는 반응하지 않을 수 있습니다.
+  클릭 후 DOM 변화(범례/가격축 등 틱 갱신 제외)가 전혀 없으면 WebDriver 기본 클릭(실제 마우스 이벤트)으로 다시 누릅니다.
+"""
+from __future__ import annotations
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from tradingview_wait import LATENCY, TICKING_CSS, settle, dom_quiet
+
+SELECTORS_FILE = "selectors.json"
+# winner가 이 횟수만큼 연속으로 실패하면 다른 후보에게 자리를 넘김
+DEMOTE_AFTER = 3
+
+# 페이지 내 후보 해석기 (문서당 1회 설치) + 호출 (arguments: xpaths, opts, callback)
+#   opts: {timeoutMs, clickable, click, quietMs, settleMs, absent, ignore}
+#   결과: {index, element, elapsed, settled, changed, x, y} / 못 찾으면 {index: -1}
+#   (changed = 클릭 후 ignore(틱 갱신 노드) 밖의 DOM 변경 또는 체크박스/입력값 변화 여부, x/y = 요소 중심 뷰포트 좌표)
+RESOLVE_JS = """
+if (!window.__tvResolve) {
+    window.__tvResolve = function (xpaths, opts) {
+        var visible = function (el) {
+            if (!el || !el.isConnected) return false;
+            var r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            var cs = getComputedStyle(el);
+            return cs.visibility !== 'hidden' && cs.display !== 'none';
+        };
+        var usable = function (el) {
+            if (!visible(el)) return false;
+            if (!opts.clickable) return true;
+            return !el.disabled && el.getAttribute('aria-disabled') !== 'true'
+                && getComputedStyle(el).pointerEvents !== 'none';
+        };
+        var lookup = function (xp) {
+            try {
+                return document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } catch (e) { return null; }
+        };
+        var probe = function () {
+            if (opts.absent) return xpaths.every(function (xp) { return !visible(lookup(xp)); }) ? {index: 0} : null;
+            for (var i = 0; i < xpaths.length; i++) {
+                var el = lookup(xpaths[i]);
+                if (usable(el)) return {index: i, element: el};
+            }
+            return null;
+        };
+        return new Promise(function (resolve) {
+            var t0 = performance.now(), done = false, obs = null, timer = null;
+            var finish = function (res) {
+                if (done) return;
+                done = true;
+                if (obs) obs.disconnect();
+                clearTimeout(timer);
+                res.elapsed = (performance.now() - t0) / 1000;
+                if (res.index < 0 || !opts.click) { resolve(res); return; }
+                // 클릭 후 DOM 변경이 quietMs 동안 없을 때까지(최대 settleMs) 대기
+                var last = performance.now(), start = last;
+                res.changed = false;
+                var mo = new MutationObserver(function (records) {
+                    var real = records.some(function (r) {
+                        var n = r.target.nodeType === 1 ? r.target : r.target.parentElement;
+                        return n && !(opts.ignore && n.closest(opts.ignore));
+                    });
+                    if (real) { last = performance.now(); res.changed = true; }
+                });
+                mo.observe(document.documentElement, {subtree: true, childList: true, attributes: true});
+                // 체크박스/입력은 속성 변경 없이 상태만 바뀔 수 있어 클릭 전후 값을 따로 비교
+                var el = res.element;
+                var ctl = el.matches('input, select') ? el : (el.closest('label') || el).querySelector('input, select');
+                var state = function () { return ctl ? ctl.checked + '|' + ctl.value : ''; };
+                var before = state();
+                try { el.scrollIntoView({block: 'center'}); } catch (e) {}
+                var rect = el.getBoundingClientRect();
+                res.x = rect.left + rect.width / 2;
+                res.y = rect.top + rect.height / 2;
+                try { el.click(); } catch (e) { res.clickError = String(e); }
+                var tick = function () {
+                    var now = performance.now();
+                    if (now - last >= opts.quietMs || now - start >= opts.settleMs) {
+                        mo.disconnect();
+                        if (state() !== before) res.changed = true;
+                        res.settled = now - last >= opts.quietMs;
+                        res.elapsed = (now - t0) / 1000;
+                        resolve(res);
+                    } else {
+                        setTimeout(tick, 20);
+                    }
+                };
+                setTimeout(tick, 20);
+            };
+            var check = function () { var r = probe(); if (r) finish(r); };
+            check();
+            if (done) return;
+            obs = new MutationObserver(check);
+            obs.observe(document.documentElement, {subtree: true, childList: true, attributes: true});
+            // 스타일/레이아웃만 바뀌는 경우를 위해 주기적으로도 확인
+            var poll = function () { if (!done) { check(); setTimeout(poll, 50); } };
+            setTimeout(poll, 50);
+            timer = setTimeout(function () { finish({index: -1}); }, opts.timeoutMs);
+        });
+    };
+}
+var callback = arguments[arguments.length - 1];
+window.__tvResolve(arguments[0], arguments[1]).then(callback, function (e) { callback({index: -1, error: String(e)}); });
+"""
+
+
+class SelectorCache:
+    """논리 요소 이름 → {winner, candidates: {xpath: {wins, fails, streak, latency}}} (스레드 안전)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] 선택자 캐시 읽기 실패, 새로 시작합니다: {e}")
+
+    def order(self, name: str, candidates: List[str]) -> List[str]:
+        """시도 순서: winner(강등 전) → 성공 이력이 많은 후보 → 나머지는 원래 순서"""
+        with self._lock:
+            entry = self._data.get(name) or {}
+            stats = entry.get("candidates", {})
+            winner = entry.get("winner")
+
+        def rank(item: Tuple[int, str]):
+            idx, xp = item
+            st = stats.get(xp)
+            if xp == winner and st and st["streak"] < DEMOTE_AFTER:
+                return (0, 0, idx)
+            score = (st["wins"] - st["fails"]) if st else 0
+            return (1, -score, idx)
+
+        return [xp for _, xp in sorted(enumerate(candidates), key=rank)]
+
+    def record(self, name: str, winner: str | None, failed: List[str], seconds: float = 0.0) -> None:
+        """조회 1회 결과 기록 (winner가 없으면 = 모든 후보 실패, 페이지 문제일 수 있어 실패로 세지 않음)"""
+        if winner is None:
+            return
+        with self._lock:
+            entry = self._data.setdefault(name, {"winner": None, "candidates": {}})
+            stats = entry["candidates"]
+            for xp in failed:
+                st = stats.setdefault(xp, {"wins": 0, "fails": 0, "streak": 0, "latency": None})
+                st["fails"] += 1
+                st["streak"] += 1
+            st = stats.setdefault(winner, {"wins": 0, "fails": 0, "streak": 0, "latency": None})
+            st["wins"] += 1
+            st["streak"] = 0
+            st["latency"] = seconds if st["latency"] is None else round(0.7 * st["latency"] + 0.3 * seconds, 4)
+            current = stats.get(entry["winner"]) if entry["winner"] else None
+            if current is None or current["streak"] >= DEMOTE_AFTER:
+                if entry["winner"] and entry["winner"] != winner:
+                    print(f"[INFO] 선택자 교체({name}): {entry['winner']} → {winner}")
+                entry["winner"] = winner
+            self._flush()
+
+    def _flush(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+_CACHES: Dict[Path, SelectorCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_selector_cache(state_root: Path) -> SelectorCache:
+    """상태 폴더별 선택자 캐시 (프로세스 안에서 1개만 생성, 워커 스레드 간 공유)"""
+    path = Path(state_root).resolve() / SELECTORS_FILE
+    with _CACHES_LOCK:
+        if path not in _CACHES:
+            _CACHES[path] = SelectorCache(path)
+        return _CACHES[path]
+
+
+def resolve_options(timeout: float = 4, clickable: bool = True, click: bool = False,
+                    quiet: float = 0.15, settle_timeout: float = 2.0, absent: bool = False) -> Dict:
+    """페이지 내 해석기(RESOLVE_JS)에 넘길 옵션 (Selenium / DevTools 실행기 공용)"""
+    return {
+        "timeoutMs": int(timeout * 1000),
+        "clickable": clickable,
+        "click": click,
+        "quietMs": int(quiet * 1000),
+        "settleMs": int(settle_timeout * 1000),
+        "absent": absent,
+        "ignore": TICKING_CSS,
+    }
+
+
+def record_lookup(cache: SelectorCache, name: str, ordered: List[str], result: Dict, timeout: float) -> int:
+    """해석 결과를 캐시/LATENCY에 기록하고 찾은 후보 번호 반환 (못 찾았거나 클릭 실패면 -1)"""
+    idx = result.get("index", -1)
+    if result.get("clickError"):
+        print(f"[WARN] {name} 클릭 실패: {result['clickError']}")
+        idx = -1
+    if idx < 0:
+        LATENCY.record(f"selector.{name}", timeout, ok=False)
+        return -1
+    # winner보다 앞 순서였는데 찾지 못한 후보는 이번 조회에서 실패로 기록
+    cache.record(name, ordered[idx], ordered[:idx], result["elapsed"])
+    LATENCY.record(f"selector.{name}", result["elapsed"], ok=result.get("settled", True))
+    return idx
+
+
+def resolve(driver, xpaths: List[str], timeout: float = 4, clickable: bool = True, click: bool = False,
+            quiet: float = 0.15, settle_timeout: float = 2.0, absent: bool = False) -> Dict:
+    """후보 XPath 전체를 페이지 안에서 한 번에 기다려 {index, element, elapsed} 반환 (못 찾으면 index=-1)
+
+    - click=True  : 찾은 요소를 클릭하고 DOM 변경이 quiet초 동안 멈출 때까지(최대 settle_timeout) 같은 호출에서 대기
+    - absent=True : 후보가 모두 화면에서 사라질 때까지 대기 (대화상자 닫힘 확인용)
+    """
+    opts = resolve_options(timeout, clickable, click, quiet, settle_timeout, absent)
+    driver.set_script_timeout(timeout + (settle_timeout if click else 0) + 5)
+    result = driver.execute_async_script(RESOLVE_JS, xpaths, opts) or {"index": -1}
+    if result.get("error"):
+        print(f"[WARN] 선택자 해석 스크립트 오류: {result['error']}")
+    if click and result.get("index", -1) >= 0 and not result.get("clickError") and not result.get("changed"):
+        # 합성 클릭에 반응이 없음 → WebDriver 기본 클릭(pointerdown/mousedown 포함)으로 다시 시도
+        try:
+            result["element"].click()
+        except WebDriverException as e:
+            result["clickError"] = f"기본 클릭 대체 실패: {e}"
+            return result
+        result["native"] = True
+        result["settled"] = settle(driver, "selector.native_click", dom_quiet(quiet), timeout=settle_timeout)
+    return result
+
+
+def find_first(driver, cache: SelectorCache, name: str, candidates: List[str], timeout: float = 4,
+               clickable: bool = True, click: bool = False, quiet: float = 0.15, settle_timeout: float = 2.0):
+    """학습된 순서의 후보 목록을 한 번의 스크립트 호출로 해석해 처음 찾은 요소 반환 (없으면 None)"""
+    ordered = cache.order(name, candidates)
+    result = resolve(driver, ordered, timeout=timeout, clickable=clickable, click=click,
+                     quiet=quiet, settle_timeout=settle_timeout)
+    if record_lookup(cache, name, ordered, result, timeout) < 0:
+        return None
+    return result["element"]
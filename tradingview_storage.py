@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 수집 데이터 저장소 (Task3 / Task4)
+
+- (종목, 시간프레임)별 마지막 저장 봉 시각(high-water mark)을 JSON 파일에 기록합니다.
+- 내보낸 CSV는 tradingview_ingest 로 정규화(고정 스키마 열 이름, int64 시각, float64 값)한 뒤
+  종목/주기별 컬럼형 데이터셋(numpy 압축 .npz, 날짜 파티션)에 병합합니다.
+  같은 봉 시각은 새 값으로 덮어쓰므로(진행 중이던 마지막 봉 갱신) 저장량은 고유 봉 수에 비례합니다.
+- numpy 필요: pip install numpy
+"""
+from __future__ import annotations
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from tradingview_ingest import iter_bar_batches, TIME_COLUMN
+
+STATE_SUBDIR = "_state"
+MARKS_FILE = "high_water_marks.json"
+
+
+# -----------------------------
+# high-water mark 저장소
+# -----------------------------
+class HighWaterMarks:
+    """(종목, 시간프레임) → {last_ts, updated} (워커 스레드 간 공유 가능)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._marks: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                self._marks = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] high-water mark 파일 읽기 실패, 새로 시작합니다: {e}")
+
+    @staticmethod
+    def key(symbol: str, tf_short: str) -> str:
+        return f"{symbol}|{tf_short}"
+
+    def get(self, symbol: str, tf_short: str) -> Dict | None:
+        with self._lock:
+            mark = self._marks.get(self.key(symbol, tf_short))
+            return dict(mark) if mark else None
+
+    def set(self, symbol: str, tf_short: str, **fields) -> None:
+        with self._lock:
+            mark = self._marks.setdefault(self.key(symbol, tf_short), {})
+            mark.update(fields, updated=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            self._flush()
+
+    def _flush(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._marks, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+_MARKS: Dict[Path, HighWaterMarks] = {}
+_MARKS_LOCK = threading.Lock()
+
+
+def get_marks(root: Path) -> HighWaterMarks:
+    """다운로드 루트별 high-water mark 저장소 (프로세스 안에서 1개만 생성)"""
+    path = Path(root).resolve() / STATE_SUBDIR / MARKS_FILE
+    with _MARKS_LOCK:
+        if path not in _MARKS:
+            _MARKS[path] = HighWaterMarks(path)
+        return _MARKS[path]
+
+
+# -----------------------------
+# 종목/주기별 컬럼형 데이터셋 (날짜 파티션, 봉 시각 기준 중복 제거)
+# -----------------------------
+# 분봉/시간봉은 월 단위, 그 외(일/주/월/연)는 연 단위 파티션
+PARTITION_UNITS = {"10m": "M", "1h": "M"}
+
+
+class BarDataset:
+    """DB_ROOT/<symbol>/<tf>/part=<YYYY[-MM]>.npz 로 나뉜 압축 컬럼형 봉 데이터
+
+    - time 열은 int64 epoch 초, 나머지 열은 float64 (빈 값은 NaN)
+    - merge()는 같은 봉 시각이 이미 있으면 새 값으로 덮어써서 중복 없이 저장
+    - read(start, end)는 기간이 겹치는 파티션 파일만 읽음
+    """
+
+    def __init__(self, root: Path, symbol: str, tf_short: str):
+        self.symbol = symbol
+        self.tf_short = tf_short
+        self.path = Path(root) / symbol / tf_short
+        self.unit = PARTITION_UNITS.get(tf_short, "Y")
+        self._schema_file = self.path / "_schema.json"
+
+    # -----------------------------
+    # 스키마 / 파티션
+    # -----------------------------
+    def columns(self) -> List[str]:
+        if self._schema_file.exists():
+            return json.loads(self._schema_file.read_text(encoding="utf-8"))["columns"]
+        return []
+
+    def _save_columns(self, columns: List[str]) -> None:
+        self._schema_file.write_text(json.dumps({"columns": columns}, ensure_ascii=False), encoding="utf-8")
+
+    def _partition_keys(self, times):
+        return times.astype("datetime64[s]").astype(f"datetime64[{self.unit}]")
+
+    def _partition_file(self, key) -> Path:
+        return self.path / f"part={key}.npz"
+
+    def partitions(self) -> List[Path]:
+        return sorted(self.path.glob("part=*.npz"))
+
+    def _load(self, file: Path, columns: List[str]):
+        with np.load(file) as z:
+            n = len(z[TIME_COLUMN])
+            out = {TIME_COLUMN: z[TIME_COLUMN]}
+            for c in columns:
+                out[c] = z[c] if c in z.files else np.full(n, np.nan)
+        return out
+
+    # -----------------------------
+    # 쓰기
+    # -----------------------------
+    def merge(self, data: Dict[str, np.ndarray]) -> int:
+        """{time: int64[], 열이름: float64[]} 를 병합하고 새로 추가된 봉 수 반환"""
+        times = np.asarray(data[TIME_COLUMN], dtype=np.int64)
+        if not len(times):
+            return 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        columns = self.columns()
+        for c in data:
+            if c != TIME_COLUMN and c not in columns:
+                columns.append(c)
+        self._save_columns(columns)
+
+        incoming = {TIME_COLUMN: times}
+        for c in columns:
+            incoming[c] = np.asarray(data[c], dtype=np.float64) if c in data else np.full(len(times), np.nan)
+
+        keys = self._partition_keys(times)
+        added = 0
+        for key in np.unique(keys):
+            mask = keys == key
+            part = {c: v[mask] for c, v in incoming.items()}
+            file = self._partition_file(key)
+            before = 0
+            if file.exists():
+                old = self._load(file, columns)
+                before = len(old[TIME_COLUMN])
+                # 기존 행 뒤에 새 행을 붙인 뒤, 같은 시각이면 뒤쪽(새 값)을 남김
+                part = {c: np.concatenate([old[c], part[c]]) for c in part}
+            # 같은 시각이면 이번에 들어온 열은 새 값(뒤쪽), 이번 CSV에 없던 열은 기존 값(앞쪽)을 유지
+            t = part[TIME_COLUMN]
+            _, first_idx = np.unique(t, return_index=True)
+            _, last_idx = np.unique(t[::-1], return_index=True)
+            last_idx = len(t) - 1 - last_idx
+            part = {c: v[last_idx if c in data else first_idx] for c, v in part.items()}
+            added += len(first_idx) - before
+
+            tmp = file.with_name("." + file.name)
+            np.savez_compressed(tmp, **part)
+            os.replace(tmp, file)
+        return added
+
+    # -----------------------------
+    # 읽기
+    # -----------------------------
+    def read(self, start: int | None = None, end: int | None = None,
+             columns: List[str] | None = None) -> Dict[str, np.ndarray]:
+        """[start, end] (epoch 초, 양끝 포함) 구간의 봉을 시간순으로 반환"""
+        columns = columns or self.columns()
+        lo = self._partition_keys(np.array([start], dtype=np.int64))[0] if start is not None else None
+        hi = self._partition_keys(np.array([end], dtype=np.int64))[0] if end is not None else None
+        chunks = []
+        for file in self.partitions():
+            key = np.datetime64(file.stem.split("=", 1)[1], self.unit)
+            if (lo is not None and key < lo) or (hi is not None and key > hi):
+                continue
+            chunks.append(self._load(file, columns))
+        if not chunks:
+            return {TIME_COLUMN: np.empty(0, dtype=np.int64), **{c: np.empty(0) for c in columns}}
+        out = {c: np.concatenate([ch[c] for ch in chunks]) for c in chunks[0]}
+        mask = np.ones(len(out[TIME_COLUMN]), dtype=bool)
+        if start is not None:
+            mask &= out[TIME_COLUMN] >= start
+        if end is not None:
+            mask &= out[TIME_COLUMN] <= end
+        return {c: v[mask] for c, v in out.items()}
+
+    def last_time(self) -> int | None:
+        parts = self.partitions()
+        if not parts:
+            return None
+        with np.load(parts[-1]) as z:
+            return int(z[TIME_COLUMN][-1]) if len(z[TIME_COLUMN]) else None
+
+
+def _update_mark(ds: BarDataset, root: Path) -> None:
+    last = ds.last_time()
+    if last is not None:
+        get_marks(root).set(ds.symbol, ds.tf_short, last_ts=last)
+
+
+def ingest_csv(export_csv: Path, root: Path, symbol: str, tf_short: str) -> int:
+    """내보낸 CSV를 묶음 단위로 정규화해 데이터셋에 병합하고 high-water mark 갱신, 새로 추가된 봉 수 반환
+
+    내보내기는 시간순이므로 묶음을 파티션 키별로 모아 두다가, 키가 다음 파티션으로 넘어가면
+    모아 둔 파티션을 한 번에 병합하고 버립니다 (파티션마다 한 번만 다시 쓰고, 메모리는 파티션 1개 + 묶음 1개 분량).
+    같은 시각이 묶음 경계에 걸쳐도 같은 파티션 안에서 함께 병합되므로 중복이 남지 않습니다.
+    """
+    ds = BarDataset(root, symbol, tf_short)
+    pending = {"key": None, "chunks": []}
+    added = 0
+
+    def _flush() -> int:
+        chunks = pending["chunks"]
+        pending["key"], pending["chunks"] = None, []
+        if not chunks:
+            return 0
+        return ds.merge({c: np.concatenate([ch[c] for ch in chunks]) for c in chunks[0]})
+
+    for batch in iter_bar_batches(export_csv):
+        keys = ds._partition_keys(batch[TIME_COLUMN])
+        for key in np.unique(keys):
+            if pending["key"] is not None and key != pending["key"]:
+                added += _flush()
+            mask = keys == key
+            pending["key"] = key
+            pending["chunks"].append({c: v[mask] for c, v in batch.items()})
+    added += _flush()
+    _update_mark(ds, root)
+    return added
+
+
+def ingest_bars(data: Dict[str, np.ndarray], root: Path, symbol: str, tf_short: str) -> int:
+    """이미 정규화된 봉 묶음(피드 수집 등)을 데이터셋에 병합하고 high-water mark 갱신, 새로 추가된 봉 수 반환"""
+    ds = BarDataset(root, symbol, tf_short)
+    added = ds.merge(data)
+    _update_mark(ds, root)
+    return added
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+크롬 1개 안의 차트 탭 여러 개로 작업 동시 실행 (Task3 --tabs N)
+
+- 워커마다 크롬을 따로 띄우면 인스턴스당 수백 MB를 쓰고 로그인/앱 부팅도 반복됩니다.
+  작업 시간 대부분은 CPU가 아니라 네트워크/페이지를 기다리는 시간이므로,
+  로그인된 브라우저 1개에 차트 창 N개를 열고 창마다 작업 스레드 1개를 붙입니다.
+- WebDriver 세션은 한 번에 한 창에만 명령을 보낼 수 있으므로, 탭 드라이버는 명령 1개마다
+  공유 잠금을 잡고 필요하면 자기 창으로 전환한 뒤 실행합니다. 다운로드 대기, 지연 로딩 진행 확인 간격,
+  차트 로딩 대기(WebDriverWait 폴링 사이) 같은 파이썬 쪽 대기 중에는 잠금이 풀려 다른 탭이 진행합니다.
+- 탭 드라이버는 원본 드라이버의 얕은 복사본이고, 명령은 원본 클래스의 execute 를 탭 자신을 self 로 호출해 보냅니다.
+  그래서 응답으로 만들어지는 요소(WebElement)의 부모가 탭이 되어, 그 요소의 클릭/입력도 탭의 잠금/창 전환을 거칩니다.
+- 스크립트 타임아웃은 세션 전체 설정이므로 탭별로 기억해 두었다가 명령 직전에 다르면 다시 적용합니다.
+- 다운로드 폴더(Browser.setDownloadBehavior)도 브라우저 전체 설정이라, 내보내기 → 다운로드 완료 구간은
+  탭 사이에 download_lock 으로 한 번에 하나씩만 진행합니다.
+- 백그라운드 탭 스로틀링을 끄는 크롬 옵션(TAB_POOL_ARGUMENTS)이 필요하고, 탭은 가려지지 않도록 별도 창으로 엽니다.
+- 리소스 차단(Network.setBlockedURLs)은 CDP 대상(창)별 설정이라, 경량 실행이면 새 창마다 다시 적용합니다.
+"""
+from __future__ import annotations
+import copy
+import time
+import threading
+from typing import Dict, List
+
+from selenium.webdriver.remote.command import Command
+
+from tradingview_browser import block_resources
+from tradingview_wait import LATENCY
+
+# 보이지 않는 창/탭의 타이머·렌더링·requestAnimationFrame 지연을 끄는 옵션
+TAB_POOL_ARGUMENTS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=CalculateNativeWinOcclusion,IntensiveWakeUpThrottling",
+]
+# 탭 드라이버에서 긴 페이지 내 루틴(지연 로딩 등)의 진행을 확인하는 간격(초), 그 사이 다른 탭이 명령을 보냄
+TAB_POLL_INTERVAL = 0.25
+
+
+class TabPool:
+    """브라우저 1개 + 차트 창 N개, 창별 탭 드라이버를 돌려줌 (명령별 잠금 대기 시간은 LATENCY tab.lock_wait 로 기록)"""
+
+    def __init__(self, driver, size: int, window_size=(1600, 1000), block_patterns: List[str] | None = None):
+        self.driver = driver
+        self.lock = threading.Lock()
+        self.download_lock = threading.Lock()
+        self.handles: List[str] = [driver.current_window_handle]
+        for _ in range(size - 1):
+            driver.switch_to.new_window("window")
+            driver.set_window_size(*window_size)
+            self.handles.append(driver.current_window_handle)
+        self._current = driver.current_window_handle
+        self._timeouts: Dict[str, int] = {}
+        self.tabs = [self._make_tab(i, h) for i, h in enumerate(self.handles)]
+        for tab in self.tabs:
+            keep_active(tab)
+            if block_patterns:
+                try:
+                    block_resources(tab, block_patterns)
+                except Exception as e:
+                    print(f"[WARN] 탭 {tab.tab_index} 리소스 차단 설정 실패(무시하고 계속): {e}")
+        print(f"[INFO] 탭 풀: 브라우저 1개에 차트 창 {size}개")
+
+    def __len__(self) -> int:
+        return len(self.tabs)
+
+    def _make_tab(self, index: int, handle: str):
+        tab = copy.copy(self.driver)
+        # 원본 드라이버에 묶인 execute 가 아니라 클래스 메서드를 탭으로 호출 (응답 요소의 부모 = 탭)
+        driver_execute = type(self.driver).execute
+        wanted: Dict[str, int] = {}
+
+        def base_execute(command, params=None):
+            return driver_execute(tab, command, params)
+
+        def execute(command, params=None):
+            # 타임아웃 설정은 탭별로 기억만 하고, 실제 적용은 그 탭의 다음 명령 직전에
+            if command == Command.SET_TIMEOUTS:
+                wanted.update(params or {})
+                return {"value": None}
+            t0 = time.time()
+            with self.lock:
+                LATENCY.record("tab.lock_wait", time.time() - t0)
+                if self._current != handle:
+                    base_execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+                    self._current = handle
+                diff = {k: v for k, v in wanted.items() if self._timeouts.get(k) != v}
+                if diff:
+                    base_execute(Command.SET_TIMEOUTS, diff)
+                    self._timeouts.update(diff)
+                return base_execute(command, params)
+
+        tab.execute = execute
+        tab.tab_index = index
+        tab.download_lock = self.download_lock
+        return tab
+
+    def close(self) -> None:
+        self.driver.quit()
+
+
+def is_tab(driver) -> bool:
+    """탭 풀의 탭 드라이버인지 (긴 대기를 잠금 밖에서 나눠 해야 하는지)"""
+    return hasattr(driver, "tab_index")
+
+
+def keep_active(tab) -> None:
+    """창이 포커스를 잃어도 페이지가 활성 상태로 동작하도록 CDP로 고정 (실패해도 계속)"""
+    for cmd, params in (("Emulation.setFocusEmulationEnabled", {"enabled": True}),
+                        ("Page.setWebLifecycleState", {"state": "active"})):
+        try:
+            tab.execute_cdp_cmd(cmd, params)
+        except Exception as e:
+            print(f"[WARN] 탭 {tab.tab_index} {cmd} 실패(무시하고 계속): {e}")
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 수집 작업 단계별 시간 측정 (Task3 / Task4)
+
+- 작업(job) 1개와 그 안의 단계(드라이버 시작, 쿠키 로드, go_chart, 지표 추가, 지연 로딩 휠/드래그,
+  내보내기 세부 단계, 다운로드 대기, 저장 …)마다 span을 JSON 한 줄씩 기록합니다.
+  {"run", "symbol", "tf", "step", "start", "seconds", "ok", "worker", …추가 필드}
+- 작업 정보(종목/시간프레임)는 컨텍스트 변수로 보관되므로 병렬 워커 스레드나 asyncio 작업(탭)끼리도 span이 섞이지 않습니다.
+- 요약: python tradingview_trace.py summary <traces.jsonl> [--top 15]
+  단계별 / 시간프레임×단계별 / 종목별 p50·p95와 전체 시간 중 비중을 표로 출력합니다.
+"""
+from __future__ import annotations
+import json
+import time
+import argparse
+import functools
+import threading
+from contextvars import ContextVar
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+TRACES_SUBDIR = "traces"
+JOB_STEP = "job"
+
+# 현재 작업 {symbol, tf, worker} (스레드마다, asyncio 작업마다 따로)
+_JOB: ContextVar[Dict | None] = ContextVar("tv_trace_job", default=None)
+
+
+class Tracer:
+    """span 기록기 (open 전에는 아무것도 쓰지 않음, 스레드 안전)"""
+
+    def __init__(self):
+        self.path: Path | None = None
+        self.run_id = ""
+        self._fh = None
+        self._lock = threading.Lock()
+
+    def open(self, path: Path) -> "Tracer":
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = self.path.stem
+        self._fh = open(self.path, "a", encoding="utf-8", buffering=1)
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+
+    # -----------------------------
+    # 기록
+    # -----------------------------
+    def record(self, step: str, seconds: float, ok: bool = True, start: float | None = None, **extra) -> None:
+        """이미 측정된 구간을 span으로 기록 (브라우저 안에서 잰 지연 로딩 단계 등)"""
+        if self._fh is None:
+            return
+        ctx = _JOB.get() or {}
+        rec = {
+            "run": self.run_id,
+            "symbol": ctx.get("symbol"),
+            "tf": ctx.get("tf"),
+            "step": step,
+            "start": round(start if start is not None else time.time() - seconds, 3),
+            "seconds": round(seconds, 4),
+            "ok": ok,
+            "worker": ctx.get("worker") or threading.current_thread().name,
+        }
+        rec.update(extra)
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._fh:
+                self._fh.write(line)
+
+    @contextmanager
+    def span(self, step: str, **extra) -> Iterator[Dict]:
+        """with TRACER.span("export.confirm") as sp: … (sp["ok"] = False 로 실패 표시 가능, 예외 시 자동 실패)"""
+        info: Dict = {"ok": True}
+        start = time.time()
+        try:
+            yield info
+        except BaseException:
+            info["ok"] = False
+            raise
+        finally:
+            ok = info.pop("ok")
+            extra.update(info)
+            self.record(step, time.time() - start, ok=ok, start=start, **extra)
+
+    @contextmanager
+    def job(self, symbol: str, tf: str, worker: str | None = None) -> Iterator[Dict]:
+        """작업 1개 구간: 안쪽 span에 종목/시간프레임을 붙이고, 끝나면 step="job" span 기록
+
+        worker: 스레드 이름 대신 기록할 워커 이름 (한 스레드에서 여러 탭을 돌리는 asyncio 실행용)
+        """
+        token = _JOB.set({"symbol": symbol, "tf": tf, "worker": worker})
+        try:
+            with self.span(JOB_STEP) as info:
+                yield info
+        finally:
+            _JOB.reset(token)
+
+
+TRACER = Tracer()
+
+
+def traced(step: str) -> Callable:
+    """함수 호출 전체를 span 1개로 기록하는 데코레이터 (@traced("chart.go"))"""
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with TRACER.span(step):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def open_trace(state_root: Path) -> Tracer:
+    """state_root/traces/run_<시각>.jsonl 에 이번 실행의 span 기록 시작"""
+    return TRACER.open(Path(state_root) / TRACES_SUBDIR / f"run_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+
+# -----------------------------
+# 요약
+# -----------------------------
+def load_spans(paths: List[Path]) -> List[Dict]:
+    spans = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * q))]
+
+
+def _table(title: str, groups: Dict[Tuple, List[Dict]], total: float, top: int) -> None:
+    rows = []
+    for key, items in groups.items():
+        secs = [s["seconds"] for s in items]
+        rows.append((key, len(secs), _percentile(secs, 0.5), _percentile(secs, 0.95), sum(secs),
+                     sum(1 for s in items if not s["ok"])))
+    rows.sort(key=lambda r: r[4], reverse=True)
+    print(f"\n== {title} (합계 시간 순, 상위 {top}) ==")
+    print(f"{'':<40} {'n':>5} {'p50':>8} {'p95':>8} {'total':>9} {'share':>6} {'fail':>5}")
+    for key, n, p50, p95, tot, fails in rows[:top]:
+        name = " / ".join(str(k) for k in key)
+        share = tot / total * 100 if total else 0
+        print(f"{name:<40} {n:>5} {p50:>7.2f}s {p95:>7.2f}s {tot:>8.1f}s {share:>5.1f}% {fails:>5}")
+
+
+def summarize(spans: List[Dict], top: int = 15) -> None:
+    jobs = [s for s in spans if s["step"] == JOB_STEP]
+    steps = [s for s in spans if s["step"] != JOB_STEP]
+    wall = sum(s["seconds"] for s in jobs)
+    if jobs:
+        secs = [s["seconds"] for s in jobs]
+        span = max(s["start"] + s["seconds"] for s in jobs) - min(s["start"] for s in jobs)
+        print(f"[TRACE] 작업 {len(jobs)}개 (실패 {sum(1 for s in jobs if not s['ok'])}), "
+              f"작업 p50={_percentile(secs, 0.5):.1f}s p95={_percentile(secs, 0.95):.1f}s, "
+              f"실행 시간 {span / 60:.1f}분 ({len(jobs) / max(span / 60, 1e-9):.1f} jobs/min)")
+
+    by_step: Dict[Tuple, List[Dict]] = defaultdict(list)
+    by_tf_step: Dict[Tuple, List[Dict]] = defaultdict(list)
+    for s in steps:
+        by_step[(s["step"],)].append(s)
+        by_tf_step[(s.get("tf") or "-", s["step"])].append(s)
+    by_symbol: Dict[Tuple, List[Dict]] = defaultdict(list)
+    for s in jobs:
+        by_symbol[(s.get("symbol") or "-",)].append(s)
+
+    # 단계는 서로 겹칠 수 있어(상위 단계 안의 하위 단계) 비중은 전체 작업 시간 대비로 표시
+    _table("단계별", by_step, wall, top)
+    _table("시간프레임 × 단계", by_tf_step, wall, top)
+    _table("종목별 작업 시간", by_symbol, wall, top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TradingView 수집 단계별 시간 요약")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("traces", type=Path, nargs="+", help="span JSONL 파일 (여러 개 가능)")
+    parser.add_argument("--top", type=int, default=15, help="표마다 보여줄 행 수")
+    args = parser.parse_args()
+    summarize(load_spans(args.traces), args.top)
+
+
+if __name__ == "__main__":
+    main()
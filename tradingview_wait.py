@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+TradingView 조건 기반 대기 (Task2 / Task3 공용)
+
+- 고정 time.sleep 대신 "페이지가 실제로 준비된 시점"까지만 기다립니다.
+  1) DOM 조건 : 요소 존재/클릭 가능/사라짐, 기다리는 메뉴/다이얼로그 안의 DOM 변경(MutationObserver)이 일정 시간 멈춤
+     (범례/가격축/시계처럼 틱마다 바뀌는 노드는 무시)
+  2) 네트워크  : fetch/XHR 진행 중 요청 0개 + 리소스 수 변화 없음이 일정 시간 유지
+  3) 캔버스    : 차트 캔버스의 과거 구간(마지막 봉 쪽 오른편 제외)을 32x16으로 축소한 픽셀 서명이 일정 시간 변하지 않음
+- 모든 대기는 단계(step) 이름과 함께 기록되어, 단계별 관측 지연 이력(LATENCY)을 남깁니다.
+"""
+from __future__ import annotations
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Any
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+POLL_FREQUENCY = 0.05
+CHART_CANVAS_CSS = 'canvas[data-name="pane-top-canvas"]'
+# dom_quiet 기본 감시 범위: 메뉴/다이얼로그(오버레이) 안의 변경만 봄
+OVERLAY_CSS = '[role="dialog"], [data-name="menu"], [data-name="popup-menu-container"], #overlap-manager-root'
+# 실시간 차트에서 틱마다 바뀌는 노드 (범례 값, 가격축/시간축, 시계): DOM 변경으로 치지 않음
+TICKING_CSS = '[data-name="legend"], [class*="legend"], [class*="price-axis"], [class*="time-axis"], [class*="clock"]'
+# 캔버스 서명에 쓰는 왼쪽 비율 (오른쪽 끝의 마지막 봉은 틱마다 다시 그려지므로 제외)
+CANVAS_HISTORY_FRACTION = 0.85
+
+Condition = Callable[[Any], Any]
+
+
+# -----------------------------
+# 단계별 관측 지연 이력
+# -----------------------------
+class LatencyHistory:
+    """단계 이름별 최근 대기 시간(초)과 시간 초과 횟수 보관 (스레드 안전)"""
+
+    def __init__(self, maxlen: int = 200):
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=maxlen))
+        self._timeouts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, step: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self._samples[step].append(seconds)
+            if not ok:
+                self._timeouts[step] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """단계별 횟수/평균/p95/최대/시간초과 수"""
+        out: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for step, samples in self._samples.items():
+                xs = sorted(samples)
+                if not xs:
+                    continue
+                out[step] = {
+                    "count": len(xs),
+                    "mean": sum(xs) / len(xs),
+                    "p95": xs[min(len(xs) - 1, int(len(xs) * 0.95))],
+                    "max": xs[-1],
+                    "timeouts": self._timeouts.get(step, 0),
+                }
+        return out
+
+    def print_summary(self) -> None:
+        for step, st in sorted(self.summary().items()):
+            print(f"[WAIT] {step:<28} n={st['count']:<4} mean={st['mean']:.2f}s "
+                  f"p95={st['p95']:.2f}s max={st['max']:.2f}s timeout={st['timeouts']}")
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.summary(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+LATENCY = LatencyHistory()
+
+
+# -----------------------------
+# 페이지 내 감시 훅 (문서마다 1회 설치)
+# -----------------------------
+PROBE_JS = """
+var w = window.__tvWait;
+var now = performance.now();
+var scope = arguments[0] || '';
+if (!w) {
+    w = window.__tvWait = {lastMut: {}, inflight: 0, lastNet: now, resources: -1};
+    var ticking = %s;
+    var touches = function (r, node, sel) {
+        if (node.closest(sel)) return true;
+        var lists = [r.addedNodes, r.removedNodes];
+        for (var l = 0; l < lists.length; l++) {
+            for (var n = 0; n < lists[l].length; n++) {
+                var x = lists[l][n];
+                if (x.nodeType === 1 && (x.matches(sel) || x.querySelector(sel))) return true;
+            }
+        }
+        return false;
+    };
+    new MutationObserver(function (records) {
+        var t = performance.now(), keys = Object.keys(w.lastMut);
+        for (var i = 0; i < records.length; i++) {
+            var r = records[i];
+            var node = r.target.nodeType === 1 ? r.target : r.target.parentElement;
+            if (!node || node.closest(ticking)) continue;
+            for (var k = 0; k < keys.length; k++) {
+                if (keys[k] === '' || touches(r, node, keys[k])) w.lastMut[keys[k]] = t;
+            }
+        }
+    }).observe(document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true});
+    var done = function () { w.inflight--; w.lastNet = performance.now(); };
+    if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function () {
+            w.inflight++; w.lastNet = performance.now();
+            return origFetch.apply(this, arguments).finally(done);
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        w.inflight++; w.lastNet = performance.now();
+        this.addEventListener('loadend', done);
+        return origSend.apply(this, arguments);
+    };
+}
+if (!(scope in w.lastMut)) w.lastMut[scope] = now;
+var res = performance.getEntriesByType('resource').length;
+if (res !== w.resources) { w.resources = res; w.lastNet = now; }
+return {sinceMut: (now - w.lastMut[scope]) / 1000, sinceNet: (now - w.lastNet) / 1000, inflight: Math.max(0, w.inflight)};
+""" % json.dumps(TICKING_CSS)
+
+CANVAS_SIGNATURE_JS = """
+var src = document.querySelector(arguments[0]);
+if (!src || !src.width || !src.height) return null;
+var sw = Math.max(1, Math.floor(src.width * (arguments[1] || 1)));
+var c = window.__tvWaitCanvas || (window.__tvWaitCanvas = document.createElement('canvas'));
+c.width = 32; c.height = 16;
+var ctx = c.getContext('2d');
+ctx.clearRect(0, 0, 32, 16);
+ctx.drawImage(src, 0, 0, sw, src.height, 0, 0, 32, 16);
+var d = ctx.getImageData(0, 0, 32, 16).data, h = 0;
+for (var i = 0; i < d.length; i++) { h = (h * 31 + d[i]) | 0; }
+return h;
+"""
+
+
+def _probe(driver, scope: str = "") -> Dict[str, float]:
+    return driver.execute_script(PROBE_JS, scope)
+
+
+# -----------------------------
+# 조건 (WebDriverWait.until 에 그대로 넘길 수 있는 callable)
+# -----------------------------
+def dom_present(xpath: str) -> Condition:
+    return EC.presence_of_element_located((By.XPATH, xpath))
+
+
+def dom_clickable(xpath: str) -> Condition:
+    return EC.element_to_be_clickable((By.XPATH, xpath))
+
+
+def dom_absent(xpath: str) -> Condition:
+    return lambda d: not d.find_elements(By.XPATH, xpath)
+
+
+def dom_quiet(quiet: float = 0.15, scope: str = OVERLAY_CSS) -> Condition:
+    """scope(CSS) 안의 DOM 변경이 quiet초 동안 없으면 참 (메뉴/다이얼로그 애니메이션, 검색 결과 렌더 완료)
+
+    조건을 만든 뒤 첫 확인 시점부터 잽니다. 클릭 직후 메뉴가 아직 안 열렸는데 이전부터 조용했다고 바로 통과하지 않도록.
+    """
+    state = {"start": None}
+
+    def _cond(d):
+        now = time.monotonic()
+        if state["start"] is None:
+            state["start"] = now
+        return min(_probe(d, scope)["sinceMut"], now - state["start"]) >= quiet
+    return _cond
+
+
+def chart_focused(css: str = CHART_CANVAS_CSS) -> Condition:
+    """포커스가 차트 캔버스를 품은 요소(또는 캔버스 자신)에 있으면 참 (단축키 입력 직전 확인용)"""
+    return lambda d: d.execute_script(
+        "var c = document.querySelector(arguments[0]), a = document.activeElement;"
+        "return !!(c && a && a !== document.body && (a === c || a.contains(c)));", css)
+
+
+def network_idle(quiet: float = 0.5) -> Condition:
+    """진행 중 fetch/XHR 0개 + 새 리소스 로드 없음이 quiet초 유지되면 참"""
+    def _cond(d):
+        st = _probe(d)
+        return st["inflight"] == 0 and st["sinceNet"] >= quiet
+    return _cond
+
+
+def canvas_settled(quiet: float = 0.3, css: str = CHART_CANVAS_CSS) -> Condition:
+    """차트 캔버스 과거 구간의 픽셀 서명이 quiet초 동안 그대로면 참 (다시 그리기 완료, 마지막 봉 틱은 무시)"""
+    state = {"sig": None, "since": 0.0}
+
+    def _cond(d):
+        sig = d.execute_script(CANVAS_SIGNATURE_JS, css, CANVAS_HISTORY_FRACTION)
+        now = time.monotonic()
+        if sig is None:
+            return False
+        if sig != state["sig"]:
+            state["sig"], state["since"] = sig, now
+            return False
+        return now - state["since"] >= quiet
+    return _cond
+
+
+def all_of(*conditions: Condition) -> Condition:
+    """모든 조건이 같은 폴링 시점에 참일 때 참"""
+    return lambda d: all(c(d) for c in conditions)
+
+
+def any_of(*conditions: Condition) -> Condition:
+    """조건 중 하나라도 참이면 참"""
+    return lambda d: any(c(d) for c in conditions)
+
+
+def chart_ready(quiet: float = 0.3) -> Condition:
+    """차트 진입/지표 추가 직후: 캔버스 존재 + 네트워크 한산 + 다시 그리기 완료"""
+    return all_of(EC.presence_of_element_located((By.CSS_SELECTOR, CHART_CANVAS_CSS)),
+                  network_idle(quiet), canvas_settled(quiet))
+
+
+# -----------------------------
+# 대기 함수
+# -----------------------------
+def wait_until(driver, step: str, condition: Condition, timeout: float = 10):
+    """조건이 참이 될 때까지 대기 후 결과 반환, 시간 초과 시 TimeoutException"""
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY,
+                               ignored_exceptions=(WebDriverException,)).until(condition)
+    except TimeoutException:
+        LATENCY.record(step, time.monotonic() - start, ok=False)
+        raise
+    LATENCY.record(step, time.monotonic() - start)
+    return result
+
+
+def settle(driver, step: str, condition: Condition, timeout: float = 5) -> bool:
+    """wait_until과 같지만 시간 초과해도 예외 없이 False 반환 (기존 고정 sleep 대체용)"""
+    try:
+        wait_until(driver, step, condition, timeout)
+        return True
+    except TimeoutException:
+        print(f"[WARN] 대기 시간 초과: {step} ({timeout}s)")
+        return False